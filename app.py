@@ -1,304 +1,186 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-import tempfile
-import pdfkit
+from io import BytesIO
 import os
 import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Mapping
+from itertools import takewhile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from artifacts import ArtifactStore, content_key
+from bulk_export import BulkExporter
+from bulk_search import (COURT_FIELDS, DATE_FORMAT, MAX_BULK_QUERIES, case_number_key, date_range, in_range,
+                         index_cause_list, normalize_queries)
+from case_history import MAX_HISTORY, CaseHistory
+from case_index import CaseIndex
+from cache import ResponseCache, cache_key, date_ttl, parse_date
+from causelist_store import CauseListStore
+from cnr import normalize as normalize_cnr, parse as parse_cnr
+import compression
+from compression import CompressionMiddleware, Compressor
+from causelist_engine import (CASE_STATUS_PATH, CAUSE_LIST_PATH, DEFAULT_BASE_URL, CauseListKey, case_status_form,
+                              cause_list_form, cnr_status_form)
+from court_directory import CourtDirectory
+import html_renderer
+import metrics
+from metrics import REGISTRY, MetricsMiddleware, SlowRequestProfiler, stage
+from party_search import PartySearch
+from parsers import ParseError, is_captcha_page, parse_case_status, parse_cause_list
+from pdf_renderer import PDF_BACKEND, can_render, case_details_pdf, cause_list_pdf, cause_list_texts, html_to_pdf
+from prewarm import PrewarmCrawler
+from records import CASE_FIELDS, CaseDetails, CauseList, json_default
+from session_pool import NO_SESSION, CaptchaError, SessionPool
+from transport import Transport
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['ETag'])
+
+HIERARCHY_MAX_AGE = 300
+
+RAW_JSON_PLACEHOLDER = '\x00' + uuid.uuid4().hex
+
+if orjson is not None:
+    # Dataclasses and dates go through default() so they come out as with the json module.
+    ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+                      | orjson.OPT_PASSTHROUGH_DATETIME)
+
+class ApiJSONProvider(DefaultJSONProvider):
+    @staticmethod
+    def default(o):
+        if isinstance(o, Mapping):
+            return dict(o)
+        try:
+            return json_default(o)
+        except TypeError:
+            return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and 'indent' not in kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        return self._splice_cause_lists(
+            lambda default: DefaultJSONProvider.dumps(self, obj, **{'default': default, **kwargs}))
+
+    def dumps_bytes(self, obj):
+        """``obj`` as compact UTF-8 JSON, encoded by orjson when it is installed."""
+        if orjson is None:
+            return self.dumps(obj, separators=(',', ':')).encode('utf-8')
+        return self._splice_cause_lists(lambda default: orjson.dumps(obj, default=default, option=ORJSON_OPTIONS))
+
+    def _splice_cause_lists(self, encode):
+        # Cause lists are written straight from their columns and spliced in,
+        # instead of being expanded into a list of dicts first. ``encode``
+        # takes the ``default`` hook and returns str or bytes.
+        cause_lists = []
+
+        def default(o):
+            if isinstance(o, CauseList):
+                cause_lists.append(o)
+                return RAW_JSON_PLACEHOLDER
+            return self.default(o)
+
+        body = encode(default)
+        if not cause_lists:
+            return body
+        text = isinstance(body, str)
+        marker = json.dumps(RAW_JSON_PLACEHOLDER)
+        parts = body.split(marker if text else marker.encode('ascii'))
+        out = [parts[0]]
+        for cause_list, part in zip(cause_lists, parts[1:]):
+            data = cause_list.to_json()
+            out.append(data if text else data.encode('ascii'))
+            out.append(part)
+        return ('' if text else b'').join(out)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        body = self.dumps_bytes(self._prepare_response_obj(args, kwargs))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+app.json = ApiJSONProvider(app)
 
 class ECourtsScraper:
-    def __init__(self):
-        self.base_url = "https://services.ecourts.gov.in/ecourtindia_v6/"
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, directory=None, transport=None, cache=None, index=None, sessions=None):
+        self.directory = directory or CourtDirectory()
+        self.cache = cache or ResponseCache.from_env()
+        self.index = index if index is not None else CaseIndex.from_env()
+        self.cause_list_listeners = [lambda key, cases: self.index.ingest(key[:4], key.date, cases)]
+        self.case_listeners = []
+        self.base_url = os.environ.get('ECOURTS_BASE_URL', DEFAULT_BASE_URL)
+        self.live = os.environ.get('ECOURTS_LIVE') == '1'
+        self.transport = transport or Transport.from_env(headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
         })
+        self.sessions = sessions or SessionPool.from_env(self.transport, self.base_url, self.live)
 
     def get_states(self):
-        return {
-            '26': 'Maharashtra',
-            '07': 'Delhi', 
-            '29': 'Karnataka',
-            '21': 'Odisha',
-            '01': 'Andhra Pradesh',
-            '32': 'Tamil Nadu',
-            '09': 'Gujarat',
-            '03': 'Assam'
-        }
+        return self.directory.states()
+
+    def get_hierarchy(self, state_code=None):
+        return self.directory.hierarchy(state_code)
 
     def get_districts(self, state_code):
-        districts_data = {
-            '26': {  # Maharashtra
-                '1': 'Mumbai',
-                '2': 'Pune',
-                '3': 'Nagpur',
-                '4': 'Thane',
-                '5': 'Nashik'
-            },
-            '07': {  # Delhi
-                '1': 'New Delhi',
-                '2': 'Central Delhi', 
-                '3': 'East Delhi',
-                '4': 'North Delhi',
-                '5': 'South Delhi'
-            },
-            '29': {  # Karnataka
-                '1': 'Bangalore',
-                '2': 'Mysore',
-                '3': 'Hubli',
-                '4': 'Belgaum',
-                '5': 'Gulbarga'
-            },
-            '21': {  # Odisha
-                '1': 'Cuttack',
-                '2': 'Bhubaneswar',
-                '3': 'Puri',
-                '4': 'Sambalpur'
-            },
-            '01': {  # Andhra Pradesh
-                '1': 'Visakhapatnam',
-                '2': 'Vijayawada',
-                '3': 'Guntur',
-                '4': 'Tirupati'
-            }
-        }
-        return districts_data.get(state_code, {})
+        return self.directory.districts(state_code)
 
     def get_court_complexes(self, state_code, dist_code):
-        complexes_data = {
-            '26': {  # Maharashtra
-                '1': {  # Mumbai
-                    '1': 'City Civil and Sessions Court',
-                    '2': 'Small Causes Court',
-                    '3': 'Metropolitan Magistrate Court',
-                    '4': 'High Court - Appellate Side',
-                    '5': 'High Court - Original Side'
-                },
-                '2': {  # Pune
-                    '1': 'District and Sessions Court',
-                    '2': 'Civil Court',
-                    '3': 'Family Court',
-                    '4': 'Labour Court'
-                },
-                '3': {  # Nagpur
-                    '1': 'District Court',
-                    '2': 'Civil Court Complex',
-                    '3': 'Family Court'
-                },
-                '4': {  # Thane
-                    '1': 'District Court',
-                    '2': 'Civil Court'
-                },
-                '5': {  # Nashik
-                    '1': 'District Court',
-                    '2': 'Civil Court'
-                }
-            },
-            '07': {  # Delhi
-                '1': {  # New Delhi
-                    '1': 'Tis Hazari Courts',
-                    '2': 'Patiala House Courts', 
-                    '3': 'Saket Courts',
-                    '4': 'Karkardooma Courts',
-                    '5': 'Dwarka Courts'
-                },
-                '2': {  # Central Delhi
-                    '1': 'Central District Courts',
-                    '2': 'Rohini Courts'
-                },
-                '3': {  # East Delhi
-                    '1': 'East District Courts'
-                },
-                '4': {  # North Delhi
-                    '1': 'North District Courts'
-                },
-                '5': {  # South Delhi
-                    '1': 'South District Courts'
-                }
-            },
-            '29': {  # Karnataka
-                '1': {  # Bangalore
-                    '1': 'City Civil Court',
-                    '2': 'Small Causes Court',
-                    '3': 'Family Court',
-                    '4': 'Labour Court'
-                },
-                '2': {  # Mysore
-                    '1': 'District Court Complex',
-                    '2': 'Civil Court'
-                },
-                '3': {  # Hubli
-                    '1': 'District Court'
-                },
-                '4': {  # Belgaum
-                    '1': 'District Court'
-                },
-                '5': {  # Gulbarga
-                    '1': 'District Court'
-                }
-            }
-        }
-        return complexes_data.get(state_code, {}).get(dist_code, {})
+        return self.directory.complexes(state_code, dist_code)
 
     def get_courts(self, state_code, dist_code, complex_code):
-        courts_data = {
-            '26': {  # Maharashtra
-                '1': {  # Mumbai
-                    '1': {  # City Civil and Sessions Court
-                        '1': 'Court Room 1 - Sessions Judge',
-                        '2': 'Court Room 2 - Additional Sessions Judge', 
-                        '3': 'Court Room 3 - Civil Judge',
-                        '4': 'Court Room 4 - Fast Track Court',
-                        '5': 'Court Room 5 - Special Court'
-                    },
-                    '2': {  # Small Causes Court
-                        '1': 'Judge Chamber 1 - Small Causes',
-                        '2': 'Judge Chamber 2 - Small Causes',
-                        '3': 'Judge Chamber 3 - Small Causes'
-                    },
-                    '3': {  # Metropolitan Magistrate Court
-                        '1': 'MM Court 1 - 19th Court',
-                        '2': 'MM Court 2 - 37th Court',
-                        '3': 'MM Court 3 - 52nd Court'
-                    },
-                    '4': {  # High Court - Appellate Side
-                        '1': 'Court 1 - Division Bench',
-                        '2': 'Court 2 - Single Bench',
-                        '3': 'Court 3 - Division Bench'
-                    },
-                    '5': {  # High Court - Original Side
-                        '1': 'Court 1 - Original Side',
-                        '2': 'Court 2 - Original Side'
-                    }
-                },
-                '2': {  # Pune
-                    '1': {  # District and Sessions Court
-                        '1': 'Court Room 1 - District Judge',
-                        '2': 'Court Room 2 - Additional District Judge',
-                        '3': 'Court Room 3 - Sessions Judge'
-                    },
-                    '2': {  # Civil Court
-                        '1': 'Civil Judge Room 1',
-                        '2': 'Civil Judge Room 2',
-                        '3': 'Civil Judge Room 3'
-                    },
-                    '3': {  # Family Court
-                        '1': 'Family Court Room 1',
-                        '2': 'Family Court Room 2'
-                    },
-                    '4': {  # Labour Court
-                        '1': 'Labour Court 1',
-                        '2': 'Labour Court 2'
-                    }
-                },
-                '3': {  # Nagpur
-                    '1': {  # District Court
-                        '1': 'Court Room 1',
-                        '2': 'Court Room 2',
-                        '3': 'Court Room 3'
-                    },
-                    '2': {  # Civil Court Complex
-                        '1': 'Civil Court 1',
-                        '2': 'Civil Court 2'
-                    },
-                    '3': {  # Family Court
-                        '1': 'Family Court 1'
-                    }
-                }
-            },
-            '07': {  # Delhi  
-                '1': {  # New Delhi
-                    '1': {  # Tis Hazari Courts
-                        '1': 'Additional Sessions Judge - Court 1',
-                        '2': 'Civil Judge - Court 2',
-                        '3': 'Metropolitan Magistrate - Court 3',
-                        '4': 'Special Judge - Court 4'
-                    },
-                    '2': {  # Patiala House Courts
-                        '1': 'ASJ - Patiala House Court 1',
-                        '2': 'CMM - Patiala House Court 2',
-                        '3': 'Special Court - Patiala House Court 3'
-                    },
-                    '3': {  # Saket Courts
-                        '1': 'Saket Court 1 - District Judge',
-                        '2': 'Saket Court 2 - Additional Sessions Judge',
-                        '3': 'Saket Court 3 - Civil Judge'
-                    },
-                    '4': {  # Karkardooma Courts
-                        '1': 'Karkardooma Court 1',
-                        '2': 'Karkardooma Court 2'
-                    },
-                    '5': {  # Dwarka Courts
-                        '1': 'Dwarka Court 1',
-                        '2': 'Dwarka Court 2'
-                    }
-                },
-                '2': {  # Central Delhi
-                    '1': {  # Central District Courts
-                        '1': 'Central Court 1',
-                        '2': 'Central Court 2'
-                    },
-                    '2': {  # Rohini Courts
-                        '1': 'Rohini Court 1',
-                        '2': 'Rohini Court 2'
-                    }
-                }
-            },
-            '29': {  # Karnataka
-                '1': {  # Bangalore
-                    '1': {  # City Civil Court
-                        '1': 'Court Hall 1 - XXIII Additional City Civil Judge',
-                        '2': 'Court Hall 2 - XIV Additional Small Causes Judge',
-                        '3': 'Court Hall 3 - Civil Judge'
-                    },
-                    '2': {  # Small Causes Court
-                        '1': 'Small Causes Court 1',
-                        '2': 'Small Causes Court 2'
-                    },
-                    '3': {  # Family Court
-                        '1': 'Family Court 1',
-                        '2': 'Family Court 2'
-                    },
-                    '4': {  # Labour Court
-                        '1': 'Labour Court 1',
-                        '2': 'Labour Court 2'
-                    }
-                },
-                '2': {  # Mysore
-                    '1': {  # District Court Complex
-                        '1': 'District Court 1',
-                        '2': 'District Court 2'
-                    },
-                    '2': {  # Civil Court
-                        '1': 'Civil Court 1',
-                        '2': 'Civil Court 2'
-                    }
-                }
-            }
-        }
-        
-        courts = courts_data.get(state_code, {}).get(dist_code, {}).get(complex_code, {})
-        
-        if not courts:
-            courts = {
-                '1': 'Court Room 1',
-                '2': 'Court Room 2',
-                '3': 'Court Room 3',
-                '4': 'Judge Chamber 1',
-                '5': 'Judge Chamber 2'
-            }
-        
-        return courts
+        return self.directory.courts(state_code, dist_code, complex_code)
+
+    def add_cause_list_listener(self, listener):
+        """Call ``listener(CauseListKey, CauseList)`` for every cause list fetched upstream."""
+        self.cause_list_listeners.append(listener)
+
+    def add_case_listener(self, listener):
+        """Call ``listener(cnr, case_number, CaseDetails)`` for every case-status result fetched upstream.
+
+        One of ``cnr`` and ``case_number`` is None, depending on how the case was looked up.
+        """
+        self.case_listeners.append(listener)
+
+    def cause_list_cache_key(self, state_code, dist_code, complex_code, court_code, date):
+        # Key on the parsed day so '07-01-2025', '2025-01-07' and '2025-1-7' share an entry.
+        day = parse_date(date)
+        return cache_key('cause_list', state_code, dist_code, complex_code, court_code, day.isoformat() if day else date)
 
     def get_cause_list(self, state_code, dist_code, complex_code, court_code, date):
+        return self.cache.get_or_fetch(
+            self.cause_list_cache_key(state_code, dist_code, complex_code, court_code, date),
+            date_ttl(date),
+            lambda: self._ingest_cause_list(
+                CauseListKey(state_code, dist_code, complex_code, court_code, date),
+                self._fetch_cause_list(state_code, dist_code, complex_code, court_code, date)
+            )
+        )
+
+    def _ingest_cause_list(self, key, result):
+        if result['success']:
+            for listener in self.cause_list_listeners:
+                try:
+                    listener(key, result['data']['cases'])
+                except Exception:
+                    app.logger.exception("cause list listener failed for %s", key)
+        return result
+
+    def _fetch_cause_list(self, state_code, dist_code, complex_code, court_code, date):
+        if self.live:
+            return self._fetch_live_cause_list(CauseListKey(state_code, dist_code, complex_code, court_code, date))
         try:
-            sample_cases = [
+            sample_cases = CauseList.from_rows([
                 {
                     "serial_no": "1",
                     "case_number": f"CR/123/{datetime.now().year-1}",
@@ -334,7 +216,7 @@ class ECourtsScraper:
                     "purpose": "Final Hearing",
                     "court_room": "Court Room 2"
                 }
-            ]
+            ])
             
             return {
                 "success": True,
@@ -347,6 +229,90 @@ class ECourtsScraper:
         except Exception as e:
             return {"success": False, "message": str(e)}
 
+    def test_connection(self):
+        started = time.monotonic()
+        try:
+            response = self.transport.get(self.base_url, deadline=15)
+            return {
+                "success": response.ok,
+                "status_code": response.status_code,
+                "elapsed_ms": round((time.monotonic() - started) * 1000, 1)
+            }
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+
+    def _ingest_case(self, cnr, case_number, result):
+        if result['success']:
+            for listener in self.case_listeners:
+                try:
+                    listener(cnr, case_number, result['data'])
+                except Exception:
+                    app.logger.exception("case listener failed for %s", cnr or case_number)
+        return result
+
+    def post_upstream(self, path, form):
+        """POST ``form`` under a leased upstream session, retrying once on a fresh one if upstream dropped it."""
+        since = None
+        for _ in range(2):
+            with self.sessions.lease(self.transport.deadline, since) as session:
+                sent = time.monotonic()
+                response = self.transport.post(self.base_url + path, data=session.form(form), session=session.http)
+            if session is NO_SESSION or not is_captcha_page(response.content):
+                return response
+            self.sessions.invalidate(session)
+            since = sent
+        raise CaptchaError("eCourts asked for a captcha again on a freshly solved session")
+
+    def _fetch_live_cause_list(self, key):
+        try:
+            with stage('upstream'):
+                response = self.post_upstream(CAUSE_LIST_PATH, cause_list_form(key))
+            response.raise_for_status()
+            with stage('parse'):
+                cases = CauseList.from_rows(parse_cause_list(response.content))
+            return {
+                "success": True,
+                "data": {
+                    "date": key.date,
+                    "total_cases": len(cases),
+                    "cases": cases
+                }
+            }
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+
+    def _fetch_live_case_status(self, form, case_number, check_date):
+        try:
+            with stage('upstream'):
+                response = self.post_upstream(CASE_STATUS_PATH, form)
+            response.raise_for_status()
+            return self._case_status_result(response.content, case_number, check_date)
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+
+    def _case_status_result(self, html, case_number, check_date):
+        try:
+            with stage('parse'):
+                status = parse_case_status(html)
+        except ParseError:
+            return {"success": False, "message": f"Case {case_number} not found on eCourts"}
+
+        return {
+            "success": True,
+            "data": CaseDetails(
+                case_number=case_number,
+                court_name=status.court,
+                serial_number="",
+                listing_date=status.next_hearing_date or check_date,
+                status=status.stage or "Case Found",
+                checked_on=datetime.now().isoformat(),
+                source="eCourts Live Database",
+                filing_date=status.filing_date,
+                petitioner=status.petitioner,
+                respondent=status.respondent
+            )
+        }
+
     def search_case(self, search_params, check_date):
         try:
             if 'cnr' in search_params:
@@ -356,19 +322,69 @@ class ECourtsScraper:
         except Exception as e:
             return {"success": False, "message": str(e)}
 
-    def search_by_cnr(self, cnr, check_date):
-        sample_data = {
-            "caseNumber": cnr,
-            "courtName": "City Civil and Sessions Court, Mumbai",
-            "serialNumber": "15",
-            "listingDate": check_date,
-            "status": "Listed for Hearing",
-            "checkedOn": datetime.now().isoformat(),
-            "source": "eCourts Database",
-            "filingDate": "15-03-2023",
-            "petitioner": "State of Maharashtra", 
-            "respondent": "Accused Person"
+    def _indexed_listing(self, listings, check_date):
+        if not listings:
+            return None
+        court, _, entry = listings[0]
+        courts = self.directory.courts(*court[:3])
+        petitioner, _, respondent = entry.parties.replace(' versus ', ' vs ').partition(' vs ')
+        return {
+            "success": True,
+            "data": CaseDetails(
+                case_number=entry.case_number,
+                court_name=courts.get(court[3]) or entry.court_room,
+                serial_number=entry.serial_no,
+                listing_date=check_date,
+                status=f"Listed for {entry.purpose}" if entry.purpose else "Listed for Hearing",
+                checked_on=datetime.now().isoformat(),
+                source="Local Cause List Index",
+                filing_date="",
+                petitioner=petitioner.strip(),
+                respondent=respondent.strip()
+            )
         }
+
+    def case_lookup(self, search_params, check_date):
+        """``(indexed result or None, cache key, upstream form, case number)`` for one ``search_case`` query."""
+        cnr = search_params.get('cnr')
+        if cnr:
+            cnr = normalize_cnr(cnr)
+            parse_cnr(cnr)
+            return (self._indexed_listing(self.index.lookup_cnr(cnr, check_date), check_date),
+                    cache_key('cnr', cnr, check_date), cnr_status_form(cnr), cnr)
+        case_type, number, year = (search_params.get('caseType'), search_params.get('caseNumber'),
+                                   search_params.get('caseYear'))
+        case_number = f"{case_type}/{number}/{year}"
+        # A case number is only unique within a court, so the index answers only when the query names one.
+        court = list(takewhile(bool, (search_params.get(field) for field in COURT_FIELDS)))
+        listings = self.index.lookup_case(case_number, check_date, court) if court else []
+        return (self._indexed_listing(listings, check_date),
+                cache_key('case', case_type, number, year, check_date),
+                case_status_form(case_type, number, year), case_number)
+
+    def search_by_cnr(self, cnr, check_date):
+        indexed, key, _, cnr = self.case_lookup({'cnr': cnr}, check_date)
+        if indexed is not None:
+            return indexed
+        return self.cache.get_or_fetch(key, date_ttl(check_date),
+                                       lambda: self._ingest_case(cnr, None, self._search_by_cnr(cnr, check_date)))
+
+    def _search_by_cnr(self, cnr, check_date):
+        if self.live:
+            return self._fetch_live_case_status(cnr_status_form(cnr), cnr, check_date)
+
+        sample_data = CaseDetails(
+            case_number=cnr,
+            court_name="City Civil and Sessions Court, Mumbai",
+            serial_number="15",
+            listing_date=check_date,
+            status="Listed for Hearing",
+            checked_on=datetime.now().isoformat(),
+            source="eCourts Database",
+            filing_date="15-03-2023",
+            petitioner="State of Maharashtra",
+            respondent="Accused Person"
+        )
         
         return {
             "success": True,
@@ -376,33 +392,306 @@ class ECourtsScraper:
         }
 
     def search_by_details(self, params, check_date):
+        indexed, key, _, case_number = self.case_lookup(params, check_date)
+        if indexed is not None:
+            return indexed
+        return self.cache.get_or_fetch(
+            key, date_ttl(check_date),
+            lambda: self._ingest_case(None, case_number, self._search_by_details(params, check_date)))
+
+    def _search_by_details(self, params, check_date):
         case_number = f"{params.get('caseType')}/{params.get('caseNumber')}/{params.get('caseYear')}"
+        if self.live:
+            return self._fetch_live_case_status(
+                case_status_form(params.get('caseType'), params.get('caseNumber'), params.get('caseYear')),
+                case_number, check_date)
         
-        sample_data = {
-            "caseNumber": case_number,
-            "courtName": "District Court Complex",
-            "serialNumber": "22", 
-            "listingDate": check_date,
-            "status": "Case Found - Next Hearing",
-            "checkedOn": datetime.now().isoformat(),
-            "source": "eCourts Live Database",
-            "filingDate": f"01-01-{params.get('caseYear')}",
-            "petitioner": "Petitioner Name",
-            "respondent": "Respondent Name"
-        }
+        sample_data = CaseDetails(
+            case_number=case_number,
+            court_name="District Court Complex",
+            serial_number="22",
+            listing_date=check_date,
+            status="Case Found - Next Hearing",
+            checked_on=datetime.now().isoformat(),
+            source="eCourts Live Database",
+            filing_date=f"01-01-{params.get('caseYear')}",
+            petitioner="Petitioner Name",
+            respondent="Respondent Name"
+        )
         
         return {
             "success": True, 
             "data": sample_data
         }
 
+    def search_cases_bulk(self, items, dates, max_workers=8):
+        """Check many cases over ``dates`` and yield one result per distinct case as it resolves.
+
+        Cases that name their court, and CNRs whose prefix the court
+        directory maps to a court complex, are matched against the cause
+        lists of that court (or of every court in the complex) for each date.
+        Each list is fetched once per (court, date) however many cases share
+        it. Other cases go through the case-status lookup once each, as do
+        CNRs whose complex's lists carry no CNRs to match them against.
+        """
+        queries, invalid = normalize_queries(items)
+        for item, message in invalid:
+            yield {"query": item, "success": False, "message": message}
+
+        targets = defaultdict(list)
+        lookups = []
+        for query in queries:
+            target = self._bulk_target(query)
+            if target:
+                targets[target].append(query)
+            else:
+                lookups.append(query)
+
+        waiting = defaultdict(list)
+        for target in targets:
+            for court in target:
+                waiting[court].append(target)
+        pending = {target: len(target) * len(dates) for target in targets}
+        readers = {court: len(waiting[court]) for court in waiting}
+
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {}
+            for court in waiting:
+                for day in dates:
+                    futures[pool.submit(self.get_cause_list, *court, day)] = (court, day)
+            for query in lookups:
+                futures[pool.submit(self._bulk_lookup, query, queries[query], dates)] = None
+
+            fetched = {}
+            unmatched = []
+            late = []
+            for future in as_completed(futures):
+                if futures[future] is None:
+                    yield future.result()
+                    continue
+                court, day = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"success": False, "message": str(e)}
+                fetched[court, day] = (index_cause_list(result['data']['cases']), None) if result['success'] \
+                    else (None, result.get('message'))
+                for target in waiting[court]:
+                    pending[target] -= 1
+                    if pending[target]:
+                        continue
+                    yield from self._bulk_matches(target, targets[target], queries, dates, fetched, unmatched)
+                    late.extend(pool.submit(self._bulk_lookup, query, queries[query], dates) for query in unmatched)
+                    unmatched.clear()
+                    for done in target:
+                        readers[done] -= 1
+                        if not readers[done]:
+                            for day in dates:
+                                del fetched[done, day]
+            for future in as_completed(late):
+                yield future.result()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _bulk_target(self, query):
+        """The courts whose cause lists can answer ``query``, or None to use a case-status lookup."""
+        if query.court:
+            return (query.court,)
+        if query.cnr:
+            key = self.directory.locate_cnr(query.cnr)
+            if key and len(key) == 3:
+                return tuple(key + (court_code,) for court_code in self.directory.courts(*key))
+        return None
+
+    def _bulk_matches(self, target, group, queries, dates, fetched, unmatched):
+        # A CNR can only be matched in lists that print CNRs; when none of
+        # these do, it goes on ``unmatched`` for a case-status lookup.
+        indexes = {}
+        errors = []
+        for court in target:
+            for day in dates:
+                index, message = fetched[court, day]
+                if index is not None:
+                    indexes[court, day] = index
+                elif len(target) > 1:
+                    errors.append({"date": day, "court_code": court[3], "message": message})
+                else:
+                    errors.append({"date": day, "message": message})
+        with_cnrs = any(entry.cnr for index in indexes.values() for entry in index.values())
+        for query in group:
+            listings = []
+            for day in dates:
+                for court in target:
+                    entry = indexes.get((court, day), {}).get(query.cnr or query.case_number)
+                    if entry is None:
+                        continue
+                    listing = {"date": day, "serial_no": entry.serial_no,
+                               "purpose": entry.purpose, "court_room": entry.court_room}
+                    if query.court is None:
+                        listing["court_code"] = court[3]
+                    listings.append(listing)
+            if query.cnr and not listings and indexes and not with_cnrs:
+                unmatched.append(query)
+                continue
+            result = {"query": queries[query], "success": bool(indexes), "listed": bool(listings),
+                      "court": query.court_dict() or dict(zip(COURT_FIELDS, target[0][:3])),
+                      "listings": listings}
+            if errors:
+                result["errors"] = errors
+            yield result
+
+    def _bulk_lookup(self, query, item, dates):
+        # The local index answers for each date; failing that, the case-status
+        # page gives the one next hearing date, checked against the whole range.
+        params = {'cnr': query.cnr} if query.cnr else item
+        try:
+            indexed = [(day, self.case_lookup(params, day)[0]) for day in dates]
+            listings = [{"date": day, "serial_no": found['data'].serial_number} for day, found in indexed if found]
+            if listings:
+                data = next(found['data'] for _, found in indexed if found)
+                return {"query": item, "success": True, "listed": True, "listings": listings, "data": data}
+            if query.cnr:
+                result = self.search_by_cnr(query.cnr, dates[0])
+            else:
+                result = self.search_by_details(item, dates[0])
+        except Exception as e:
+            result = {"success": False, "message": str(e)}
+        if not result['success']:
+            return {"query": item, "success": False, "message": result.get('message')}
+        listing_date = result['data'].listing_date
+        listed = in_range(listing_date, dates)
+        return {"query": item, "success": True, "listed": listed,
+                "listings": [{"date": parse_date(listing_date).strftime(DATE_FORMAT)}] if listed else [],
+                "data": result['data']}
+
 scraper = ECourtsScraper()
+artifacts = ArtifactStore.from_env()
+party_search = PartySearch.from_env()
+scraper.add_cause_list_listener(party_search.ingest)
+cause_list_store = CauseListStore.from_env()
+scraper.add_cause_list_listener(cause_list_store.record)
+case_history = CaseHistory.from_env()
+scraper.add_cause_list_listener(case_history.record_cause_list)
+scraper.add_case_listener(case_history.record_case)
+prewarm = PrewarmCrawler.from_env(scraper)
+bulk_exports = BulkExporter.from_env(scraper)
+
+def close_connections():
+    # SQLite handles must not cross a fork; each worker reopens its own.
+    for store in (scraper.cache, party_search, cause_list_store, prewarm, case_history):
+        store.close()
+
+def start_background_jobs():
+    if os.environ.get('PREWARM_ENABLED') == '1':
+        prewarm.start()
+
+CHANGES_MAX_WAIT = 30
+CHANGES_STREAM_SECONDS = 300
+CHANGES_KEEPALIVE = 15
+# A long-poll or stream holds a worker thread for its whole length, so under
+# gthread only this many may wait at once (gunicorn.conf.py sets it to half
+# the threads); the rest are answered at once. 0 leaves them unlimited.
+CHANGES_MAX_HELD = int(os.environ.get('CHANGES_MAX_HELD', 0))
+changes_slots = threading.BoundedSemaphore(CHANGES_MAX_HELD) if CHANGES_MAX_HELD > 0 else None
+
+def changes_query(args):
+    """``(since, limit, wait, state_code)`` from change-feed query args; raises ValueError."""
+    return (int(args.get('since', 0)), int(args.get('limit', 100)),
+            min(float(args.get('wait', 0)), CHANGES_MAX_WAIT), args.get('state'))
+
+def change_event(event):
+    return f"id: {event['seq']}\nevent: cause_list_diff\ndata: {app.json.dumps(event)}\n\n"
+
+def take_changes_slot():
+    return changes_slots is None or changes_slots.acquire(blocking=False)
+
+def release_changes_slot():
+    if changes_slots is not None:
+        changes_slots.release()
+
+compressor = Compressor.from_env()
+if compression.ENABLED:
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, compressor)
+
+profiler = SlowRequestProfiler.from_env()
+if metrics.ENABLED:
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app, profiler)
+
+    @app.before_request
+    def label_route():
+        if request.url_rule is not None:
+            request.environ[metrics.ROUTE_KEY] = request.url_rule.rule
+
+@REGISTRY.collector
+def cache_metrics():
+    stats = scraper.cache.stats()
+    tiers = [('memory', stats['memory'])] + ([('disk', stats['disk'])] if stats['disk'] else [])
+    tiers.append(('artifacts', artifacts.stats()))
+    yield ('ecourts_cache_hits_total', 'counter', 'Cache lookups that found an entry', ('tier',),
+           [((tier,), s['hits']) for tier, s in tiers])
+    yield ('ecourts_cache_misses_total', 'counter', 'Cache lookups that found nothing', ('tier',),
+           [((tier,), s['misses']) for tier, s in tiers])
+    yield ('ecourts_cache_hit_ratio', 'gauge', 'Hits / lookups since start', ('tier',),
+           [((tier,), s['hits'] / (s['hits'] + s['misses']) if s['hits'] + s['misses'] else 0.0)
+            for tier, s in tiers])
+    yield ('ecourts_cache_entries', 'gauge', 'Entries currently cached', ('tier',),
+           [((tier,), s['entries']) for tier, s in tiers])
+    yield ('ecourts_cache_coalesced_total', 'counter', 'Misses that waited on an in-progress fetch', (),
+           [((), stats['coalesced'])])
+
+@REGISTRY.collector
+def upstream_metrics():
+    stats = scraper.transport.metrics.snapshot()
+    yield ('ecourts_upstream_requests_total', 'counter', 'Requests sent to eCourts, including retries', (),
+           [((), stats['requests'])])
+    yield ('ecourts_upstream_responses_total', 'counter', 'eCourts responses by HTTP status', ('status',),
+           [((str(status),), count) for status, count in sorted(stats['responses'].items())])
+    yield ('ecourts_upstream_retries_total', 'counter', 'Upstream requests retried after a failure', (),
+           [((), stats['retries'])])
+    yield ('ecourts_upstream_errors_total', 'counter', 'Upstream attempts that got no response', ('kind',),
+           [(('timeout',), stats['timeouts']), (('connection',), stats['connection_errors']),
+            (('deadline',), stats['deadline_exceeded'])])
+    yield ('ecourts_upstream_rate_limited_seconds_total', 'counter', 'Time spent waiting for the rate limiter', (),
+           [((), stats['rate_limited_wait_seconds'])])
+    yield ('ecourts_upstream_in_flight', 'gauge', 'Upstream requests currently open', (),
+           [((), stats['in_flight'])])
+
+@REGISTRY.collector
+def session_metrics():
+    stats = scraper.sessions.stats()
+    yield ('ecourts_upstream_sessions', 'gauge', 'Authenticated upstream sessions currently live', (),
+           [((), stats['live'])])
+    yield ('ecourts_upstream_session_leases_total', 'counter', 'Session leases, by whether the session had served before',
+           ('reused',), [(('true',), stats['reused']), (('false',), stats['leases'] - stats['reused'])])
+    yield ('ecourts_upstream_session_reuse_ratio', 'gauge', 'Share of leases served by an already-used session', (),
+           [((), stats['reuse_rate'])])
+    yield ('ecourts_upstream_session_logins_total', 'counter', 'Captcha solves, by where they ran', ('path',),
+           [(('background',), stats['logins'] - stats['inline_logins']), (('inline',), stats['inline_logins'])])
+    yield ('ecourts_upstream_session_login_failures_total', 'counter', 'Logins that failed', (),
+           [((), stats['login_failures'])])
+    yield ('ecourts_upstream_session_invalidated_total', 'counter', 'Sessions dropped after a captcha page', (),
+           [((), stats['invalidated'])])
 
 @app.route('/api/states', methods=['GET'])
 def get_states():
     states = scraper.get_states()
     return jsonify({"success": True, "data": states})
 
+@app.route('/api/hierarchy', methods=['GET'])
+def get_hierarchy():
+    state_code = request.args.get('state') or None
+    payload = scraper.get_hierarchy(state_code)
+    if payload is None:
+        return jsonify({"success": False, "message": f"Unknown state: {state_code}"}), 404
+
+    body, etag = payload
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = HIERARCHY_MAX_AGE
+    return response.make_conditional(request)
+
 @app.route('/api/districts', methods=['POST'])
 def get_districts():
     data = request.json
@@ -422,9 +711,18 @@ def get_courts():
     courts = scraper.get_courts(data.get('state_code'), data.get('dist_code'), data.get('complex_code'))
     return jsonify({"success": True, "data": courts})
 
+def format_cases(result, case_format):
+    """With ``case_format='rows'`` the cases go out as arrays of ``case_fields`` values instead of objects."""
+    if case_format != 'rows' or not result.get('success'):
+        return result
+    data = result['data']
+    return {**result, "data": {**data, "case_fields": CASE_FIELDS, "cases": data['cases'].to_rows()}}
+
 @app.route('/api/cause-list', methods=['POST'])
 def get_cause_list():
     data = request.json
+    prewarm.record_request(data.get('state_code'), data.get('dist_code'),
+                           data.get('complex_code'), data.get('court_code'))
     result = scraper.get_cause_list(
         data.get('state_code'),
         data.get('dist_code'), 
@@ -432,14 +730,10 @@ def get_cause_list():
         data.get('court_code'),
         data.get('date')
     )
-    return jsonify(result)
+    return jsonify(format_cases(result, data.get('case_format')))
 
-@app.route('/api/check-case', methods=['POST'])
-def check_case():
-    data = request.json
-    check_type = data.get('checkType', 'today')
-    
-    if check_type == 'tomorrow':
+def check_case_query(data):
+    if data.get('checkType', 'today') == 'tomorrow':
         check_date = (datetime.now() + timedelta(days=1)).strftime('%d-%m-%Y')
     else:
         check_date = datetime.now().strftime('%d-%m-%Y')
@@ -453,13 +747,158 @@ def check_case():
             'caseNumber': data.get('caseNumber'), 
             'caseYear': data.get('caseYear')
         })
-    
+        search_params.update({field: data[field] for field in COURT_FIELDS if data.get(field)})
+    return search_params, check_date
+
+@app.route('/api/check-case', methods=['POST'])
+def check_case():
+    search_params, check_date = check_case_query(request.json)
     result = scraper.search_case(search_params, check_date)
     return jsonify(result)
 
+@app.route('/api/check-cases', methods=['POST'])
+def check_cases():
+    data = request.json or {}
+    cases = data.get('cases') or []
+    if not isinstance(cases, list) or not cases:
+        return jsonify({"success": False, "message": "Provide a non-empty 'cases' list"}), 400
+    if len(cases) > MAX_BULK_QUERIES:
+        return jsonify({"success": False, "message": f"At most {MAX_BULK_QUERIES} cases per request"}), 400
+    try:
+        dates = date_range(data.get('from') or datetime.now().strftime('%d-%m-%Y'), data.get('to'))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    def generate():
+        for result in scraper.search_cases_bulk(cases, dates):
+            yield app.json.dumps_bytes(result) + b'\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/api/search-parties', methods=['GET'])
+def search_parties():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"success": False, "message": "Provide a party name in 'q'"}), 400
+    try:
+        results, next_cursor = party_search.search(
+            query,
+            mode=request.args.get('mode', 'phonetic'),
+            limit=request.args.get('limit', 20),
+            cursor=request.args.get('cursor'),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            state_code=request.args.get('state')
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({"success": True, "data": {"results": results, "next_cursor": next_cursor}})
+
+@app.route('/api/case-history', methods=['GET'])
+def get_case_history():
+    cnr = request.args.get('cnr', '').strip()
+    case_number = None
+    if cnr:
+        cnr = normalize_cnr(cnr)
+        try:
+            parse_cnr(cnr)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+    elif request.args.get('caseType') and request.args.get('caseNumber') and request.args.get('caseYear'):
+        case_number = case_number_key(
+            f"{request.args['caseType']}/{request.args['caseNumber']}/{request.args['caseYear']}")
+    else:
+        return jsonify({"success": False, "message": "Provide a cnr or caseType, caseNumber and caseYear"}), 400
+    court = []
+    for field in COURT_FIELDS:
+        if not request.args.get(field):
+            break
+        court.append(request.args[field])
+    try:
+        hearings = case_history.history(cnr=cnr, case_number=case_number, start=request.args.get('from'),
+                                        end=request.args.get('to'), limit=request.args.get('limit', MAX_HISTORY),
+                                        court=court)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({"success": True, "data": {"cnr": cnr or None, "case_number": case_number,
+                                              "court": dict(zip(COURT_FIELDS, court)) or None,
+                                              "hearings": hearings}})
+
+@app.route('/api/changes', methods=['GET'])
+def get_changes():
+    try:
+        since, limit, wait, state_code = changes_query(request.args)
+    except ValueError:
+        return jsonify({"success": False, "message": "since, limit and wait must be numbers"}), 400
+    if wait > 0 and take_changes_slot():
+        try:
+            events = cause_list_store.wait_for_changes(since, wait, limit, state_code)
+        finally:
+            release_changes_slot()
+    else:
+        events = cause_list_store.changes(since, limit, state_code)
+    return jsonify({
+        "success": True,
+        "data": {"changes": events, "next": events[-1]['seq'] if events else since}
+    })
+
+@app.route('/api/changes/stream', methods=['GET'])
+def stream_changes():
+    try:
+        since = int(request.headers.get('Last-Event-ID') or request.args.get('since', 0))
+    except ValueError:
+        return jsonify({"success": False, "message": "since must be a number"}), 400
+    state_code = request.args.get('state')
+    if not take_changes_slot():
+        response = jsonify({"success": False, "message": "Too many open change streams; retry shortly"})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+
+    def generate():
+        # Streams end after a few minutes; EventSource reconnects with Last-Event-ID.
+        last = since
+        ends = time.monotonic() + CHANGES_STREAM_SECONDS
+        yield 'retry: 2000\n\n'
+        while time.monotonic() < ends:
+            events = cause_list_store.wait_for_changes(last, CHANGES_KEEPALIVE, 100, state_code)
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            for event in events:
+                yield change_event(event)
+            last = events[-1]['seq']
+
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(release_changes_slot)
+    return response
+
+def cause_list_pdf_artifact(date, data):
+    """``(content key, PDF bytes)`` for a cause-list result, rendered once per distinct content."""
+    key = content_key('cause_list', PDF_BACKEND, date, data['total_cases'], data['cases'])
+    pdf_data = artifacts.get(key)
+    if pdf_data is None:
+        generated_on = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with stage('pdf'):
+            if PDF_BACKEND == 'native' and can_render(cause_list_texts(data['cases'])):
+                pdf_data = b''.join(cause_list_pdf(date, data['cases'], data['total_cases'], generated_on))
+            else:
+                pdf_data = html_to_pdf(html_renderer.stream(
+                    'cause_list.html',
+                    date=date,
+                    cases=data['cases'],
+                    total_cases=data['total_cases'],
+                    generated_on=generated_on
+                ))
+        artifacts.put(key, pdf_data)
+    return key, pdf_data
+
 @app.route('/api/download-causelist', methods=['POST'])
 def download_cause_list():
     data = request.json
+    prewarm.record_request(data.get('state_code'), data.get('dist_code'),
+                           data.get('complex_code'), data.get('court_code'))
     result = scraper.get_cause_list(
         data.get('state_code'),
         data.get('dist_code'),
@@ -471,196 +910,145 @@ def download_cause_list():
     if not result['success']:
         return jsonify(result)
     
-    html_template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <style>
-            body { font-family: Arial, sans-serif; margin: 40px; }
-            .header { text-align: center; border-bottom: 2px solid #333; padding-bottom: 20px; margin-bottom: 30px; }
-            .case-table { width: 100%; border-collapse: collapse; margin-top: 20px; }
-            .case-table th { background-color: #f2f2f2; padding: 12px; text-align: left; border: 1px solid #ddd; }
-            .case-table td { padding: 10px; border: 1px solid #ddd; }
-            .footer { margin-top: 40px; text-align: center; font-size: 12px; color: #666; }
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>eCourts Cause List</h1>
-            <h2>Date: {{ date }}</h2>
-        </div>
-        {% if cases %}
-        <table class="case-table">
-            <thead>
-                <tr>
-                    <th>Serial No</th>
-                    <th>Case Number</th>
-                    <th>Parties</th>
-                    <th>Purpose</th>
-                    <th>Court Room</th>
-                </tr>
-            </thead>
-            <tbody>
-                {% for case in cases %}
-                <tr>
-                    <td>{{ case.serial_no }}</td>
-                    <td>{{ case.case_number }}</td>
-                    <td>{{ case.parties }}</td>
-                    <td>{{ case.purpose }}</td>
-                    <td>{{ case.court_room }}</td>
-                </tr>
-                {% endfor %}
-            </tbody>
-        </table>
-        {% else %}
-        <div style="text-align: center; color: #666; margin-top: 50px;">
-            <p>No cases listed for this date.</p>
-        </div>
-        {% endif %}
-        <div class="footer">
-            Generated on: {{ generated_on }} | Total Cases: {{ total_cases }}
-        </div>
-    </body>
-    </html>
-    """
-    
-    from jinja2 import Template
-    template = Template(html_template)
-    html_content = template.render(
-        date=data.get('date'),
-        cases=result['data']['cases'],
-        total_cases=result['data']['total_cases'],
-        generated_on=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    )
-    
     try:
-        pdf_options = {
-            'page-size': 'A4',
-            'margin-top': '0.75in',
-            'margin-right': '0.75in',
-            'margin-bottom': '0.75in', 
-            'margin-left': '0.75in',
-            'encoding': "UTF-8",
-        }
-        
-        pdf_data = pdfkit.from_string(html_content, False, options=pdf_options)
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(pdf_data)
-            tmp_path = tmp_file.name
-        
+        key, pdf_data = cause_list_pdf_artifact(data.get('date'), result['data'])
         return send_file(
-            tmp_path,
+            BytesIO(pdf_data),
             as_attachment=True,
             download_name=f'cause_list_{data.get("date")}.pdf',
-            mimetype='application/pdf'
+            mimetype='application/pdf',
+            etag=key
         )
     except Exception as e:
         return jsonify({"success": False, "message": str(e)})
 
-@app.route('/api/download-case-pdf', methods=['POST'])
-def download_case_pdf():
+@app.route('/api/export-causelist-html', methods=['POST'])
+def export_cause_list_html():
     data = request.json
-    case_data = data.get('caseData', {})
+    prewarm.record_request(data.get('state_code'), data.get('dist_code'),
+                           data.get('complex_code'), data.get('court_code'))
+    result = scraper.get_cause_list(
+        data.get('state_code'),
+        data.get('dist_code'),
+        data.get('complex_code'), 
+        data.get('court_code'),
+        data.get('date')
+    )
     
-    html_template = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 40px; }
-            .header { text-align: center; border-bottom: 2px solid #333; padding-bottom: 20px; }
-            .case-info { margin: 30px 0; }
-            .info-row { margin: 15px 0; padding: 10px; border-left: 4px solid #007cba; }
-            .label { font-weight: bold; color: #333; }
-            .value { color: #666; }
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>eCourts Case Information</h1>
-            <h2>Case Details</h2>
-        </div>
-        <div class="case-info">
-            <div class="info-row">
-                <span class="label">Case Number:</span>
-                <span class="value">{{ case_number }}</span>
-            </div>
-            <div class="info-row">
-                <span class="label">Court Name:</span>
-                <span class="value">{{ court_name }}</span>
-            </div>
-            <div class="info-row">
-                <span class="label">Serial Number:</span>
-                <span class="value">{{ serial_number }}</span>
-            </div>
-            <div class="info-row">
-                <span class="label">Listing Date:</span>
-                <span class="value">{{ listing_date }}</span>
-            </div>
-            <div class="info-row">
-                <span class="label">Status:</span>
-                <span class="value">{{ status }}</span>
-            </div>
-            <div class="info-row">
-                <span class="label">Checked On:</span>
-                <span class="value">{{ checked_on }}</span>
-            </div>
-        </div>
-        <div style="margin-top: 50px; text-align: center; font-size: 12px; color: #666;">
-            Generated on: {{ generated_on }} | Source: eCourts Database
-        </div>
-    </body>
-    </html>
-    """
+    if not result['success']:
+        return jsonify(result)
     
-    from jinja2 import Template
-    template = Template(html_template)
-    html_content = template.render(
+    body = html_renderer.stream(
+        'cause_list.html',
+        date=data.get('date'),
+        cases=result['data']['cases'],
+        total_cases=result['data']['total_cases'],
+        generated_on=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    )
+    return Response(body, mimetype='text/html', headers={
+        'Content-Disposition': f'attachment; filename=cause_list_{data.get("date")}.html'
+    })
+
+def case_pdf_artifact(case_data):
+    """``(content key, PDF bytes, file name)`` for the case details posted by the frontend."""
+    details = dict(
         case_number=case_data.get('caseNumber', 'N/A'),
         court_name=case_data.get('courtName', 'N/A'),
         serial_number=case_data.get('serialNumber', 'N/A'),
         listing_date=case_data.get('listingDate', 'N/A'),
         status=case_data.get('status', 'N/A'),
-        checked_on=case_data.get('checkedOn', 'N/A'),
-        generated_on=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        checked_on=case_data.get('checkedOn', 'N/A')
     )
+    key = content_key('case_details', PDF_BACKEND, details)
+    pdf_data = artifacts.get(key)
+    if pdf_data is None:
+        generated_on = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with stage('pdf'):
+            if PDF_BACKEND == 'native' and can_render(details.values()):
+                pdf_data = b''.join(case_details_pdf(details, generated_on))
+            else:
+                pdf_data = html_to_pdf(html_renderer.stream('case_details.html', generated_on=generated_on,
+                                                            **details))
+        artifacts.put(key, pdf_data)
+    return key, pdf_data, f'case_{case_data.get("caseNumber", "details").replace("/", "_")}.pdf'
+
+@app.route('/api/download-case-pdf', methods=['POST'])
+def download_case_pdf():
+    data = request.json
     
     try:
-        pdf_options = {
-            'page-size': 'A4',
-            'margin-top': '0.75in',
-            'margin-right': '0.75in',
-            'margin-bottom': '0.75in',
-            'margin-left': '0.75in',
-            'encoding': "UTF-8",
-        }
-        
-        pdf_data = pdfkit.from_string(html_content, False, options=pdf_options)
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(pdf_data)
-            tmp_path = tmp_file.name
-        
+        key, pdf_data, filename = case_pdf_artifact(data.get('caseData', {}))
         return send_file(
-            tmp_path,
+            BytesIO(pdf_data),
             as_attachment=True,
-            download_name=f'case_{case_data.get("caseNumber", "details").replace("/", "_")}.pdf',
-            mimetype='application/pdf'
+            download_name=filename,
+            mimetype='application/pdf',
+            etag=key
         )
     except Exception as e:
         return jsonify({"success": False, "message": str(e)})
 
+@app.route('/api/bulk-export', methods=['POST'])
+def create_bulk_export():
+    data = request.json or {}
+    try:
+        dates = date_range(data.get('from'), data.get('to'))
+        job_id = bulk_exports.create(data.get('state_code'), data.get('dist_code'), data.get('complex_code'),
+                                     dates, data.get('format', 'zip'))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    return jsonify({"success": True, "data": bulk_exports.start(job_id)}), 202
+
+@app.route('/api/bulk-export/<job_id>', methods=['GET'])
+def bulk_export_status(job_id):
+    status = bulk_exports.status(job_id)
+    if status is None:
+        return jsonify({"success": False, "message": f"Unknown export job: {job_id}"}), 404
+    return jsonify({"success": True, "data": status})
+
+@app.route('/api/bulk-export/<job_id>/download', methods=['GET'])
+def download_bulk_export(job_id):
+    status = bulk_exports.status(job_id)
+    if status is None:
+        return jsonify({"success": False, "message": f"Unknown export job: {job_id}"}), 404
+    if status['state'] != 'complete':
+        return jsonify({"success": False, "message": f"Export job is {status['state']}", "data": status}), 409
+    filename, mimetype, body = bulk_exports.stream(job_id)
+    return Response(body, mimetype=mimetype, headers={'Content-Disposition': f'attachment; filename={filename}'})
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({
         "status": "healthy", 
         "service": "eCourts Scraper API",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "upstream": scraper.transport.metrics.snapshot(),
+        "cache": scraper.cache.stats(),
+        "artifacts": artifacts.stats(),
+        "index": scraper.index.stats(),
+        "case_history": case_history.stats(),
+        "sessions": scraper.sessions.stats(),
+        "compression": compressor.stats()
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return app.response_class(REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/prewarm/status', methods=['GET'])
+def prewarm_status():
+    return jsonify({"success": True, "data": prewarm.status()})
+
+@app.route('/api/test-connection', methods=['GET'])
+def test_connection():
+    return jsonify(scraper.test_connection())
+
 if __name__ == '__main__':
     print("🚀 Starting eCourts Scraper API with Complete Court Data...")
     print("📍 All dropdowns will now work properly")
-    app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
+    start_background_jobs()
+    app.run(
+        debug=os.environ.get('FLASK_DEBUG') == '1',
+        port=int(os.environ.get('PORT', 5000)),
+        host=os.environ.get('HOST', '0.0.0.0')
+    )
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""Content-addressed store for rendered download artifacts (PDFs).
+
+An artifact is keyed by the SHA-256 of everything that goes into it (kind,
+renderer backend, date, the cases themselves), so a repeat download of an
+unchanged cause list is served from memory, and a revised list gets a new key
+instead of a stale hit. Entries live in a ``cache.LRUCache`` bounded by total
+bytes, and nothing is written to disk.
+"""
+import hashlib
+import json
+import os
+
+from cache import MISS, LRUCache
+from records import json_default
+
+ARTIFACT_TTL = 24 * 3600
+
+
+def content_key(kind, *parts):
+    digest = hashlib.sha256(kind.encode())
+    for part in parts:
+        digest.update(b'\x00')
+        if hasattr(part, 'iter_json'):
+            for chunk in part.iter_json():
+                digest.update(chunk.encode())
+        elif isinstance(part, str):
+            digest.update(part.encode())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=json_default).encode())
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=ARTIFACT_TTL):
+        self.ttl = ttl
+        self.cache = LRUCache(max_entries, max_bytes)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.environ.get('ARTIFACT_CACHE_MAX_ENTRIES', 256)),
+            max_bytes=int(os.environ.get('ARTIFACT_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+        )
+
+    def get(self, key):
+        data = self.cache.get(key)
+        return None if data is MISS else data
+
+    def put(self, key, data):
+        self.cache.set(key, data, self.ttl, size=len(data))
+
+    def stats(self):
+        return self.cache.stats()
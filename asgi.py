@@ -0,0 +1,289 @@
+"""ASGI entry point: scraping routes on an event loop, the rest of the API through Flask.
+
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:application
+    uvicorn asgi:application --port 5000
+
+POST /api/cause-list, /api/check-case, /api/download-causelist and
+/api/download-case-pdf are coroutines that wait on eCourts through
+``async_scraper.AsyncScraper``. One worker can keep thousands of them in
+flight on its event loop thread. The change feed (GET /api/changes with
+``wait`` and the /api/changes/stream event stream) is served here too: its
+clients wait on the loop, and each check for new events is one short query
+in the thread pool, so open long-polls and streams hold no thread. Every
+other request (directory lookups, search, static files) goes to the Flask
+app through a2wsgi's WSGI bridge, which runs it in a pool of WSGI_THREADS
+threads. Both paths return the same response bodies.
+
+The Flask app stays the one definition of the API. Requests are matched
+against its URL map, and only endpoints with a coroutine in ``VIEWS`` are
+served here, for the methods their Flask route accepts; a path Flask would
+redirect or reject, and CORS preflights, go to Flask. Each response's headers
+come from ``app.process_response``, so its after_request hooks (the flask-cors
+policy among them) apply to both paths alike.
+"""
+import asyncio
+import json
+import os
+import time
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+from werkzeug.exceptions import HTTPException
+
+from app import (CHANGES_KEEPALIVE, CHANGES_STREAM_SECONDS, app, case_pdf_artifact, cause_list_pdf_artifact,
+                 cause_list_store, change_event, changes_query, check_case_query, compressor, format_cases, prewarm,
+                 scraper, start_background_jobs)
+from async_scraper import AsyncScraper
+from causelist_store import POLL_INTERVAL
+import compression
+from metrics import track_request
+from wsgi import application as wsgi_application
+
+async_scraper = AsyncScraper(scraper)
+flask_app = WSGIMiddleware(wsgi_application, workers=int(os.environ.get('WSGI_THREADS', 16)))
+urls = app.url_map.bind('localhost')
+
+
+class Request:
+    """What a coroutine view gets: the scope's query args and headers, the JSON body of a POST, and ``send``."""
+
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self._send = send
+        self.args = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+        self.headers = dict(scope['headers'])
+        self.data = None
+        self.started = False
+
+    def header(self, name):
+        return self.headers.get(name.encode('latin-1'), b'').decode('latin-1')
+
+    def response_headers(self, status, content_type, headers):
+        """``headers`` plus whatever the Flask app's after_request hooks (CORS) add for this request."""
+        with app.test_request_context(
+                self.scope['path'], method=self.scope['method'], query_string=self.scope['query_string'].decode('latin-1'),
+                headers=[(name.decode('latin-1'), value.decode('latin-1')) for name, value in self.scope['headers']]):
+            response = app.process_response(
+                app.response_class(status=status, content_type=content_type, headers=headers))
+        return [(name, value) for name, value in response.headers.items() if name.lower() != 'content-length']
+
+    async def start(self, status, headers):
+        self.started = True
+        await self._send({'type': 'http.response.start', 'status': status,
+                          'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                      for name, value in headers]})
+
+    async def send_body(self, body, more=False):
+        await self._send({'type': 'http.response.body', 'body': body, 'more_body': more})
+
+
+class Reply:
+    def __init__(self, body, status=200, content_type='application/json', headers=()):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.headers = list(headers)
+
+    @classmethod
+    def json(cls, payload, status=200):
+        return cls(app.json.dumps_bytes(payload) + b'\n', status)
+
+    @classmethod
+    def pdf(cls, key, data, filename, if_none_match):
+        etag = f'"{key}"'
+        headers = [('ETag', etag), ('Cache-Control', 'no-cache')]
+        if etag in if_none_match:
+            return cls(b'', 304, 'application/pdf', headers)
+        return cls(data, 200, 'application/pdf',
+                   headers + [('Content-Disposition', f'attachment; filename={filename}')])
+
+    async def send(self, request):
+        headers = request.response_headers(self.status, self.content_type, self.headers)
+        headers.append(('Content-Length', str(len(self.body))))
+        if self.status in (200, 201) and compression.ENABLED:
+            # The Flask app's response compression, for this Accept-Encoding header.
+            self.body, headers = compressor.encode(self.body, headers, request.header('accept-encoding'))
+        await request.start(self.status, headers)
+        await request.send_body(self.body)
+
+
+async def cause_list(request):
+    data = request.data
+    prewarm.record_request(data.get('state_code'), data.get('dist_code'),
+                           data.get('complex_code'), data.get('court_code'))
+    result = await async_scraper.get_cause_list(
+        data.get('state_code'),
+        data.get('dist_code'),
+        data.get('complex_code'),
+        data.get('court_code'),
+        data.get('date')
+    )
+    return Reply.json(format_cases(result, data.get('case_format')))
+
+
+async def check_case(request):
+    search_params, check_date = check_case_query(request.data)
+    return Reply.json(await async_scraper.search_case(search_params, check_date))
+
+
+async def download_cause_list(request):
+    data = request.data
+    prewarm.record_request(data.get('state_code'), data.get('dist_code'),
+                           data.get('complex_code'), data.get('court_code'))
+    result = await async_scraper.get_cause_list(
+        data.get('state_code'),
+        data.get('dist_code'),
+        data.get('complex_code'),
+        data.get('court_code'),
+        data.get('date')
+    )
+    if not result['success']:
+        return Reply.json(result)
+    try:
+        # Rendering is CPU work; keep it off the loop.
+        key, pdf_data = await async_scraper.run_sync(cause_list_pdf_artifact, data.get('date'), result['data'])
+    except Exception as e:
+        return Reply.json({"success": False, "message": str(e)})
+    return Reply.pdf(key, pdf_data, f'cause_list_{data.get("date")}.pdf', request.header('if-none-match'))
+
+
+async def download_case_pdf(request):
+    try:
+        key, pdf_data, filename = await async_scraper.run_sync(case_pdf_artifact, request.data.get('caseData', {}))
+    except Exception as e:
+        return Reply.json({"success": False, "message": str(e)})
+    return Reply.pdf(key, pdf_data, filename, request.header('if-none-match'))
+
+
+async def wait_for_changes(since, timeout, limit, state_code, disconnected=None):
+    """``CauseListStore.wait_for_changes`` on the loop; returns early (with []) once ``disconnected`` is done."""
+    deadline = time.monotonic() + timeout
+    while True:
+        events = await async_scraper.run_sync(cause_list_store.changes, since, limit, state_code)
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0 or (disconnected is not None and disconnected.done()):
+            return events
+        if disconnected is not None:
+            await asyncio.wait({disconnected}, timeout=min(remaining, POLL_INTERVAL))
+        else:
+            await asyncio.sleep(min(remaining, POLL_INTERVAL))
+
+
+async def get_changes(request):
+    try:
+        since, limit, wait, state_code = changes_query(request.args)
+    except ValueError:
+        return Reply.json({"success": False, "message": "since, limit and wait must be numbers"}, 400)
+    events = await wait_for_changes(since, wait, limit, state_code)
+    return Reply.json({
+        "success": True,
+        "data": {"changes": events, "next": events[-1]['seq'] if events else since}
+    })
+
+
+async def stream_changes(request):
+    try:
+        since = int(request.header('last-event-id') or request.args.get('since', 0))
+    except ValueError:
+        return Reply.json({"success": False, "message": "since must be a number"}, 400)
+    state_code = request.args.get('state')
+    await request.start(200, request.response_headers(
+        200, 'text/event-stream; charset=utf-8', [('Cache-Control', 'no-cache'), ('X-Accel-Buffering', 'no')]))
+    # Streams end after a few minutes; EventSource reconnects with Last-Event-ID.
+    disconnected = asyncio.ensure_future(read_body(request.receive, until_disconnect=True))
+    try:
+        last = since
+        ends = time.monotonic() + CHANGES_STREAM_SECONDS
+        await request.send_body(b'retry: 2000\n\n', more=True)
+        while time.monotonic() < ends and not disconnected.done():
+            events = await wait_for_changes(last, CHANGES_KEEPALIVE, 100, state_code, disconnected)
+            if not events:
+                await request.send_body(b': keepalive\n\n', more=True)
+                continue
+            await request.send_body(''.join(change_event(event) for event in events).encode(), more=True)
+            last = events[-1]['seq']
+        await request.send_body(b'')
+    finally:
+        disconnected.cancel()
+    return None
+
+
+# Flask endpoint -> the coroutine that serves it here. A view returns a Reply,
+# or None once it has sent its response itself (the event stream).
+VIEWS = {
+    'get_cause_list': cause_list,
+    'check_case': check_case,
+    'download_cause_list': download_cause_list,
+    'download_case_pdf': download_case_pdf,
+    'get_changes': get_changes,
+    'stream_changes': stream_changes,
+}
+
+
+def match(scope):
+    """The Flask rule and coroutine view for an HTTP scope, or ``(None, None)`` to hand it to Flask."""
+    # HEAD and OPTIONS match every GET route in Flask's URL map; Flask answers those itself.
+    if scope['type'] != 'http' or scope['method'] not in ('GET', 'POST'):
+        return None, None
+    try:
+        rule, _ = urls.match(scope['path'], scope['method'], return_rule=True)
+    except HTTPException:
+        return None, None
+    view = VIEWS.get(rule.endpoint)
+    return (rule, view) if view is not None else (None, None)
+
+
+async def read_body(receive, until_disconnect=False):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body') and not until_disconnect:
+            return b''.join(chunks)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            start_background_jobs()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_scraper.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    rule, view = match(scope)
+    if view is None:
+        return await flask_app(scope, receive, send)
+
+    request = Request(scope, receive, send)
+    if scope['method'] == 'POST':
+        body = await read_body(receive)
+        if body is None:
+            return
+        try:
+            request.data = json.loads(body)
+        except ValueError:
+            pass
+        if not isinstance(request.data, dict):
+            return await Reply.json({"success": False, "message": "Request body must be a JSON object"},
+                                    400).send(request)
+    with track_request(rule.rule, scope['method']) as outcome:
+        try:
+            reply = await view(request)
+        except Exception as e:
+            if request.started:
+                raise
+            app.logger.exception("%s failed", scope['path'])
+            reply = Reply.json({"success": False, "message": str(e)}, 500)
+        outcome.status = reply.status if reply is not None else 200
+        if reply is not None:
+            await reply.send(request)
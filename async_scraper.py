@@ -0,0 +1,162 @@
+"""Event-loop front end to ``ECourtsScraper`` for the ASGI server.
+
+``AsyncScraper`` answers the same questions as the scraper it wraps
+(``get_cause_list``, ``search_case``) and shares its cache, index and
+listeners. The difference is the upstream round trip: it goes through one
+aiohttp session (``CauseListEngine.post_html``), so a request waiting on
+eCourts is a suspended coroutine rather than a blocked thread.
+Both clients take tokens from the same bucket and connection slots from the
+same per-host semaphores, so together they still respect
+``ECOURTS_RATE_LIMIT`` and ``ECOURTS_PER_HOST_LIMIT``, and a request gives up
+after the transport's ``ECOURTS_DEADLINE`` however it is retried. They lease
+the same upstream sessions (``scraper.sessions``), so a captcha solved for
+one serves both. The aiohttp session keeps no cookies of its own: each
+request sends its lease's, and cookies a response sets go back into that
+lease.
+
+Concurrent misses for the same key share one upstream fetch, as with
+``cache.SingleFlight`` on the threaded side. Anything that may block runs in
+a thread pool so it does not stall the loop: reads and writes of the disk
+cache tier, and the cause-list and case listeners (the case index, party
+search, change feed and case history all write to SQLite). Only the memory
+tier is read on the loop.
+"""
+import asyncio
+import os
+import time
+from functools import partial
+
+import aiohttp
+
+from cache import MISS, date_ttl
+from causelist_engine import CASE_STATUS_PATH, CAUSE_LIST_PATH, CauseListEngine, CauseListKey, cause_list_form
+from metrics import stage
+from parsers import is_captcha_page
+from session_pool import NO_SESSION, CaptchaError
+
+
+class AsyncScraper:
+    def __init__(self, scraper, connections=None):
+        self.scraper = scraper
+        transport = scraper.transport
+        self.engine = CauseListEngine(
+            base_url=scraper.base_url,
+            concurrency=connections or int(os.environ.get('ECOURTS_ASYNC_CONNECTIONS', 256)),
+            per_host_limit=transport.per_host_limit,
+            timeout=transport.timeout,
+            deadline=transport.deadline,
+            max_retries=transport.max_retries,
+            backoff_base=transport.backoff_base,
+            backoff_max=transport.backoff_max,
+            headers=dict(transport.session.headers),
+            metrics=transport.metrics,
+        )
+        self.engine.bucket = transport.bucket
+        self.engine.host_slot = transport.async_host_slot
+        self._session = None
+        self._flights = {}
+
+    async def session(self):
+        if self._session is None or self._session.closed:
+            self._session = self.engine.session(cookie_jar=aiohttp.DummyCookieJar())
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def run_sync(self, func, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(None, partial(func, *args, **kwargs))
+
+    async def post_html(self, path, form):
+        """``ECourtsScraper.post_upstream`` over aiohttp: leased session, one retry if upstream dropped it."""
+        pool = self.scraper.sessions
+        since = None
+        for _ in range(2):
+            # Only a login blocks, and that runs off the loop.
+            session = pool.try_acquire(since) or await self.run_sync(pool.acquire, self.engine.deadline, since)
+            sent = time.monotonic()
+            try:
+                html = await self.engine.post_html(await self.session(), path, session.form(form), session.cookies,
+                                                   session.update_cookies)
+            finally:
+                pool.release(session)
+            if session is NO_SESSION or not is_captcha_page(html):
+                return html
+            pool.invalidate(session)
+            since = sent
+        raise CaptchaError("eCourts asked for a captcha again on a freshly solved session")
+
+    async def _cached(self, key, ttl, fetch):
+        cache = self.scraper.cache
+        value = cache.memory.get(key)
+        if value is MISS and cache.disk is not None:
+            value = await self.run_sync(cache.get_disk, key)
+        if value is not MISS:
+            return value
+        task = self._flights.get(key)
+        if task is None:
+            task = self._flights[key] = asyncio.ensure_future(self._load(key, ttl, fetch))
+        # A client that disconnects stops waiting, but the fetch still completes and fills the cache.
+        return await asyncio.shield(task)
+
+    async def _load(self, key, ttl, fetch):
+        try:
+            value = await fetch()
+            if value.get('success') and ttl > 0:
+                await self.run_sync(self.scraper.cache.set, key, value, ttl)
+            return value
+        finally:
+            del self._flights[key]
+
+    async def get_cause_list(self, state_code, dist_code, complex_code, court_code, date):
+        scraper = self.scraper
+        key = CauseListKey(state_code, dist_code, complex_code, court_code, date)
+
+        async def fetch():
+            if scraper.live:
+                try:
+                    with stage('upstream'):
+                        html = await self.post_html(CAUSE_LIST_PATH, cause_list_form(key))
+                    result = self.engine.cause_list_result(key, html)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    result = {"success": False, "message": str(e) or type(e).__name__}
+            else:
+                result = scraper._fetch_cause_list(*key)
+            return await self.run_sync(scraper._ingest_cause_list, key, result)
+
+        return await self._cached(scraper.cause_list_cache_key(*key), date_ttl(date), fetch)
+
+    async def search_case(self, search_params, check_date):
+        scraper = self.scraper
+        try:
+            indexed, key, form, case_number = scraper.case_lookup(search_params, check_date)
+            if indexed is not None:
+                return indexed
+            cnr = case_number if search_params.get('cnr') else None
+
+            async def fetch():
+                if not scraper.live:
+                    if cnr:
+                        result = scraper._search_by_cnr(cnr, check_date)
+                    else:
+                        result = scraper._search_by_details(search_params, check_date)
+                    return await self.run_sync(scraper._ingest_case, cnr, None if cnr else case_number, result)
+                try:
+                    with stage('upstream'):
+                        html = await self.post_html(CASE_STATUS_PATH, form)
+                    result = scraper._case_status_result(html, case_number, check_date)
+                    return await self.run_sync(scraper._ingest_case, cnr, None if cnr else case_number, result)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    return {"success": False, "message": str(e) or type(e).__name__}
+
+            return await self._cached(key, date_ttl(check_date), fetch)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return {"success": False, "message": str(e)}
@@ -0,0 +1,206 @@
+"""Concurrent-request capacity of the threaded (wsgi.py) and async (asgi.py) servers.
+
+Both servers run under gunicorn with the same number of workers, in live
+mode, against ``simulator.py`` answering every POST with a 20-case cause
+list after ``--latency`` seconds. The client keeps ``--concurrency``
+connections busy, and each request asks for a different court so that every
+one is a real upstream round trip.
+
+The threaded server can only have workers x threads requests waiting on
+upstream at once. The async server parks each waiting request as a
+coroutine, so throughput is bounded by latency and CPU rather than by
+threads. Next to req/s and latency the report shows the effective
+concurrency (req/s x upstream latency) and the total RSS of master plus
+workers, so the modes can be compared at equal memory.
+
+    python benchmarks/async_capacity_bench.py [--workers 2] [--threads 4] [--concurrency 1000] [--latency 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import percentile  # noqa: E402
+from serve_load_test import free_port  # noqa: E402
+from simulator import ECourtsSimulator  # noqa: E402
+
+MODES = {
+    'wsgi': ('gthread', 'wsgi:application'),
+    'asgi': ('uvicorn.workers.UvicornWorker', 'asgi:application'),
+}
+
+
+def start_upstream(latency):
+    """The eCourts simulator on a background thread; returns its base URL."""
+    return ECourtsSimulator(cases=(20, 20), latency=latency).start()
+
+
+def rss_bytes(pid):
+    """Resident memory of ``pid`` and all its descendants."""
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f'/proc/{current}/status') as fh:
+                total += next(int(line.split()[1]) * 1024 for line in fh if line.startswith('VmRSS:'))
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as fh:
+                    stack.extend(int(child) for child in fh.read().split())
+        except (OSError, StopIteration):
+            continue
+    return total
+
+
+def start_server(mode, args, upstream, tmp):
+    worker_class, target = MODES[mode]
+    port = free_port()
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(args.workers),
+        GUNICORN_THREADS=str(args.threads),
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_WORKER_CONNECTIONS=str(args.concurrency * 2),
+        GUNICORN_TIMEOUT='120',
+        GUNICORN_ACCESS_LOG='',
+        GUNICORN_LOG_LEVEL='warning',
+        WSGI_THREADS=str(args.threads),
+        ECOURTS_LIVE='1',
+        ECOURTS_BASE_URL=upstream,
+        ECOURTS_CAPTCHA_SOLVER='stub',
+        ECOURTS_RATE_LIMIT='0',
+        ECOURTS_POOL_SIZE=str(args.concurrency),
+        ECOURTS_PER_HOST_LIMIT=str(args.concurrency),
+        ECOURTS_ASYNC_CONNECTIONS=str(args.concurrency),
+        ECOURTS_TIMEOUT='60',
+        ECOURTS_DEADLINE='120',
+        PREWARM_ENABLED='0',
+        CASE_INDEX_PATH='',
+        PARTY_SEARCH_PATH=os.path.join(tmp, 'party_search.db'),
+        CAUSE_LIST_STORE_PATH=os.path.join(tmp, 'causelist_store.db'),
+        PREWARM_PATH=os.path.join(tmp, 'prewarm.db'),
+        CASE_HISTORY_PATH=os.path.join(tmp, 'case_history.db'),
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}', target],
+        cwd=ROOT, env=env)
+    for _ in range(300):
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.1):
+                return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with status {process.returncode}')
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start listening within 30 s')
+
+
+async def load(url, concurrency, seconds, offset):
+    latencies = []
+    errors = 0
+    day = (date.today() + timedelta(days=1)).strftime('%d-%m-%Y')
+
+    async def client(session, n):
+        nonlocal errors
+        i = 0
+        while True:
+            body = {'state_code': '26', 'dist_code': '1', 'complex_code': '1',
+                    'court_code': f'{offset + n}-{i}', 'date': day}
+            started = time.perf_counter()
+            try:
+                async with session.post(url + '/api/cause-list', json=body) as response:
+                    payload = await response.json()
+                    ok = response.status == 200 and payload.get('success')
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+            i += 1
+
+    # Only requests that complete inside the window count; whatever is still
+    # queued at the deadline is cancelled rather than waited for.
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+        tasks = [asyncio.ensure_future(client(session, n * 100000)) for n in range(concurrency)]
+        _, pending = await asyncio.wait(tasks, timeout=seconds)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return latencies, errors, seconds
+
+
+def run(mode, args, upstream):
+    with tempfile.TemporaryDirectory() as tmp:
+        process, url = start_server(mode, args, upstream, tmp)
+        try:
+            asyncio.run(load(url, 1, args.latency * 2.5, 1 << 40))  # warm-up: one connection, so nothing is left queued
+            peak = 0
+            stop = threading.Event()
+
+            def sample():
+                nonlocal peak
+                while not stop.wait(0.5):
+                    peak = max(peak, rss_bytes(process.pid))
+
+            sampler = threading.Thread(target=sample, daemon=True)
+            sampler.start()
+            latencies, errors, elapsed = asyncio.run(load(url, args.concurrency, args.seconds, 0))
+            stop.set()
+            sampler.join()
+        finally:
+            process.terminate()
+            process.wait(60)
+    rps = len(latencies) / elapsed
+    return {
+        'mode': mode,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(rps, 1),
+        'effective_concurrency': round(rps * args.latency),
+        'p50_ms': round(percentile(latencies, 50) * 1000) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000) if latencies else None,
+        'peak_rss_mb': round(peak / 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['wsgi', 'asgi'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help="threads per worker (wsgi) / WSGI bridge threads (asgi)")
+    parser.add_argument('--concurrency', type=int, default=1000, help="open client connections")
+    parser.add_argument('--latency', type=float, default=2.0, help="fake upstream response time, seconds")
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    upstream = start_upstream(args.latency)
+    results = [run(mode, args, upstream) for mode in args.modes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.workers} workers, {args.threads} threads, {args.concurrency} connections, "
+          f"upstream latency {args.latency:g} s, {args.seconds:g} s per mode")
+    print(f"{'mode':<5} {'req/s':>8} {'in flight':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'RSS MB':>8}")
+    for r in results:
+        print(f"{r['mode']:<5} {r['rps']:>8} {r['effective_concurrency']:>10} {r['p50_ms'] or '-':>8} "
+              f"{r['p99_ms'] or '-':>8} {r['errors']:>7} {r['peak_rss_mb']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Throughput and peak memory of a bulk export as the scope grows.
+
+Runs ``bulk_export.py`` in live mode against the eCourts simulator for
+every court of a district over 1, 7 and 31 days, each in a fresh process.
+For each run it reports cause lists per second, the peak RSS of the
+exporting process and of its whole process tree (the render pool included),
+and the size of the output. Every fetched list also goes through the
+scraper's listeners, so the in-memory case index grows with the scope
+(about 0.7 KB per case) whatever the exporter does. The exporter's own share
+is flat: only the lists being fetched or rendered are held. ``--interrupt`` also kills one run halfway through
+and starts it again, to check that the restart only does the remaining
+lists.
+
+    python benchmarks/bulk_export_bench.py [--days 1 7 31] [--processes 2] [--format zip] [--interrupt]
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from async_capacity_bench import rss_bytes  # noqa: E402
+from simulator import ECourtsSimulator  # noqa: E402
+
+START = date(2025, 1, 6)
+
+
+def export(args, days, upstream, tmp, output, stop_after=None):
+    env = dict(
+        os.environ,
+        ECOURTS_LIVE='1',
+        ECOURTS_BASE_URL=upstream,
+        ECOURTS_CAPTCHA_SOLVER='stub',
+        ECOURTS_RATE_LIMIT='0',
+        PREWARM_ENABLED='0',
+        CASE_INDEX_PATH='',
+        RESPONSE_CACHE_PATH='',
+        PARTY_SEARCH_PATH=os.path.join(tmp, 'party_search.db'),
+        CAUSE_LIST_STORE_PATH=os.path.join(tmp, 'causelist_store.db'),
+        PREWARM_PATH=os.path.join(tmp, 'prewarm.db'),
+        CASE_HISTORY_PATH=os.path.join(tmp, 'case_history.db'),
+        BULK_EXPORT_DIR=os.path.join(tmp, 'bulk'),
+    )
+    command = [sys.executable, 'bulk_export.py', '--state', args.state, '--district', args.district,
+               '--from', START.isoformat(), '--to', (START + timedelta(days=days - 1)).isoformat(),
+               '--format', args.format, '--processes', str(args.processes), '-o', output]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stderr=subprocess.PIPE, text=True)
+    peak = tree_peak = 0
+
+    def sample():
+        nonlocal peak, tree_peak
+        while process.poll() is None:
+            peak = max(peak, rss_bytes_of(process.pid))
+            tree_peak = max(tree_peak, rss_bytes(process.pid))
+            time.sleep(0.1)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    if stop_after:
+        time.sleep(stop_after)
+        process.send_signal(signal.SIGINT)
+    _, stderr = process.communicate()
+    sampler.join()
+    return time.perf_counter() - started, peak, tree_peak, stderr
+
+
+def rss_bytes_of(pid):
+    try:
+        with open(f'/proc/{pid}/status') as fh:
+            return next(int(line.split()[1]) * 1024 for line in fh if line.startswith('VmRSS:'))
+    except (OSError, StopIteration):
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, nargs='+', default=[1, 7, 31])
+    parser.add_argument('--state', default='26')
+    parser.add_argument('--district', default='1')
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--format', choices=('zip', 'pdf'), default='zip')
+    parser.add_argument('--cases', type=int, nargs=2, default=(50, 200), metavar=('MIN', 'MAX'))
+    parser.add_argument('--latency', type=float, default=0.02, help="simulated eCourts response time, seconds")
+    parser.add_argument('--interrupt', action='store_true', help="also kill and resume the largest run")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    simulator = ECourtsSimulator(cases=tuple(args.cases), latency=args.latency)
+    upstream = simulator.start()
+    results = []
+    for days in args.days:
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, f'export.{args.format}')
+            before = simulator.stats['cause_list']
+            elapsed, peak, tree_peak, stderr = export(args, days, upstream, tmp, output)
+            lists = simulator.stats['cause_list'] - before
+            result = {
+                'days': days,
+                'lists': lists,
+                'seconds': round(elapsed, 2),
+                'lists_per_sec': round(lists / elapsed, 1),
+                'peak_rss_mb': round(peak / 1e6, 1),
+                'tree_peak_rss_mb': round(tree_peak / 1e6, 1),
+                'output_mb': round(os.path.getsize(output) / 1e6, 2) if os.path.exists(output) else None,
+            }
+            if args.interrupt and days == max(args.days):
+                os.remove(output)
+                shutil.rmtree(os.path.join(tmp, 'bulk'))
+                before = simulator.stats['cause_list']
+                export(args, days, upstream, tmp, output, stop_after=elapsed / 2)
+                first = simulator.stats['cause_list'] - before
+                export(args, days, upstream, tmp, output)
+                result['resumed'] = {'before_interrupt': first,
+                                     'after_restart': simulator.stats['cause_list'] - before - first}
+            results.append(result)
+            if result['output_mb'] is None:
+                print(stderr, file=sys.stderr)
+    simulator.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.format}, {args.processes} render processes, district {args.state}/{args.district}")
+    print(f"{'days':>5} {'lists':>6} {'lists/s':>8} {'peak MB':>8} {'tree MB':>8} {'output MB':>10}")
+    for r in results:
+        print(f"{r['days']:>5} {r['lists']:>6} {r['lists_per_sec']:>8} {r['peak_rss_mb']:>8} "
+              f"{r['tree_peak_rss_mb']:>8} {r['output_mb']:>10}")
+        if 'resumed' in r:
+            print(f"      interrupted after {r['resumed']['before_interrupt']} lists, "
+                  f"restart fetched the other {r['resumed']['after_restart']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Ingestion time and timeline-query latency of case_history.CaseHistory.
+
+One "day" is ``--courts`` cause lists of ``--cases`` rows each, roughly a
+state's daily lists. Each court draws its cases from a fixed pool, so a
+case comes back every few days and builds up a timeline. ``--days`` days
+are ingested through the cause-list listener with batched writes (one
+commit per BATCH_ROWS rows). The first day is also ingested into a second
+database with one commit per list, the way an unbatched listener would
+write it. Then random cases' full timelines are read back by CNR and by
+case number.
+
+    python benchmarks/case_history_bench.py [--courts 2500] [--cases 80] [--days 10]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from case_history import CaseHistory  # noqa: E402
+from common import percentile  # noqa: E402
+from causelist_engine import CauseListKey  # noqa: E402
+from records import CaseEntry, CauseList  # noqa: E402
+
+START = date(2025, 1, 6)
+CASE_TYPES = ('CR', 'CS', 'CC', 'WP', 'APL', 'RPT', 'BA', 'MCA', 'SCC', 'RCA')
+PURPOSES = ('Hearing', 'Evidence', 'Arguments', 'Admission', 'Final Hearing', 'Orders')
+POOL = 4
+
+
+def day_lists(day, courts, cases):
+    """The cause lists of one day: each court lists ``cases`` of its POOL * ``cases`` pending cases."""
+    for court in range(courts):
+        rng = random.Random(f'{court}|{day}')
+        picks = sorted(rng.sample(range(POOL * cases), cases))
+        key = CauseListKey('27', str(court // 100 + 1), str(court // 10 % 10 + 1), str(court % 10 + 1),
+                           day.strftime('%d-%m-%Y'))
+        yield key, CauseList.from_rows(
+            CaseEntry(str(serial), f"{CASE_TYPES[n % 10]}/{court * 1000 + n}/{2010 + n % 15}", "A vs B",
+                      PURPOSES[(n + serial) % 6], f"Court Room {n % 5 + 1}", f"MHMB01{court * 1000 + n:06d}2020")
+            for serial, n in enumerate(picks, 1))
+
+
+def ingest(history, lists, per_list_commit=False):
+    rows = 0
+    started = time.perf_counter()
+    for key, cases in lists:
+        history.record_cause_list(key, cases)
+        rows += len(cases)
+        if per_list_commit:
+            history.flush()
+    history.flush()
+    return rows, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--courts', type=int, default=2500)
+    parser.add_argument('--cases', type=int, default=80)
+    parser.add_argument('--days', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    try:
+        unbatched = CaseHistory(os.path.join(tmp, 'unbatched.db'))
+        rows, seconds = ingest(unbatched, day_lists(START, args.courts, args.cases), per_list_commit=True)
+        unbatched_rate = rows / seconds
+
+        history = CaseHistory(os.path.join(tmp, 'case_history.db'))
+        days = []
+        for offset in range(args.days):
+            lists = list(day_lists(START + timedelta(days=offset), args.courts, args.cases))
+            rows, seconds = ingest(history, lists)
+            days.append({'rows': rows, 'seconds': round(seconds, 2), 'rows_per_sec': round(rows / seconds)})
+
+        rng = random.Random(1)
+        picks = [(rng.randrange(args.courts), rng.randrange(POOL * args.cases)) for _ in range(args.queries)]
+        timings = {'cnr': [], 'case_number': []}
+        hearings = 0
+        for court, n in picks:
+            started = time.perf_counter()
+            hearings += len(history.history(cnr=f"MHMB01{court * 1000 + n:06d}2020"))
+            timings['cnr'].append(time.perf_counter() - started)
+            started = time.perf_counter()
+            history.history(case_number=f"{CASE_TYPES[n % 10]}/{court * 1000 + n}/{2010 + n % 15}")
+            timings['case_number'].append(time.perf_counter() - started)
+        conn = history._connect()
+        total_rows = conn.execute('SELECT COUNT(*) FROM hearings').fetchone()[0]
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        db_bytes = os.path.getsize(os.path.join(tmp, 'case_history.db'))
+    finally:
+        shutil.rmtree(tmp)
+
+    result = {
+        'lists_per_day': args.courts,
+        'rows_per_day': args.courts * args.cases,
+        'unbatched_rows_per_sec': round(unbatched_rate),
+        'days': days,
+        'stored_rows': total_rows,
+        'bytes_per_row': round(db_bytes / total_rows, 1),
+        'hearings_per_case': round(hearings / len(picks), 1),
+        'query_ms': {kind: {'p50': round(percentile(t, 50) * 1e3, 3), 'p99': round(percentile(t, 99) * 1e3, 3)}
+                     for kind, t in timings.items()},
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{args.courts} lists/day, {result['rows_per_day']} rows/day")
+    print(f"one commit per list: {result['unbatched_rows_per_sec']:>9} rows/s")
+    for offset, day in enumerate(days, 1):
+        print(f"day {offset:>3} batched:  {day['rows_per_sec']:>9} rows/s  ({day['seconds']} s)")
+    print(f"{total_rows} rows stored, {result['bytes_per_row']} bytes/row, "
+          f"{result['hearings_per_case']} hearings per case on average")
+    for kind, q in result['query_ms'].items():
+        print(f"timeline by {kind:<12} p50 {q['p50']} ms  p99 {q['p99']} ms")
+
+
+if __name__ == '__main__':
+    main()
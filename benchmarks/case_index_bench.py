@@ -0,0 +1,120 @@
+"""Build time, memory and query latency of case_index.CaseIndex.
+
+Synthetic cause lists (``--rows-per-list`` rows each, spread over courts and
+dates) are ingested until ``--rows`` rows are indexed. Then random CNR,
+case-number and party-name queries are timed one by one. With ``--persist``
+the index also writes its log to a temporary directory, and the time to
+replay it into a fresh index is reported.
+
+    python benchmarks/case_index_bench.py [--rows 1000000] [--persist]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from case_index import CaseIndex  # noqa: E402
+from common import percentile  # noqa: E402
+from records import CaseEntry, CauseList  # noqa: E402
+
+CASE_TYPES = ('CR', 'CS', 'CC', 'WP', 'APL', 'RPT', 'BA', 'MCA', 'SCC', 'RCA')
+PURPOSES = ('Hearing', 'Evidence', 'Arguments', 'Admission', 'Final Hearing', 'Orders')
+SURNAMES = ('Kumar', 'Devi', 'Shaikh', 'Narayanan', 'Singh', 'Patil', 'Sharma', 'Gupta', 'Iyer', 'Das',
+            'Reddy', 'Khan', 'Joshi', 'Menon', 'Bose', 'Yadav', 'Naidu', 'Kulkarni', 'Pillai', 'Chopra')
+GIVEN = ('Raj', 'Sunita', 'Irfan', 'Lakshmi', 'Gurpreet', 'Anil', 'Meena', 'Farhan', 'Kavita', 'Suresh',
+         'Pooja', 'Arjun', 'Neha', 'Vikram', 'Asha', 'Rahul', 'Divya', 'Imran', 'Geeta', 'Mohan')
+
+
+def name(n):
+    return f"{GIVEN[n % 20]} {SURNAMES[(n // 20) % 20]}"
+
+
+def cause_lists(rows, rows_per_list):
+    made = 0
+    list_no = 0
+    while made < rows:
+        court = ('27', str(list_no % 40 + 1), str(list_no % 7 + 1), str(list_no % 25 + 1))
+        day = f"2025-{list_no // 400 % 12 + 1:02d}-{list_no % 28 + 1:02d}"
+        count = min(rows_per_list, rows - made)
+        cases = CauseList.from_rows(
+            CaseEntry(str(i + 1), f"{CASE_TYPES[n % 10]}/{n}/{2010 + n % 15}",
+                      f"{name(n * 7)} vs {name(n * 13 + 3)}", PURPOSES[n % 6], f"Court Room {i % 5 + 1}",
+                      f"MHMB{n:012d}")
+            for i, n in enumerate(range(made, made + count))
+        )
+        yield court, day, cases
+        made += count
+        list_no += 1
+
+
+def time_queries(fn, args):
+    timings = []
+    for arg in args:
+        started = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - started)
+    return {'p50_us': round(percentile(timings, 50) * 1e6, 1), 'p99_us': round(percentile(timings, 99) * 1e6, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--rows-per-list', type=int, default=500)
+    parser.add_argument('--queries', type=int, default=10000)
+    parser.add_argument('--persist', action='store_true', help="also measure log size and replay time")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    lists = list(cause_lists(args.rows, args.rows_per_list))
+    tmp = tempfile.TemporaryDirectory() if args.persist else None
+    path = os.path.join(tmp.name, 'case_index.log') if tmp else None
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # The synthetic lists span a past year, so retention would drop them all.
+    index = CaseIndex(path, retention_days=0)
+    started = time.perf_counter()
+    for court, day, cases in lists:
+        index.ingest(court, day, cases)
+    build_s = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    rng = random.Random(7)
+    picks = [rng.randrange(args.rows) for _ in range(args.queries)]
+    result = {
+        'rows': args.rows,
+        'lists': len(lists),
+        'keys': index.stats()['keys'],
+        'build_s': round(build_s, 2),
+        'rows_per_second': round(args.rows / build_s),
+        'index_rss_mb': round((rss_after - rss_before) / 1024, 1),
+        'cnr': time_queries(index.lookup_cnr, [f"MHMB{n:012d}" for n in picks]),
+        'case_number': time_queries(index.lookup_case,
+                                    [f"{CASE_TYPES[n % 10]}/{n}/{2010 + n % 15}" for n in picks]),
+        'party': time_queries(index.search_parties, [name(n * 7) for n in picks[:1000]]),
+    }
+    if path:
+        result['log_mb'] = round(os.path.getsize(path) / 1e6, 1)
+        started = time.perf_counter()
+        CaseIndex(path, retention_days=0)
+        result['replay_s'] = round(time.perf_counter() - started, 2)
+        tmp.cleanup()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['rows']} rows in {result['lists']} lists, {result['keys']} keys")
+    print(f"build: {result['build_s']} s ({result['rows_per_second']} rows/s), RSS +{result['index_rss_mb']} MB")
+    for kind in ('cnr', 'case_number', 'party'):
+        print(f"{kind:<12} p50 {result[kind]['p50_us']:>8} us   p99 {result[kind]['p99_us']:>8} us")
+    if path:
+        print(f"log: {result['log_mb']} MB, replay: {result['replay_s']} s")
+
+
+if __name__ == '__main__':
+    main()
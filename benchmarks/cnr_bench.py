@@ -0,0 +1,86 @@
+"""CNRs validated per second on one core: batch check, per-CNR check and a regex baseline.
+
+Generates ``--number`` CNRs from the directory's prefixes with a fraction
+``--invalid`` of them broken. Each way of validating runs ``--repeat``
+times and the best run is kept. The batch check (``cnr.invalid_indexes``)
+and the per-CNR ``cnr.is_valid`` must find the same bad entries as the
+regex. ``CourtDirectory.locate_cnr`` is timed too, since routing a bulk
+check does one lookup per CNR.
+
+    python benchmarks/cnr_bench.py [--number 1000000] [--invalid 0.001]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cnr import invalid_indexes, is_valid, parse  # noqa: E402
+from court_directory import CourtDirectory  # noqa: E402
+
+CNR_RE = re.compile(r'[A-Za-z]{4}[0-9]{8}(?:19|20)[0-9]{2}')
+
+
+def make_cnrs(directory, number, invalid, seed=0):
+    rng = random.Random(seed)
+    prefixes = [prefix for prefix in directory.snapshot.cnr_codes if len(prefix) == 6]
+    cnrs = [f'{rng.choice(prefixes)}{rng.randrange(1, 1000000):06d}{rng.randint(1990, 2025)}' for _ in range(number)]
+    for n in rng.sample(range(number), int(number * invalid)):
+        cnr = cnrs[n]
+        cnrs[n] = rng.choice((cnr[:-1], cnr + '0', cnr[:5] + 'X' + cnr[6:], cnr[:12] + '3' + cnr[13:], cnr[0] + '1' + cnr[2:]))
+    return cnrs
+
+
+def best(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=1000000)
+    parser.add_argument('--invalid', type=float, default=0.001, help="fraction of CNRs that are malformed")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    directory = CourtDirectory(check_interval=3600)
+    cnrs = make_cnrs(directory, args.number, args.invalid)
+    cases = {
+        'batch': lambda: invalid_indexes(cnrs),
+        'is_valid': lambda: [n for n, cnr in enumerate(cnrs) if not is_valid(cnr)],
+        'regex': lambda: [n for n, cnr in enumerate(cnrs) if not CNR_RE.fullmatch(cnr)],
+    }
+    results = {}
+    expected = None
+    for name, fn in cases.items():
+        seconds, bad = best(fn, args.repeat)
+        if expected is None:
+            expected = bad
+        assert bad == expected, f"{name} disagrees"
+        results[name] = {'seconds': round(seconds, 4), 'per_sec': round(args.number / seconds)}
+    sample = cnrs[:100000]
+    seconds, _ = best(lambda: [parse(cnr) for cnr in sample if is_valid(cnr)], args.repeat)
+    results['parse'] = {'seconds': round(seconds, 4), 'per_sec': round(len(sample) / seconds)}
+    seconds, _ = best(lambda: [directory.locate_cnr(cnr) for cnr in sample], args.repeat)
+    results['locate_cnr'] = {'seconds': round(seconds, 4), 'per_sec': round(len(sample) / seconds)}
+
+    if args.json:
+        print(json.dumps({'number': args.number, 'invalid': len(expected), 'results': results}, indent=2))
+        return
+    print(f"{args.number} CNRs, {len(expected)} invalid, one core")
+    print(f"{'method':<12} {'CNRs/s':>14} {'ns/CNR':>8}")
+    for name, r in results.items():
+        print(f"{name:<12} {r['per_sec']:>14,} {1e9 / r['per_sec']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
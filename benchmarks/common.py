@@ -0,0 +1,7 @@
+"""Helpers shared by the benchmark scripts."""
+
+
+def percentile(samples, pct):
+    """Nearest-rank ``pct``th percentile of ``samples`` (which need not be sorted)."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
@@ -0,0 +1,98 @@
+"""Bytes on the wire and encode time for a large cause-list response.
+
+One ``--cases`` cause list is rendered by ``simulator.py`` and parsed, then
+the /api/cause-list body is built four ways: with the json module and with
+orjson (the app's JSON provider with and without orjson), each with
+``cases`` as objects and as rows (``case_format: rows``). Every body is
+then compressed with gzip at levels 1 and 6 and, when the ``brotli``
+package is installed, with Brotli at qualities 4 and 5. Each step is timed
+as the best of ``--repeat`` runs. The transfer column is the body's time
+on a ``--kbps`` link, which defaults to a slow mobile connection.
+
+    python benchmarks/compression_bench.py [--cases 10000] [--kbps 1600]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as api  # noqa: E402
+from compression import brotli, compress  # noqa: E402
+from parsers import parse_cause_list  # noqa: E402
+from records import CauseList  # noqa: E402
+from simulator import ECourtsSimulator  # noqa: E402
+
+LEVELS = [('gzip', 1), ('gzip', 6)] + ([('br', 4), ('br', 5)] if brotli is not None else [])
+
+
+def best(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def encode(result, use_orjson):
+    # The provider falls back to the json module when orjson is missing; this forces either path.
+    saved = api.orjson
+    if not use_orjson:
+        api.orjson = None
+    try:
+        return api.app.json.dumps_bytes(result)
+    finally:
+        api.orjson = saved
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cases', type=int, default=10000)
+    parser.add_argument('--kbps', type=float, default=1600, help="link speed for the transfer-time column")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    page = ECourtsSimulator(cases=(args.cases, args.cases)).cause_list_page(
+        {'state_code': '1', 'dist_code': '19', 'court_complex_code': '1', 'court_code': '1',
+         'causelist_date': '07-01-2025'})
+    cases = CauseList.from_rows(parse_cause_list(page))
+    result = {"success": True, "data": {"date": "07-01-2025", "total_cases": len(cases), "cases": cases}}
+
+    rows = []
+    for case_format in ('objects', 'rows'):
+        for encoder in ('json', 'orjson') if api.orjson is not None else ('json',):
+            seconds, body = best(lambda: encode(api.format_cases(result, case_format), encoder == 'orjson'),
+                                 args.repeat)
+            assert json.loads(body)['data']['total_cases'] == args.cases
+            encodings = [('identity', None, 0.0, len(body))]
+            for encoding, level in LEVELS:
+                compress_seconds, data = best(lambda: compress(body, encoding, level, level), args.repeat)
+                encodings.append((encoding, level, compress_seconds, len(data)))
+            for encoding, level, compress_seconds, size in encodings:
+                rows.append({
+                    'cases': case_format,
+                    'encoder': encoder,
+                    'encode_ms': round(seconds * 1e3, 2),
+                    'encoding': encoding if level is None else f'{encoding}-{level}',
+                    'compress_ms': round(compress_seconds * 1e3, 2),
+                    'bytes': size,
+                    'transfer_ms': round(size * 8 / args.kbps, 1),
+                })
+
+    if args.json:
+        print(json.dumps({'cases': args.cases, 'kbps': args.kbps, 'results': rows}, indent=2))
+        return
+    print(f"{args.cases} cases, transfer at {args.kbps:g} kbit/s")
+    print(f"{'cases':<8} {'encoder':<7} {'encode ms':>9} {'encoding':<9} {'compress ms':>11} {'bytes':>10} "
+          f"{'transfer ms':>11}")
+    for r in rows:
+        print(f"{r['cases']:<8} {r['encoder']:<7} {r['encode_ms']:>9} {r['encoding']:<9} {r['compress_ms']:>11} "
+              f"{r['bytes']:>10,} {r['transfer_ms']:>11}")
+
+
+if __name__ == '__main__':
+    main()
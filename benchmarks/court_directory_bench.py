@@ -0,0 +1,102 @@
+"""Per-lookup latency and allocations: CourtDirectory vs. the old dict literals.
+
+The old ``get_districts``/``get_court_complexes``/``get_courts`` methods built
+their whole nested dict literal on every call. That behaviour is reproduced
+here by compiling functions whose bodies are the same literals, generated from
+the current data file so both sides serve identical data.
+
+    python benchmarks/court_directory_bench.py [--number 200000]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from court_directory import DEFAULT_PATH, CourtDirectory
+
+
+def build_legacy_lookups(path):
+    with open(path, encoding='utf-8') as fh:
+        raw = json.load(fh)
+    districts, complexes, courts = {}, {}, {}
+    for s, state in raw['states'].items():
+        if state['districts']:
+            districts[s] = {d: dist['name'] for d, dist in state['districts'].items()}
+        for d, dist in state['districts'].items():
+            if dist['complexes']:
+                complexes.setdefault(s, {})[d] = {c: cx['name'] for c, cx in dist['complexes'].items()}
+            for c, cx in dist['complexes'].items():
+                if cx.get('courts'):
+                    courts.setdefault(s, {}).setdefault(d, {})[c] = cx['courts']
+
+    source = f"""
+def districts_data():
+    return {districts!r}
+
+def complexes_data():
+    return {complexes!r}
+
+def courts_data():
+    return {courts!r}
+
+def get_districts(state_code):
+    return districts_data().get(state_code, {{}})
+
+def get_court_complexes(state_code, dist_code):
+    return complexes_data().get(state_code, {{}}).get(dist_code, {{}})
+
+def get_courts(state_code, dist_code, complex_code):
+    courts = courts_data().get(state_code, {{}}).get(dist_code, {{}}).get(complex_code, {{}})
+    if not courts:
+        courts = {dict(raw['default_courts'])!r}
+    return courts
+"""
+    namespace = {}
+    exec(compile(source, '<legacy>', 'exec'), namespace)
+    return namespace
+
+
+def deep_sizeof(obj):
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(deep_sizeof(v) for v in obj.values())
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=200000)
+    parser.add_argument('--path', default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    legacy = build_legacy_lookups(args.path)
+    directory = CourtDirectory(args.path, check_interval=3600)
+
+    # Bytes of dict objects the legacy methods construct (and throw away) per
+    # call; dict freelists hide most of this from tracemalloc. The store
+    # returns shared mappings and builds nothing.
+    built = {
+        'districts': deep_sizeof(legacy['districts_data']()),
+        'complexes': deep_sizeof(legacy['complexes_data']()),
+        'courts': deep_sizeof(legacy['courts_data']()),
+    }
+    cases = [
+        ('get_districts', legacy['get_districts'], directory.districts, ('26',), built['districts']),
+        ('get_court_complexes', legacy['get_court_complexes'], directory.complexes, ('26', '1'), built['complexes']),
+        ('get_courts', legacy['get_courts'], directory.courts, ('26', '1', '1'), built['courts']),
+        ('get_courts (default)', legacy['get_courts'], directory.courts, ('26', '4', '1'), built['courts']),
+    ]
+
+    print(f"{'lookup':<22} {'legacy ns':>10} {'store ns':>10} {'speedup':>8} {'legacy B/call':>14} {'store B/call':>13}")
+    for name, old, new, call_args, legacy_bytes in cases:
+        assert dict(new(*call_args)) == old(*call_args)
+        old_ns = min(timeit.repeat(lambda: old(*call_args), number=args.number, repeat=3)) / args.number * 1e9
+        new_ns = min(timeit.repeat(lambda: new(*call_args), number=args.number, repeat=3)) / args.number * 1e9
+        print(f"{name:<22} {old_ns:>10.0f} {new_ns:>10.0f} {old_ns / new_ns:>7.1f}x "
+              f"{legacy_bytes:>14} {0:>13}")
+
+
+if __name__ == '__main__':
+    main()
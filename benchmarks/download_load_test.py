@@ -0,0 +1,94 @@
+"""Hammer the PDF download endpoints and watch the temp directory.
+
+Downloads cycle over ``--distinct`` cause-list dates (plus a case PDF every
+tenth request), so most requests are artifact-store hits and the rest are
+fresh renders. Every tenth of the run it samples the number of files and
+bytes under the temp directory and the disk usage of its filesystem. Both
+should stay flat, because PDFs are never written to disk.
+
+    python benchmarks/download_load_test.py [--requests 10000] [--distinct 50]
+    python benchmarks/download_load_test.py --url http://localhost:5000   # against a running server
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def tmp_usage(path):
+    files = size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+            files += 1
+    return files, size
+
+
+def make_client(url):
+    if url:
+        import requests
+        session = requests.Session()
+        return lambda path, body: session.post(url.rstrip('/') + path, json=body).content
+
+    from app import app
+    client = app.test_client()
+    return lambda path, body: client.post(path, json=body).data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--distinct', type=int, default=50)
+    parser.add_argument('--url', help="base URL of a running server (default: in-process test client)")
+    parser.add_argument('--tmp', default=tempfile.gettempdir())
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    post = make_client(args.url)
+    start_day = date.today() - timedelta(days=args.distinct)
+    samples = []
+    files0, bytes0 = tmp_usage(args.tmp)
+    disk0 = shutil.disk_usage(args.tmp).used
+    started = time.perf_counter()
+    every = max(1, args.requests // 10)
+
+    for i in range(args.requests):
+        if i % 10 == 9:
+            pdf = post('/api/download-case-pdf', {'caseData': {'caseNumber': f'CR/{i % args.distinct}/2024',
+                                                               'courtName': 'Court Room 1'}})
+        else:
+            day = (start_day + timedelta(days=i % args.distinct)).isoformat()
+            pdf = post('/api/download-causelist', {'state_code': '1', 'dist_code': '1', 'complex_code': '1',
+                                                   'court_code': '1', 'date': day})
+        assert pdf.startswith(b'%PDF'), pdf[:200]
+        if (i + 1) % every == 0:
+            files, size = tmp_usage(args.tmp)
+            samples.append({
+                'requests': i + 1,
+                'tmp_files_delta': files - files0,
+                'tmp_bytes_delta': size - bytes0,
+                'disk_used_delta': shutil.disk_usage(args.tmp).used - disk0,
+                'elapsed_s': round(time.perf_counter() - started, 2),
+            })
+
+    if args.json:
+        print(json.dumps(samples, indent=2))
+        return
+    print(f"temp dir: {args.tmp}")
+    print(f"{'requests':>9} {'tmp files':>10} {'tmp bytes':>11} {'disk bytes':>12} {'elapsed s':>10}")
+    for s in samples:
+        print(f"{s['requests']:>9} {s['tmp_files_delta']:>+10} {s['tmp_bytes_delta']:>+11} "
+              f"{s['disk_used_delta']:>+12} {s['elapsed_s']:>10}")
+
+
+if __name__ == '__main__':
+    main()
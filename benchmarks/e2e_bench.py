@@ -0,0 +1,224 @@
+"""End-to-end throughput, latency and memory per endpoint against the eCourts simulator.
+
+The app runs under gunicorn in live mode, pointed at ``simulator.py`` on a
+local port. Each endpoint is loaded for ``--seconds`` with
+``--concurrency`` keep-alive connections, one endpoint at a time:
+
+    courts                POST /api/courts            directory only, no upstream
+    cause-list            POST /api/cause-list        a new court per request, so every one is fetched and parsed
+    cause-list-cached     POST /api/cause-list        one court over and over: cache hits
+    check-case-cnr        POST /api/check-case        a new CNR per request
+    check-case-details    POST /api/check-case        a new case type/number/year per request
+    download-causelist    POST /api/download-causelist  fetch, parse and render the PDF
+
+For each endpoint it reports req/s, p50/p95/p99 latency, the share of
+answers with ``success: false``, transport errors and the peak RSS of the
+gunicorn master plus workers. The results, the settings and the git commit
+go to a JSON file under benchmarks/results/. ``--compare`` prints the change
+against an earlier file, so a release can be checked against the last one.
+
+The simulator is seeded, so two runs with the same settings ask for, and
+get, the same pages.
+
+    python benchmarks/e2e_bench.py [--seconds 10] [--concurrency 32] [--latency 0.05] [--cases 20 200]
+    python benchmarks/e2e_bench.py --error-rate 0.05 --captcha-rate 0.02 --throttle-rate 200
+    python benchmarks/e2e_bench.py --compare benchmarks/results/e2e-20250107-120000-abc1234.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from async_capacity_bench import MODES, rss_bytes, start_server  # noqa: E402
+from common import percentile  # noqa: E402
+from simulator import ECourtsSimulator  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DAY = (date.today() + timedelta(days=1)).strftime('%d-%m-%Y')
+COURT = {'state_code': '26', 'dist_code': '1', 'complex_code': '1'}
+
+ENDPOINTS = {
+    'courts': lambda n: ('/api/courts', COURT),
+    'cause-list': lambda n: ('/api/cause-list', {**COURT, 'court_code': f'c{n}', 'date': DAY}),
+    'cause-list-cached': lambda n: ('/api/cause-list', {**COURT, 'court_code': '1', 'date': DAY}),
+    'check-case-cnr': lambda n: ('/api/check-case', {'cnr': f'MHMB01{n % 1000000:06d}{2000 + n // 1000000 % 26}',
+                                                     'date': DAY}),
+    'check-case-details': lambda n: ('/api/check-case', {'caseType': 'CS', 'caseNumber': str(n), 'caseYear': '2023',
+                                                         'date': DAY}),
+    'download-causelist': lambda n: ('/api/download-causelist', {**COURT, 'court_code': f'p{n}', 'date': DAY}),
+}
+
+
+async def load(url, endpoint, concurrency, seconds, start):
+    latencies = []
+    failed = errors = 0
+    make = ENDPOINTS[endpoint]
+
+    async def client(session, n):
+        nonlocal failed, errors
+        i = start + n
+        while True:
+            path, body = make(i)
+            i += concurrency
+            started = time.perf_counter()
+            try:
+                async with session.post(url + path, json=body) as response:
+                    if response.content_type == 'application/json':
+                        ok = (await response.json()).get('success')
+                    else:
+                        ok = response.status == 200 and len(await response.read()) > 0
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            failed += not ok
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+        tasks = [asyncio.ensure_future(client(session, n)) for n in range(concurrency)]
+        _, pending = await asyncio.wait(tasks, timeout=seconds)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return latencies, failed, errors
+
+
+def run_endpoint(url, pid, endpoint, args, start):
+    peak = 0
+    stop = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not stop.wait(0.25):
+            peak = max(peak, rss_bytes(pid))
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    latencies, failed, errors = asyncio.run(load(url, endpoint, args.concurrency, args.seconds, start))
+    stop.set()
+    sampler.join()
+    answered = len(latencies)
+    return {
+        'endpoint': endpoint,
+        'requests': answered,
+        'rps': round(answered / args.seconds, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        'failure_rate': round(failed / answered, 4) if answered else None,
+        'errors': errors,
+        'peak_rss_mb': round(peak / 1e6, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = {r['endpoint']: r for r in json.load(fh)['endpoints']}
+    print(f"\nvs {os.path.basename(baseline_path)}")
+    print(f"{'endpoint':<20} {'req/s':>9} {'p95':>9} {'RSS':>9}")
+    for r in results:
+        old = baseline.get(r['endpoint'])
+        if old is None:
+            continue
+        cells = []
+        for field in ('rps', 'p95_ms', 'peak_rss_mb'):
+            if r[field] is None or not old[field]:
+                cells.append('-')
+            else:
+                cells.append(f'{(r[field] / old[field] - 1) * 100:+.1f}%')
+        print(f"{r['endpoint']:<20} {cells[0]:>9} {cells[1]:>9} {cells[2]:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--mode', choices=sorted(MODES), default='wsgi')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=32, help="open client connections")
+    parser.add_argument('--seconds', type=float, default=10, help="load time per endpoint")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cases', type=int, nargs=2, default=(20, 200), metavar=('MIN', 'MAX'))
+    parser.add_argument('--latency', type=float, default=0.05, help="simulated eCourts response time, seconds")
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--captcha-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--output', '-o', help="results file (default: benchmarks/results/e2e-<time>-<commit>.json)")
+    parser.add_argument('--compare', help="earlier results file to diff against")
+    parser.add_argument('--json', action='store_true', help="print the results file to stdout as well")
+    args = parser.parse_args()
+
+    simulator = ECourtsSimulator(seed=args.seed, cases=tuple(args.cases), latency=args.latency, jitter=args.jitter,
+                                 error_rate=args.error_rate, captcha_rate=args.captcha_rate,
+                                 throttle_rate=args.throttle_rate)
+    upstream = simulator.start()
+    server_args = SimpleNamespace(workers=args.workers, threads=args.threads, concurrency=args.concurrency)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        process, url = start_server(args.mode, server_args, upstream, tmp)
+        try:
+            asyncio.run(load(url, 'courts', 1, 1, 0))
+            for n, endpoint in enumerate(args.endpoints):
+                # Each endpoint starts on fresh keys so nothing is served from an earlier run's cache.
+                results.append(run_endpoint(url, process.pid, endpoint, args, (n + 1) * 10 ** 7))
+        finally:
+            process.terminate()
+            process.wait(60)
+    simulator.stop()
+
+    commit = git_commit()
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'json')},
+        'upstream': dict(simulator.stats),
+        'endpoints': results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"e2e-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{args.mode}, {args.workers} workers x {args.threads} threads, {args.concurrency} connections, "
+              f"upstream {args.latency * 1000:g} ms, {args.seconds:g} s per endpoint")
+        print(f"{'endpoint':<20} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'failed':>7} "
+              f"{'errors':>7} {'RSS MB':>7}")
+        for r in results:
+            failure = f"{r['failure_rate'] * 100:.1f}%" if r['failure_rate'] is not None else '-'
+            print(f"{r['endpoint']:<20} {r['rps']:>8} {r['p50_ms'] or '-':>8} {r['p95_ms'] or '-':>8} "
+                  f"{r['p99_ms'] or '-':>8} {failure:>7} {r['errors']:>7} {r['peak_rss_mb']:>7}")
+        print(f"upstream: {report['upstream']}")
+        print(f"saved {os.path.relpath(output, ROOT)}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Cost of the metrics middleware and the slow-request profiler per request.
+
+Three configurations of the same app are timed in one process, alternating
+in blocks of ``--block`` requests so that drift in machine speed hits all of
+them equally:
+
+    off        the bare Flask WSGI app
+    metrics    MetricsMiddleware: request histogram and in-flight gauge
+    profiler   metrics plus SlowRequestProfiler (its threshold is above any request, so nothing is dumped)
+
+The endpoints are the cheapest ones, /api/courts and a cached
+/api/cause-list, so the overhead is as large a share of the request as it can
+be. Each configuration reports its fastest block. The middleware's own cost
+is also timed around a WSGI app that does nothing, which gives an absolute
+figure that does not depend on the noise of a full request.
+
+    python benchmarks/metrics_overhead_bench.py [--blocks 40] [--block 200]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+ENDPOINTS = {
+    'courts': ('/api/courts', {'state_code': '26', 'dist_code': '1', 'complex_code': '1'}),
+    'cause-list': ('/api/cause-list', {'state_code': '26', 'dist_code': '1', 'complex_code': '1',
+                                       'court_code': '1', 'date': '07-01-2025'}),
+}
+
+
+def middleware_cost(middleware, calls=200000):
+    """Microseconds the middleware adds around an app that does nothing."""
+    class Rule:
+        rule = '/api/courts'
+
+    class Request:
+        url_rule = Rule()
+
+    environ = {'werkzeug.request': Request(), 'REQUEST_METHOD': 'POST'}
+    body = [b'']
+
+    def bare(environ, start_response):
+        start_response('200 OK', [])
+        return body
+
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    wrapped = middleware(bare)
+    timings = []
+    for app in (bare, wrapped):
+        started = time.perf_counter()
+        for _ in range(calls):
+            app(environ, start_response)
+        timings.append(time.perf_counter() - started)
+    return (timings[1] - timings[0]) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--blocks', type=int, default=40, help="timed blocks per configuration and endpoint")
+    parser.add_argument('--block', type=int, default=200, help="requests per block")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ.update(
+        METRICS_ENABLED='1',
+        ECOURTS_LIVE='0',
+        PREWARM_ENABLED='0',
+        CASE_INDEX_PATH='',
+        PARTY_SEARCH_PATH=os.path.join(tmp.name, 'party_search.db'),
+        CAUSE_LIST_STORE_PATH=os.path.join(tmp.name, 'causelist_store.db'),
+        PREWARM_PATH=os.path.join(tmp.name, 'prewarm.db'),
+        CASE_HISTORY_PATH=os.path.join(tmp.name, 'case_history.db'),
+    )
+    os.environ.pop('PROFILE_SLOW_MS', None)
+    from app import app
+    from metrics import MetricsMiddleware, SlowRequestProfiler
+
+    bare = app.wsgi_app
+    while isinstance(bare, MetricsMiddleware):
+        bare = bare.wsgi_app
+    profiler = SlowRequestProfiler(os.path.join(tmp.name, 'profiles'), slow_ms=60000)
+    configs = {
+        'off': bare,
+        'metrics': MetricsMiddleware(bare),
+        'profiler': MetricsMiddleware(bare, profiler),
+    }
+    client = app.test_client()
+
+    best = {}
+    for endpoint, (path, body) in ENDPOINTS.items():
+        for _ in range(300):
+            client.post(path, json=body)
+        for _ in range(args.blocks):
+            for name, wsgi_app in configs.items():
+                app.wsgi_app = wsgi_app
+                started = time.perf_counter()
+                for _ in range(args.block):
+                    client.post(path, json=body)
+                micros = (time.perf_counter() - started) / args.block * 1e6
+                best[name, endpoint] = min(best.get((name, endpoint), float('inf')), micros)
+    app.wsgi_app = configs['metrics']
+
+    results = {
+        'requests': [{'config': name, 'endpoint': endpoint, 'us_per_request': round(best[name, endpoint], 1),
+                      'overhead_pct': round((best[name, endpoint] / best['off', endpoint] - 1) * 100, 2)}
+                     for name in configs for endpoint in ENDPOINTS],
+        'middleware_us': round(middleware_cost(MetricsMiddleware), 2),
+        'middleware_with_profiler_us': round(middleware_cost(lambda app: MetricsMiddleware(app, profiler)), 2),
+    }
+    tmp.cleanup()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'config':<9} {'endpoint':<11} {'us/request':>11} {'overhead':>9}")
+    for r in results['requests']:
+        print(f"{r['config']:<9} {r['endpoint']:<11} {r['us_per_request']:>11} {r['overhead_pct']:>+8}%")
+    print(f"middleware alone: {results['middleware_us']} us/request, "
+          f"{results['middleware_with_profiler_us']} us/request with the profiler")
+
+
+if __name__ == '__main__':
+    main()
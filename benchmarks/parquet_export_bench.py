@@ -0,0 +1,116 @@
+"""Rows/second, peak memory and file size of the Parquet export over growing date ranges.
+
+A cause-list store is filled with ``--courts`` simulator cause lists per day
+for the largest ``--days`` value. Each range is then exported in a fresh
+interpreter, so the reported peak RSS belongs to that export alone. If the
+writer is bounded-memory, peak RSS stays flat as the range grows. Output
+size is compared with the same rows as JSON lines.
+
+    python benchmarks/parquet_export_bench.py [--days 7 30 90] [--courts 50] [--cases 50 200]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from causelist_engine import CauseListKey  # noqa: E402
+from causelist_store import CauseListStore  # noqa: E402
+from parsers import parse_cause_list  # noqa: E402
+from records import CauseList  # noqa: E402
+from simulator import ECourtsSimulator  # noqa: E402
+
+START = date(2025, 1, 1)
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def fill(path, days, courts, cases):
+    simulator = ECourtsSimulator(cases=tuple(cases))
+    store = CauseListStore(path)
+    rows = json_bytes = 0
+    for offset in range(days):
+        day = (START + timedelta(days=offset)).strftime('%d-%m-%Y')
+        for court in range(courts):
+            dist_code = str(court % 5 + 1)
+            form = {'state_code': '26', 'dist_code': dist_code, 'court_complex_code': '1',
+                    'court_code': str(court), 'causelist_date': day}
+            entries = CauseList.from_rows(parse_cause_list(simulator.cause_list_page(form)))
+            store.record(CauseListKey('26', dist_code, '1', str(court), day), entries)
+            rows += len(entries)
+            json_bytes += sum(len(json.dumps({**entry.to_dict(), 'cnr': entry.cnr}, ensure_ascii=False)) + 1
+                              for entry in entries)
+    store.close()
+    return rows, json_bytes
+
+
+def run_one(store_path, days, output):
+    from parquet_export import ParquetExporter
+
+    store = CauseListStore(store_path)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    result = ParquetExporter(store, output).export(START, START + timedelta(days=days - 1), full=True)
+    elapsed = time.perf_counter() - started
+    return {
+        'days': days,
+        'rows': result['rows'],
+        'partitions': result['partitions'],
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(result['rows'] / elapsed),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'rss_growth_mb': round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024, 1),
+        'parquet_bytes': directory_size(output),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, nargs='+', default=[7, 30, 90])
+    parser.add_argument('--courts', type=int, default=50, help="cause lists per day, over 5 districts")
+    parser.add_argument('--cases', type=int, nargs=2, default=(50, 200), metavar=('MIN', 'MAX'))
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--child', nargs=3, metavar=('STORE', 'DAYS', 'OUTPUT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(args.child[0], int(args.child[1]), args.child[2])))
+        return
+
+    tmp = tempfile.mkdtemp()
+    try:
+        store_path = os.path.join(tmp, 'causelist_store.db')
+        total_rows, json_bytes = fill(store_path, max(args.days), args.courts, args.cases)
+        results = []
+        for days in args.days:
+            output = os.path.join(tmp, f'export-{days}')
+            out = subprocess.run([sys.executable, __file__, '--child', store_path, str(days), output],
+                                 capture_output=True, text=True, check=True)
+            result = json.loads(out.stdout)
+            result['json_bytes'] = round(json_bytes * result['rows'] / total_rows)
+            results.append(result)
+            shutil.rmtree(output)
+    finally:
+        shutil.rmtree(tmp)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'days':>5} {'rows':>9} {'rows/s':>9} {'peak MB':>8} {'growth MB':>10} {'parquet MB':>11} {'json MB':>8}")
+    for r in results:
+        print(f"{r['days']:>5} {r['rows']:>9} {r['rows_per_sec']:>9} {r['peak_rss_mb']:>8} {r['rss_growth_mb']:>10} "
+              f"{r['parquet_bytes'] / 1e6:>11.2f} {r['json_bytes'] / 1e6:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
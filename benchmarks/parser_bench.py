@@ -0,0 +1,101 @@
+"""Rows/second and peak memory for each cause-list parser backend.
+
+Large pages are built from the saved ``fixtures/cause_list_small.html`` by
+repeating its rows. Each (backend, size) pair runs in a fresh interpreter so
+that peak RSS, which also covers libxml2/lexbor allocations that tracemalloc
+cannot see, is attributable to that run alone.
+
+    python benchmarks/parser_bench.py [--sizes 100 1000 10000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+sys.path.insert(0, ROOT)
+
+import parsers  # noqa: E402
+
+
+def build_page(rows):
+    with open(os.path.join(FIXTURES, 'cause_list_small.html'), encoding='utf-8') as fh:
+        page = fh.read()
+    head, rest = page.split('<tbody>', 1)
+    body, tail = rest.split('</tbody>', 1)
+    templates = re.findall(r'<tr>.*?</tr>', body, re.S)
+    out = []
+    for i in range(rows):
+        row = templates[i % len(templates)]
+        out.append(re.sub(r'<td align="center">\d+</td>', f'<td align="center">{i + 1}</td>', row, count=1))
+    return (head + '<tbody>\n' + '\n'.join(out) + '\n</tbody>' + tail).encode('utf-8')
+
+
+def run_one(backend, rows, repeat):
+    page = build_page(rows)
+    parse = parsers.CAUSE_LIST_BACKENDS[backend]
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = parse(page)
+        best = min(best, time.perf_counter() - started)
+        assert len(result) == rows, (backend, len(result))
+        del result
+
+    tracemalloc.start()
+    parse(page)
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'backend': backend,
+        'rows': rows,
+        'page_bytes': len(page),
+        'rows_per_second': round(rows / best),
+        'python_peak_kb': traced_peak // 1024,
+        'rss_growth_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--backends', nargs='+', default=list(parsers.CAUSE_LIST_BACKENDS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--child', nargs=2, metavar=('BACKEND', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(args.child[0], int(args.child[1]), args.repeat)))
+        return
+
+    results = []
+    for rows in args.sizes:
+        for backend in args.backends:
+            if backend == 'selectolax' and parsers.SelectolaxParser is None:
+                continue
+            out = subprocess.run(
+                [sys.executable, __file__, '--child', backend, str(rows), '--repeat', str(args.repeat)],
+                check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(out))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'backend':<11} {'rows':>7} {'page KB':>8} {'rows/s':>10} {'py peak KB':>11} {'RSS +KB':>8}")
+    for r in results:
+        print(f"{r['backend']:<11} {r['rows']:>7} {r['page_bytes'] // 1024:>8} {r['rows_per_second']:>10} "
+              f"{r['python_peak_kb']:>11} {r['rss_growth_kb']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Ingest rate, on-disk size and query latency of party_search.PartySearch.
+
+Rows come from the same synthetic cause lists as case_index_bench.py. The
+party names there are drawn from a small pool, so every name matches a large
+share of the rows, which is the worst case for a search index. The timed
+queries cover the first page and a deep page (following the cursor
+``--depth`` times) in each search mode.
+
+    python benchmarks/party_search_bench.py [--rows 1000000] [--db /path/to/bench.db]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from case_index_bench import cause_lists, name  # noqa: E402
+from common import percentile  # noqa: E402
+from causelist_engine import CauseListKey  # noqa: E402
+from party_search import MODES, PartySearch  # noqa: E402
+
+
+def time_search(search, queries, mode, depth):
+    first, deep = [], []
+    for query in queries:
+        started = time.perf_counter()
+        _, cursor = search.search(query, mode=mode)
+        first.append(time.perf_counter() - started)
+        for _ in range(depth):
+            if cursor is None:
+                break
+            started = time.perf_counter()
+            _, cursor = search.search(query, mode=mode, cursor=cursor)
+            deep.append(time.perf_counter() - started)
+    summary = {'first_p50_ms': round(percentile(first, 50) * 1000, 2),
+               'first_p99_ms': round(percentile(first, 99) * 1000, 2)}
+    if deep:
+        summary.update(deep_p50_ms=round(percentile(deep, 50) * 1000, 2),
+                       deep_p99_ms=round(percentile(deep, 99) * 1000, 2))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--rows-per-list', type=int, default=500)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--depth', type=int, default=10, help="pages to follow per query")
+    parser.add_argument('--db', help="database path (default: a temporary file, removed afterwards)")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    tmp = None if args.db else tempfile.TemporaryDirectory()
+    path = args.db or os.path.join(tmp.name, 'party_search.db')
+    search = PartySearch(path)
+
+    started = time.perf_counter()
+    for court, day, cases in cause_lists(args.rows, args.rows_per_list):
+        search.ingest(CauseListKey(*court, day), cases)
+    ingest_s = time.perf_counter() - started
+    search._connect().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    size = os.path.getsize(path)
+
+    rng = random.Random(11)
+    picks = [rng.randrange(args.rows) for _ in range(args.queries)]
+    queries = {
+        'phonetic': [name(n * 7).replace('ksh', 'x').replace('ee', 'i') for n in picks],
+        'exact': [name(n * 7) for n in picks],
+        'prefix': [name(n * 7)[:4] for n in picks],
+    }
+    result = {
+        'rows': args.rows,
+        'ingest_s': round(ingest_s, 1),
+        'rows_per_second': round(args.rows / ingest_s),
+        'db_mb': round(size / 1e6, 1),
+        'bytes_per_row': round(size / args.rows, 1),
+    }
+    for mode in MODES:
+        result[mode] = time_search(search, queries[mode], mode, args.depth)
+    if tmp:
+        tmp.cleanup()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['rows']} rows: ingest {result['ingest_s']} s ({result['rows_per_second']} rows/s), "
+          f"{result['db_mb']} MB on disk ({result['bytes_per_row']} B/row)")
+    for mode in MODES:
+        r = result[mode]
+        print(f"{mode:<9} first page p50 {r['first_p50_ms']:>7} ms  p99 {r['first_p99_ms']:>7} ms"
+              + (f"   deep page p50 {r['deep_p50_ms']:>7} ms  p99 {r['deep_p99_ms']:>7} ms" if 'deep_p50_ms' in r else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Latency and peak memory of the native PDF writer vs. wkhtmltopdf (pdfkit).
+
+Each (backend, size) pair runs in a fresh interpreter. Peak memory is the
+child's max RSS growth plus, for pdfkit, the max RSS of the wkhtmltopdf
+processes it spawned (``RUSAGE_CHILDREN``). The pdfkit rows are skipped when
+the wkhtmltopdf binary is not on ``PATH``.
+
+    python benchmarks/pdf_bench.py [--sizes 10 1000 10000] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import percentile  # noqa: E402
+from records import CaseEntry, CauseList  # noqa: E402
+import html_renderer  # noqa: E402
+import pdf_renderer  # noqa: E402
+
+NAMES = ('Raj Kumar', 'Sunita Devi', 'Mohd. Irfan Shaikh', 'Lakshmi Narayanan', 'Gurpreet Singh')
+PURPOSES = ('Hearing', 'Evidence', 'Arguments', 'Admission', 'Final Hearing')
+
+
+def cause_list(rows):
+    return CauseList.from_rows(
+        CaseEntry(str(i + 1), f"CR/{i}/2024", f"{NAMES[i % 5]} vs {NAMES[(i * 3) % 5]} and {i % 7} others",
+                  PURPOSES[i % 5], f"Court Room {i % 4 + 1}")
+        for i in range(rows)
+    )
+
+
+def render(backend, cases, generated_on):
+    if backend == 'native':
+        return sum(len(chunk) for chunk in pdf_renderer.cause_list_pdf('18-10-2026', cases, len(cases), generated_on))
+    html = html_renderer.stream('cause_list.html', date='18-10-2026', cases=cases,
+                                total_cases=len(cases), generated_on=generated_on)
+    return len(pdf_renderer.html_to_pdf(html))
+
+
+def run_one(backend, rows, repeat):
+    cases = cause_list(rows)
+    generated_on = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = render(backend, cases, generated_on)
+        timings.append(time.perf_counter() - started)
+
+    return {
+        'backend': backend,
+        'rows': rows,
+        'pdf_bytes': size,
+        'p50_ms': round(percentile(timings, 50) * 1000, 2),
+        'p99_ms': round(percentile(timings, 99) * 1000, 2),
+        'rss_growth_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss,
+        'child_peak_kb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--backends', nargs='+', default=['native', 'pdfkit'])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--child', nargs=2, metavar=('BACKEND', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_one(args.child[0], int(args.child[1]), args.repeat)))
+        return
+
+    results = []
+    for rows in args.sizes:
+        for backend in args.backends:
+            if backend == 'pdfkit' and shutil.which('wkhtmltopdf') is None:
+                continue
+            out = subprocess.run(
+                [sys.executable, __file__, '--child', backend, str(rows), '--repeat', str(args.repeat)],
+                check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(out))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'backend':<8} {'rows':>6} {'PDF KB':>8} {'p50 ms':>9} {'p99 ms':>9} {'RSS +KB':>8} {'child KB':>9}")
+    for r in results:
+        print(f"{r['backend']:<8} {r['rows']:>6} {r['pdf_bytes'] // 1024:>8} {r['p50_ms']:>9} {r['p99_ms']:>9} "
+              f"{r['rss_growth_kb']:>8} {r['child_peak_kb']:>9}")
+
+
+if __name__ == '__main__':
+    main()
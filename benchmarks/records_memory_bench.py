@@ -0,0 +1,86 @@
+"""Bytes per case for the old per-row dicts vs. CaseEntry vs. columnar CauseList.
+
+Every row gets freshly built strings, as it would coming out of the HTML
+parser, and the retained size (including the strings) is measured with
+tracemalloc in a fresh interpreter per (layout, size) pair.
+
+    python benchmarks/records_memory_bench.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import CaseEntry, CauseList  # noqa: E402
+
+CASE_TYPES = ('CR', 'CS', 'CC', 'WP', 'APL', 'RPT', 'BA')
+PURPOSES = ('Hearing', 'Evidence', 'Arguments', 'Admission', 'Final Hearing', 'Orders', 'Appearance')
+NAMES = ('Raj Kumar', 'Sunita Devi', 'Mohd. Irfan Shaikh', 'Lakshmi Narayanan', 'Gurpreet Singh')
+
+
+def rows(count):
+    for i in range(count):
+        yield (
+            str(i % 500 + 1),
+            f"{CASE_TYPES[i % 7]}/{i}/{2015 + i % 10}",
+            f"{NAMES[i % 5]} vs {NAMES[(i * 7) % 5]} and {i % 13} others",
+            ''.join(PURPOSES[i % 7]),
+            f"Court Room {i % 5 + 1}",
+        )
+
+
+def build(layout, count):
+    if layout == 'dicts':
+        return [
+            {"serial_no": a, "case_number": b, "parties": c, "purpose": d, "court_room": e}
+            for a, b, c, d, e in rows(count)
+        ]
+    if layout == 'entries':
+        return [CaseEntry(*row) for row in rows(count)]
+    if layout == 'columnar':
+        return CauseList.from_rows(CaseEntry(*row) for row in rows(count))
+    raise ValueError(layout)
+
+
+def measure(layout, count):
+    tracemalloc.start()
+    data = build(layout, count)
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(data) == count
+    return {'layout': layout, 'rows': count, 'bytes': current, 'bytes_per_case': round(current / count, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--layouts', nargs='+', default=['dicts', 'entries', 'columnar'])
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--child', nargs=2, metavar=('LAYOUT', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], int(args.child[1]))))
+        return
+
+    results = []
+    for count in args.sizes:
+        for layout in args.layouts:
+            out = subprocess.run([sys.executable, __file__, '--child', layout, str(count)],
+                                 check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(out))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'layout':<9} {'rows':>9} {'MB':>8} {'B/case':>8}")
+    for r in results:
+        print(f"{r['layout']:<9} {r['rows']:>9} {r['bytes'] / 1e6:>8.1f} {r['bytes_per_case']:>8}")
+
+
+if __name__ == '__main__':
+    main()
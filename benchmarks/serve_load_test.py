@@ -0,0 +1,163 @@
+"""Requests/second of the production server at different worker counts.
+
+For each ``--workers`` value this starts ``gunicorn -c gunicorn.conf.py
+wsgi:application`` on a free port, then keeps ``--concurrency`` keep-alive
+connections busy against one endpoint at a time for ``--seconds``:
+
+    courts       POST /api/courts      (served from the preloaded directory)
+    cause-list   POST /api/cause-list  (cycling over 8 courts x 7 days)
+
+The server runs in sample mode with its stores in a temporary directory, so
+this measures our own stack, not the eCourts site. The client runs in this
+process, so on a small machine it competes with the workers for CPU; run it
+from another host (``--url``) for numbers above a few thousand req/s.
+
+    python benchmarks/serve_load_test.py [--workers 1 4 16] [--seconds 10] [--concurrency 64]
+    python benchmarks/serve_load_test.py --url http://10.0.0.5:5000   # against a server you started
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common import percentile  # noqa: E402
+
+
+def bodies(endpoint):
+    if endpoint == 'courts':
+        return [{'state_code': '26', 'dist_code': '1', 'complex_code': '1'}]
+    today = date.today()
+    return [{'state_code': '26', 'dist_code': '1', 'complex_code': '1', 'court_code': str(court),
+             'date': (today + timedelta(days=day)).strftime('%d-%m-%Y')}
+            for court in range(1, 9) for day in range(7)]
+
+
+async def load(url, path, payloads, concurrency, seconds):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client(session, offset):
+        nonlocal errors
+        i = offset
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with session.post(url + path, json=payloads[i % len(payloads)]) as response:
+                    await response.read()
+                    ok = response.status == 200
+            except aiohttp.ClientError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+            i += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(session, n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, threads, tmp):
+    port = free_port()
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_THREADS=str(threads),
+        GUNICORN_ACCESS_LOG='',
+        GUNICORN_LOG_LEVEL='warning',
+        ECOURTS_LIVE='0',
+        PREWARM_ENABLED='0',
+        CASE_INDEX_PATH='',
+        PARTY_SEARCH_PATH=os.path.join(tmp, 'party_search.db'),
+        CAUSE_LIST_STORE_PATH=os.path.join(tmp, 'causelist_store.db'),
+        PREWARM_PATH=os.path.join(tmp, 'prewarm.db'),
+        CASE_HISTORY_PATH=os.path.join(tmp, 'case_history.db'),
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}', 'wsgi:application'],
+        cwd=ROOT, env=env)
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(300):
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.1):
+                return process, url
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with status {process.returncode}')
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start listening within 30 s')
+
+
+def run(url, args):
+    results = {}
+    for endpoint, path in (('courts', '/api/courts'), ('cause-list', '/api/cause-list')):
+        payloads = bodies(endpoint)
+        asyncio.run(load(url, path, payloads, args.concurrency, 1.0))  # warm caches and connections
+        results[endpoint] = asyncio.run(load(url, path, payloads, args.concurrency, args.seconds))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--threads', type=int, default=4, help="threads per worker")
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=64, help="open client connections")
+    parser.add_argument('--url', help="benchmark a running server instead of starting gunicorn")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    rows = []
+    if args.url:
+        rows.append(('-', run(args.url.rstrip('/'), args)))
+    else:
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as tmp:
+                process, url = start_server(workers, args.threads, tmp)
+                try:
+                    rows.append((workers, run(url, args)))
+                finally:
+                    process.terminate()
+                    process.wait(30)
+
+    if args.json:
+        print(json.dumps([{'workers': workers, **results} for workers, results in rows], indent=2))
+        return
+    print(f"{os.cpu_count()} CPUs, {args.concurrency} connections, {args.seconds:g} s per endpoint")
+    print(f"{'workers':>7}  {'endpoint':<11} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for workers, results in rows:
+        for endpoint, r in results.items():
+            print(f"{workers:>7}  {endpoint:<11} {r['rps']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
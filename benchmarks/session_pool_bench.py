@@ -0,0 +1,117 @@
+"""Cause lists per second with a captcha solved per request vs. pooled sessions.
+
+``simulator.py`` runs with sessions required (``--session-ttl``) and
+``--latency`` seconds per response. ``--workers`` threads fetch
+``--requests`` cause lists through one ``Transport``, in two modes:
+
+    per_request   every fetch logs in a new session first, as a scraper with
+                  no session reuse would
+    pool          fetches lease from one ``SessionPool`` of ``--sessions``
+
+The solver is ``StubSolver`` with ``--solve-delay`` seconds per captcha,
+standing in for an OCR model or a solving service. The report shows req/s,
+latency, captcha solves and the pool's reuse rate. The TTL is short enough
+that the pool refreshes its sessions in the background during the run.
+
+    python benchmarks/session_pool_bench.py [--requests 400] [--workers 16] [--solve-delay 0.5]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import percentile  # noqa: E402
+from causelist_engine import CAPTCHA_FIELD, CAUSE_LIST_PATH, CauseListKey, cause_list_form  # noqa: E402
+from parsers import is_captcha_page, parse_cause_list  # noqa: E402
+from session_pool import SessionPool, StubSolver, ecourts_login  # noqa: E402
+from simulator import ECourtsSimulator  # noqa: E402
+from transport import Transport  # noqa: E402
+
+
+def run(mode, base_url, args):
+    transport = Transport(pool_size=args.workers, per_host_limit=args.workers, rate=0)
+    solver = StubSolver(delay=args.solve_delay)
+    login = ecourts_login(transport, base_url, solver)
+    pool = SessionPool(login, size=args.sessions, ttl=args.ttl, refresh_margin=args.ttl / 4)
+    keys = iter(range(args.requests))
+    keys_lock = threading.Lock()
+    latencies = []
+    failures = []
+    solves = [0]
+
+    def post(form):
+        if mode == 'per_request':
+            http, captcha = login()
+            solves[0] += 1
+            return transport.post(base_url + CAUSE_LIST_PATH, data={**form, CAPTCHA_FIELD: captcha}, session=http)
+        with pool.lease() as session:
+            return transport.post(base_url + CAUSE_LIST_PATH, data=session.form(form), session=session.http)
+
+    def worker():
+        while True:
+            with keys_lock:
+                n = next(keys, None)
+            if n is None:
+                return
+            key = CauseListKey('1', '1', '1', str(n), '07-01-2025')
+            started = time.perf_counter()
+            response = post(cause_list_form(key))
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200 or is_captcha_page(response.content) or not parse_cause_list(response.content):
+                failures.append(n)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+    stats = pool.stats()
+    return {
+        'seconds': round(seconds, 2),
+        'req_per_sec': round(args.requests / seconds, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1e3, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1e3, 1),
+        'failures': len(failures),
+        'captcha_solves': solves[0] if mode == 'per_request' else stats['logins'],
+        'reuse_rate': 0.0 if mode == 'per_request' else stats['reuse_rate'],
+        'refreshes': stats['refreshes'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--solve-delay', type=float, default=0.5, help="seconds per captcha solve")
+    parser.add_argument('--latency', type=float, default=0.05, help="simulator seconds per response")
+    parser.add_argument('--ttl', type=float, default=4.0, help="session lifetime, upstream and in the pool")
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    simulator = ECourtsSimulator(cases=(20, 20), latency=args.latency, session_ttl=args.ttl)
+    base_url = simulator.start()
+    try:
+        results = {mode: run(mode, base_url, args) for mode in ('per_request', 'pool')}
+    finally:
+        simulator.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.requests} cause lists, {args.workers} workers, {args.solve_delay}s per solve, "
+          f"{args.latency}s upstream latency, {args.ttl}s session TTL")
+    print(f"{'mode':<12} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'solves':>7} {'reuse':>6} {'fail':>5}")
+    for mode, r in results.items():
+        print(f"{mode:<12} {r['req_per_sec']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8} "
+              f"{r['captcha_solves']:>7} {r['reuse_rate']:>6} {r['failures']:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+"""Bulk cause-list export: every court in a district or complex over a date range, as one ZIP or one PDF.
+
+    python bulk_export.py --state 26 --district 1 [--complex 1] --from 2025-01-06 --to 2025-01-10 -o lists.zip
+
+    POST /api/bulk-export                    start (or resume) a job, returns its id and progress
+    GET  /api/bulk-export/<job_id>           progress
+    GET  /api/bulk-export/<job_id>/download  the ZIP or merged PDF, once the job is complete
+
+A job is named by its scope, dates and format, and lives in a directory
+under BULK_EXPORT_DIR. Cause lists come from ``ECourtsScraper.get_cause_list``,
+so the cache, rate limit and listeners apply as usual. Fetches run on a few
+threads, and rendering runs on a pool of BULK_EXPORT_PROCESSES processes.
+Each rendered list is written to its own part file in the job directory as
+soon as it is done: a standalone PDF for ``zip`` jobs, or the page content
+streams for ``pdf`` jobs. Only the lists being fetched or rendered at that
+moment are held in memory.
+
+Finished parts are never redone. If a restart or crash interrupts a job,
+starting it again carries on from where it stopped, and failed parts are
+retried. Progress is read from the job directory, so any worker can report
+on a job that another worker is running. The download streams the parts
+from disk into a ZIP, or into one PDF with a bookmark per cause list.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import struct
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import date, datetime
+
+from cache import date_ttl, parse_date
+from causelist_engine import district_keys
+from pdf_renderer import cause_list_page_contents, cause_list_pdf, merged_pdf
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'bulk_exports')
+FORMATS = ('zip', 'pdf')
+HEARTBEAT = 30
+MAX_LISTED_FAILURES = 50
+COPY_CHUNK = 64 * 1024
+
+
+def _safe(text):
+    return ''.join(ch if ch.isalnum() or ch in '-.' else '_' for ch in str(text)).strip('_') or '_'
+
+
+def render_part(path, fmt, court, date, cases, total_cases, generated_on):
+    """Process-pool task: render one cause list into the part file at ``path``."""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as fh:
+        if fmt == 'zip':
+            fh.writelines(cause_list_pdf(date, cases, total_cases, generated_on, court=court))
+        else:
+            for content in cause_list_page_contents(date, cases, total_cases, generated_on, court=court):
+                fh.write(struct.pack('>I', len(content)))
+                fh.write(content)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def _page_contents(path):
+    with open(path, 'rb') as fh:
+        while True:
+            size = fh.read(4)
+            if not size:
+                return
+            yield fh.read(struct.unpack('>I', size)[0])
+
+
+class _Spool:
+    """Write-only file for ``zipfile``: collects what it is given until ``take`` hands it on."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        chunks, self.chunks = self.chunks, []
+        return b''.join(chunks)
+
+
+class BulkExporter:
+    def __init__(self, scraper, directory=DEFAULT_DIR, processes=None, fetchers=None):
+        self.scraper = scraper
+        self.directory = directory
+        self.processes = processes or os.cpu_count() or 1
+        self.fetchers = fetchers or self.processes * 2
+        self._running = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, scraper):
+        processes = os.environ.get('BULK_EXPORT_PROCESSES')
+        return cls(scraper, os.environ.get('BULK_EXPORT_DIR', DEFAULT_DIR),
+                   processes=int(processes) if processes else None)
+
+    # Jobs -----------------------------------------------------------------
+
+    def _job_dir(self, job_id):
+        if len(job_id) != 16 or any(ch not in '0123456789abcdef' for ch in job_id):
+            return None
+        return os.path.join(self.directory, job_id)
+
+    def load(self, job_id):
+        job_dir = self._job_dir(job_id)
+        try:
+            with open(os.path.join(job_dir, 'job.json'), encoding='utf-8') as fh:
+                return json.load(fh)
+        except (TypeError, OSError, ValueError):
+            return None
+
+    def create(self, state_code, dist_code, complex_code, dates, fmt='zip'):
+        """Return the id of the job for this scope, creating it if needed; raises ValueError on bad input."""
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        directory = self.scraper.directory
+        if not directory.complexes(state_code, dist_code):
+            raise ValueError(f"Unknown district: {state_code}/{dist_code}")
+        if complex_code and not directory.courts(state_code, dist_code, complex_code):
+            raise ValueError(f"Unknown court complex: {complex_code}")
+        job = {'state_code': state_code, 'dist_code': dist_code, 'complex_code': complex_code or None,
+               'dates': list(dates), 'format': fmt}
+        job_id = hashlib.sha256(json.dumps(job, sort_keys=True).encode()).hexdigest()[:16]
+        job_dir = self._job_dir(job_id)
+
+        existing = self.load(job_id)
+        complete = os.path.join(job_dir, 'complete.json')
+        if existing and os.path.exists(complete) and self._stale(job['dates'], os.path.getmtime(complete)):
+            shutil.rmtree(job_dir, ignore_errors=True)
+            existing = None
+        if existing is None:
+            os.makedirs(os.path.join(job_dir, 'parts'), exist_ok=True)
+            job['total'] = sum(1 for _ in self._keys(job))
+            job['created_at'] = datetime.now().isoformat(timespec='seconds')
+            with open(os.path.join(job_dir, 'job.json.tmp'), 'w', encoding='utf-8') as fh:
+                json.dump(job, fh)
+            os.replace(os.path.join(job_dir, 'job.json.tmp'), os.path.join(job_dir, 'job.json'))
+        return job_id
+
+    @staticmethod
+    def _stale(dates, finished_at):
+        """Whether an export finished at ``finished_at`` may predate revisions of its newest list.
+
+        It is kept as long as the cache would keep that list on the day the
+        export finished: minutes if it took in that day's list, 30 days if
+        every list was already past.
+        """
+        newest = max((parse_date(value) for value in dates), default=None, key=lambda day: day or date.min)
+        ttl = date_ttl(newest, today=date.fromtimestamp(finished_at))
+        return time.time() - finished_at > ttl
+
+    def _keys(self, job):
+        return district_keys(self.scraper.directory, job['state_code'], job['dist_code'], job['dates'],
+                             job['complex_code'])
+
+    def _part_name(self, key):
+        day = parse_date(key.date)
+        return f'{_safe(key.complex_code)}-{_safe(key.court_code)}-{day.isoformat() if day else _safe(key.date)}'
+
+    def _court_title(self, key):
+        courts = self.scraper.directory.courts(key.state_code, key.dist_code, key.complex_code)
+        return courts.get(key.court_code) or f'Court {key.court_code}'
+
+    def status(self, job_id):
+        job = self.load(job_id)
+        if job is None:
+            return None
+        job_dir = self._job_dir(job_id)
+        parts = os.listdir(os.path.join(job_dir, 'parts'))
+        done = sum(1 for name in parts if name.endswith('.part'))
+        failures = []
+        for name in sorted(name for name in parts if name.endswith('.failed')):
+            try:
+                with open(os.path.join(job_dir, 'parts', name), encoding='utf-8') as fh:
+                    failures.append(json.load(fh))
+            except (OSError, ValueError):
+                continue
+        complete = os.path.join(job_dir, 'complete.json')
+        heartbeat = os.path.join(job_dir, 'heartbeat')
+        if os.path.exists(complete):
+            state = 'complete'
+        elif os.path.exists(heartbeat) and time.time() - os.path.getmtime(heartbeat) < HEARTBEAT:
+            state = 'running'
+        else:
+            state = 'interrupted' if done or failures else 'pending'
+        return {
+            'job_id': job_id,
+            'state': state,
+            'format': job['format'],
+            'scope': {'state_code': job['state_code'], 'dist_code': job['dist_code'],
+                      'complex_code': job['complex_code']},
+            'from': job['dates'][0],
+            'to': job['dates'][-1],
+            'total': job['total'],
+            'done': done,
+            'failed': len(failures),
+            'progress': round((done + len(failures)) / job['total'], 4) if job['total'] else 1.0,
+            'failures': failures[:MAX_LISTED_FAILURES],
+            'created_at': job['created_at'],
+        }
+
+    # Running --------------------------------------------------------------
+
+    def start(self, job_id):
+        """Run the job on a background thread unless this or another worker is already running it."""
+        with self._lock:
+            thread = self._running.get(job_id)
+            status = self.status(job_id)
+            if (thread is None or not thread.is_alive()) and status['state'] not in ('complete', 'running'):
+                self._beat(job_id)
+                thread = self._running[job_id] = threading.Thread(
+                    target=self.run, args=(job_id,), name=f'bulk-export-{job_id}', daemon=True)
+                thread.start()
+                status['state'] = 'running'
+        return status
+
+    def _beat(self, job_id):
+        path = os.path.join(self._job_dir(job_id), 'heartbeat')
+        with open(path, 'a'):
+            os.utime(path)
+
+    def run(self, job_id, progress=None):
+        """Fetch and render every part that is not done yet; ``progress(status)`` is called after each one."""
+        job = self.load(job_id)
+        job_dir = self._job_dir(job_id)
+        parts_dir = os.path.join(job_dir, 'parts')
+        generated_on = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        methods = multiprocessing.get_all_start_methods()
+        # Forking a threaded server can copy held locks into the child; start from a clean process.
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+        def export_one(render_pool, key):
+            name = self._part_name(key)
+            failed = os.path.join(parts_dir, name + '.failed')
+            try:
+                result = self.scraper.get_cause_list(*key)
+                if not result['success']:
+                    raise RuntimeError(result.get('message') or 'fetch failed')
+                data = result['data']
+                render_pool.submit(render_part, os.path.join(parts_dir, name + '.part'), job['format'],
+                                   self._court_title(key), key.date, data['cases'], data['total_cases'],
+                                   generated_on).result()
+            except Exception as e:
+                with open(failed, 'w', encoding='utf-8') as fh:
+                    json.dump({'complex_code': key.complex_code, 'court_code': key.court_code,
+                               'date': key.date, 'message': str(e) or type(e).__name__}, fh)
+                return
+            if os.path.exists(failed):
+                os.remove(failed)
+
+        def settle(pending):
+            done, pending = wait(pending, timeout=HEARTBEAT / 3, return_when=FIRST_COMPLETED)
+            self._beat(job_id)
+            if done and progress:
+                progress(self.status(job_id))
+            return pending
+
+        complete = os.path.join(job_dir, 'complete.json')
+        if os.path.exists(complete):
+            os.remove(complete)
+        self._beat(job_id)
+        with ProcessPoolExecutor(self.processes, mp_context=context) as render_pool, \
+                ThreadPoolExecutor(self.fetchers) as fetch_pool:
+            pending = set()
+            for key in self._keys(job):
+                if os.path.exists(os.path.join(parts_dir, self._part_name(key) + '.part')):
+                    continue
+                while len(pending) >= self.fetchers * 2:
+                    pending = settle(pending)
+                pending.add(fetch_pool.submit(export_one, render_pool, key))
+            while pending:
+                pending = settle(pending)
+
+        status = self.status(job_id)
+        with open(complete, 'w', encoding='utf-8') as fh:
+            json.dump({'done': status['done'], 'failed': status['failed'],
+                       'finished_at': datetime.now().isoformat(timespec='seconds')}, fh)
+        with self._lock:
+            self._running.pop(job_id, None)
+        return self.status(job_id)
+
+    # Output ---------------------------------------------------------------
+
+    def stream(self, job_id):
+        """``(file name, mimetype, iterator of bytes)`` for a complete job."""
+        job = self.load(job_id)
+        parts_dir = os.path.join(self._job_dir(job_id), 'parts')
+        scope = '_'.join(_safe(part) for part in (job['state_code'], job['dist_code'], job['complex_code']) if part)
+        name = f"cause_lists_{scope}_{job['dates'][0]}_{job['dates'][-1]}"
+        entries = [(key, os.path.join(parts_dir, self._part_name(key) + '.part')) for key in self._keys(job)]
+        if job['format'] == 'pdf':
+            sections = ((f'{self._court_title(key)} - {key.date}', _page_contents(path))
+                        for key, path in entries if os.path.exists(path))
+            return name + '.pdf', 'application/pdf', merged_pdf(sections)
+        return name + '.zip', 'application/zip', self._zip(entries, parts_dir)
+
+    def _zip(self, entries, parts_dir):
+        spool = _Spool()
+        with zipfile.ZipFile(spool, 'w', zipfile.ZIP_STORED) as archive:
+            for key, path in entries:
+                if not os.path.exists(path):
+                    continue
+                info = zipfile.ZipInfo(f'{self._part_name(key)}-{_safe(self._court_title(key))}.pdf',
+                                       time.localtime(os.path.getmtime(path))[:6])
+                with open(path, 'rb') as src, archive.open(info, 'w') as dest:
+                    while True:
+                        chunk = src.read(COPY_CHUNK)
+                        if not chunk:
+                            break
+                        dest.write(chunk)
+                        data = spool.take()
+                        if data:
+                            yield data
+            failures = []
+            for name in sorted(os.listdir(parts_dir)):
+                if name.endswith('.failed'):
+                    with open(os.path.join(parts_dir, name), encoding='utf-8') as fh:
+                        failure = json.load(fh)
+                    failures.append(f"{failure['complex_code']}/{failure['court_code']} {failure['date']}: "
+                                    f"{failure['message']}\n")
+            if failures:
+                archive.writestr('failed.txt', ''.join(failures))
+        yield spool.take()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export every cause list in a district or complex to one file.")
+    parser.add_argument('--state', required=True)
+    parser.add_argument('--district', required=True)
+    parser.add_argument('--complex', help="limit to one court complex")
+    parser.add_argument('--from', dest='start', required=True, help="first date, YYYY-MM-DD or DD-MM-YYYY")
+    parser.add_argument('--to', dest='end', help="last date (default: same as --from)")
+    parser.add_argument('--format', choices=FORMATS, help="zip or pdf (default: from the output file name)")
+    parser.add_argument('--output', '-o', required=True)
+    parser.add_argument('--processes', type=int)
+    args = parser.parse_args(argv)
+
+    from app import scraper
+    from bulk_search import date_range
+
+    exporter = BulkExporter.from_env(scraper)
+    if args.processes:
+        exporter.processes = args.processes
+        exporter.fetchers = args.processes * 2
+    fmt = args.format or ('pdf' if args.output.endswith('.pdf') else 'zip')
+    try:
+        job_id = exporter.create(args.state, args.district, args.complex, date_range(args.start, args.end), fmt)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    def progress(status):
+        print(f"\r{status['done'] + status['failed']}/{status['total']} ({status['failed']} failed)",
+              end='', file=sys.stderr)
+
+    try:
+        status = exporter.run(job_id, progress)
+    except KeyboardInterrupt:
+        print(f"\ninterrupted; run the same command again to resume job {job_id}", file=sys.stderr)
+        return 130
+    _, _, body = exporter.stream(job_id)
+    with open(args.output, 'wb') as fh:
+        fh.writelines(body)
+    print(f"\n{status['done']}/{status['total']} cause lists written to {args.output} "
+          f"({status['failed']} failed)", file=sys.stderr)
+    return 1 if status['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Request parsing and matching for batch case checks.
+
+``ECourtsScraper.search_cases_bulk`` drives the fetching; this module turns
+the request items into de-duplicated ``BulkQuery`` keys, expands the date
+range, and matches case numbers and CNRs against a fetched cause list.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from cache import parse_date
+from cnr import invalid_indexes, normalize as normalize_cnr
+
+MAX_BULK_QUERIES = 5000
+MAX_BULK_DAYS = 31
+COURT_FIELDS = ('state_code', 'dist_code', 'complex_code', 'court_code')
+DATE_FORMAT = '%d-%m-%Y'
+MISSING_FIELDS = "Each case needs a cnr or caseType, caseNumber and caseYear"
+
+
+class BulkQuery(namedtuple('BulkQuery', 'cnr case_number court')):
+    """One distinct case to check; ``court`` is a COURT_FIELDS tuple or None."""
+    __slots__ = ()
+
+    def court_dict(self):
+        return dict(zip(COURT_FIELDS, self.court)) if self.court else None
+
+
+def case_number_key(case_number):
+    """Canonical TYPE/NUMBER/YEAR form, so "cr/0123/2024" matches "CR/123/2024"."""
+    parts = [part.strip().upper() for part in str(case_number).split('/')]
+    if len(parts) == 3:
+        parts[1] = parts[1].lstrip('0') or '0'
+    return '/'.join(parts)
+
+
+def normalize_queries(items):
+    """Return ``({BulkQuery: first request item}, [(invalid item, message)])``.
+
+    Duplicates (same CNR, or same case number in the same court) collapse
+    onto the first item that named them. CNRs are validated as one batch.
+    """
+    queries = {}
+    invalid = []
+    named = []
+    for item in items:
+        if not isinstance(item, dict):
+            invalid.append((item, MISSING_FIELDS))
+            continue
+        court = tuple(str(item.get(field) or '') for field in COURT_FIELDS)
+        court = court if all(court) else None
+        if item.get('cnr'):
+            named.append((item, normalize_cnr(item['cnr']), court))
+        elif item.get('caseType') and item.get('caseNumber') and item.get('caseYear'):
+            queries.setdefault(BulkQuery(None, case_number_key(
+                f"{item['caseType']}/{item['caseNumber']}/{item['caseYear']}"), court), item)
+        else:
+            invalid.append((item, MISSING_FIELDS))
+    bad = set(invalid_indexes([cnr for _, cnr, _ in named]))
+    for n, (item, cnr, court) in enumerate(named):
+        if n in bad:
+            invalid.append((item, f"Invalid CNR: {cnr}"))
+        else:
+            queries.setdefault(BulkQuery(cnr, None, court), item)
+    return queries, invalid
+
+
+def date_range(start, end=None):
+    """Inclusive list of DD-MM-YYYY dates; raises ValueError on bad input."""
+    first = parse_date(start)
+    last = parse_date(end) if end else first
+    if first is None or last is None:
+        raise ValueError("Dates must be YYYY-MM-DD or DD-MM-YYYY")
+    if last < first:
+        raise ValueError("'to' is before 'from'")
+    days = (last - first).days + 1
+    if days > MAX_BULK_DAYS:
+        raise ValueError(f"Date range is limited to {MAX_BULK_DAYS} days")
+    return [(first + timedelta(days=offset)).strftime(DATE_FORMAT) for offset in range(days)]
+
+
+def index_cause_list(cases):
+    """Map canonical case number, and CNR where the list has one, -> entry for one cause list."""
+    index = {case_number_key(entry.case_number): entry for entry in cases}
+    index.update((entry.cnr, entry) for entry in cases if entry.cnr)
+    return index
+
+
+def in_range(value, dates):
+    day = parse_date(value)
+    return day is not None and parse_date(dates[0]) <= day <= parse_date(dates[-1])
@@ -0,0 +1,277 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+MISS = object()
+
+PAST_TTL = 30 * 24 * 3600
+TODAY_TTL = 10 * 60
+TOMORROW_TTL = 60 * 60
+UNKNOWN_DATE_TTL = 5 * 60
+
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%d %B %Y', '%d %b %Y', '%d-%b-%Y')
+ORDINALS = ('st', 'nd', 'rd', 'th')
+
+
+def parse_date(value):
+    """A ``date`` from ISO, DD-MM-YYYY or the case-status page's "15th January 2024"; None if unparseable."""
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        day, _, rest = value.partition(' ')
+        if rest and day[-2:].lower() in ORDINALS and day[:-2].isdigit():
+            value = f'{day[:-2]} {rest}'
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def date_ttl(value, today=None):
+    """TTL in seconds for data about ``value``'s listings.
+
+    Past lists never change, so they are kept effectively forever; today's
+    list is revised a few times a day, tomorrow's and later ones less often.
+    """
+    day = parse_date(value)
+    if day is None:
+        return UNKNOWN_DATE_TTL
+    today = today or date.today()
+    if day < today:
+        return PAST_TTL
+    if day == today:
+        return TODAY_TTL
+    return TOMORROW_TTL
+
+
+class LRUCache:
+    """In-process LRU bounded by entry count and (approximate) pickled size."""
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return MISS
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl, size=None):
+        if size is None:
+            size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, time.time() + ttl, size)
+            self.size += size
+            while len(self._data) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        self.size -= self._data.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {'entries': len(self._data), 'bytes': self.size, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+
+class SQLiteCache:
+    """On-disk tier shared by every worker process on the host."""
+
+    def __init__(self, path, max_entries=100000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection; the next use opens a new one."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get_entry(self, key):
+        """Return ``(value, expires_at)`` or ``None``."""
+        row = self._connect().execute(
+            'SELECT value, expires_at FROM cache WHERE key = ? AND expires_at > ?', (key, time.time())).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(row[0]), row[1]
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return MISS if entry is None else entry[0]
+
+    def set(self, key, value, ttl, size=None):
+        conn = self._connect()
+        conn.execute('INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                     (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time() + ttl))
+        self._writes += 1
+        if self._writes % 256 == 0:
+            self.prune()
+
+    def prune(self):
+        conn = self._connect()
+        conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+        conn.execute('DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at '
+                     'LIMIT max(0, (SELECT count(*) FROM cache) - ?))', (self.max_entries,))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache')
+
+    def stats(self):
+        count = self._connect().execute('SELECT count(*) FROM cache').fetchone()[0]
+        return {'entries': count, 'hits': self.hits, 'misses': self.misses}
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution."""
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None, None]
+            else:
+                self.coalesced += 1
+        if not leader:
+            call[0].wait()
+            if call[2] is not None:
+                raise call[2]
+            return call[1]
+        try:
+            call[1] = fn()
+            return call[1]
+        except BaseException as e:
+            call[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call[0].set()
+
+
+class ResponseCache:
+    """Memory LRU in front of an optional shared SQLite tier.
+
+    Only successful results are stored. Concurrent misses for the same key
+    wait on a single upstream fetch.
+    """
+
+    def __init__(self, memory=None, disk=None):
+        self.memory = memory if memory is not None else LRUCache()
+        self.disk = disk
+        self.flight = SingleFlight()
+
+    @classmethod
+    def from_env(cls):
+        memory = LRUCache(
+            max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1024)),
+            max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+        )
+        path = os.environ.get('RESPONSE_CACHE_PATH')
+        return cls(memory, SQLiteCache(path) if path else None)
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is MISS:
+            value = self.get_disk(key)
+        return value
+
+    def get_disk(self, key):
+        """The disk tier's entry (copied into memory) or MISS; a SQLite read, unlike ``memory.get``."""
+        if self.disk is None:
+            return MISS
+        entry = self.disk.get_entry(key)
+        if entry is None:
+            return MISS
+        self.memory.set(key, entry[0], entry[1] - time.time())
+        return entry[0]
+
+    def set(self, key, value, ttl):
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+    def get_or_fetch(self, key, ttl, fetch):
+        value = self.get(key)
+        if value is not MISS:
+            return value
+
+        def load():
+            value = self.get(key)
+            if value is MISS:
+                value = fetch()
+                if value.get('success') and ttl > 0:
+                    self.set(key, value, ttl)
+            return value
+
+        return self.flight.do(key, load)
+
+    def stats(self):
+        return {
+            'memory': self.memory.stats(),
+            'disk': self.disk.stats() if self.disk is not None else None,
+            'coalesced': self.flight.coalesced,
+        }
+
+
+def cache_key(*parts):
+    return '|'.join('' if part is None else str(part) for part in parts)
@@ -0,0 +1,214 @@
+"""Every listing observed for every case, kept for hearing timelines.
+
+Two sources feed the store:
+
+    cause lists      every row of every fetched list (scraper cause-list listener)
+    case status      the next hearing date of each case-status lookup (scraper case listener)
+
+Rows live in one SQLite ``hearings`` table (WAL mode, ``WITHOUT ROWID``),
+clustered on ``(case_id, date, court)``. ``case_id`` is the CNR when it is
+known, else the normalised case number. A case's timeline is therefore a
+single range scan, and a secondary ``(case_number, date)`` index covers
+lookups by case number. Seeing the same listing again only moves its
+``last_seen``.
+
+Listeners only append to an in-memory buffer. A writer thread flushes it in
+one transaction every FLUSH_INTERVAL seconds, or as soon as BATCH_ROWS rows
+are waiting. A whole state's daily lists are therefore a handful of commits,
+not one per list. Reads flush first, so a process always sees its own writes.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from bulk_search import COURT_FIELDS, case_number_key
+from cache import parse_date
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'case_history.db')
+
+BATCH_ROWS = 50000
+FLUSH_INTERVAL = 2.0
+MAX_HISTORY = 1000
+SOURCES = ('cause_list', 'case_status')
+
+
+class CaseHistory:
+    def __init__(self, path=DEFAULT_PATH, batch_rows=BATCH_ROWS, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._pending = []
+        self._pending_ready = threading.Condition()
+        self._thread = None
+        self.flushes = 0
+        self.rows_written = 0
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript('''
+            CREATE TABLE IF NOT EXISTS hearings (
+                case_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                court TEXT NOT NULL,
+                case_number TEXT NOT NULL,
+                serial_no TEXT,
+                purpose TEXT,
+                court_room TEXT,
+                source INTEGER NOT NULL,
+                first_seen INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL,
+                PRIMARY KEY (case_id, date, court)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS hearings_case_number ON hearings (case_number, date);
+        ''')
+        atexit.register(self.flush)
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get('CASE_HISTORY_PATH', DEFAULT_PATH))
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Write pending rows and close the calling thread's connection; the next use opens a new one."""
+        self.flush()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Writing --------------------------------------------------------------
+
+    def record_cause_list(self, key, cases):
+        """Cause-list listener: queue one row per case of ``key`` (a ``CauseListKey``)."""
+        day = parse_date(key.date)
+        if day is None:
+            return
+        court = '/'.join(str(part) for part in key[:4])
+        day = day.isoformat()
+        now = int(time.time())
+        rows = []
+        for entry in cases:
+            case_number = case_number_key(entry.case_number)
+            rows.append((entry.cnr or case_number, day, court, case_number, entry.serial_no, entry.purpose,
+                         entry.court_room, 0, now))
+        self._queue(rows)
+
+    def record_case(self, cnr, case_number, details):
+        """Case listener: queue the listing a case-status lookup reported (``details`` is a ``CaseDetails``)."""
+        day = parse_date(details.listing_date)
+        if day is None:
+            return
+        case_number = case_number_key(case_number) if case_number else ''
+        self._queue([(cnr or case_number, day.isoformat(), '', case_number, details.serial_number,
+                      details.status, details.court_name, 1, int(time.time()))])
+
+    def _queue(self, rows):
+        with self._pending_ready:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.batch_rows:
+                self._pending_ready.notify()
+            # A thread does not survive a fork, so each worker starts its own writer on first use.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='case-history', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._pending_ready:
+                self._pending_ready.wait_for(lambda: len(self._pending) >= self.batch_rows, self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                # The rows go back on the queue and are retried with the next batch.
+                time.sleep(self.flush_interval)
+
+    def flush(self):
+        """Write every queued row in one transaction; returns how many were written."""
+        with self._write_lock:
+            with self._pending_ready:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            # Primary-key order keeps the inserts walking the B-tree instead of jumping around it. The sort
+            # is stable on the key alone, so a listing seen twice in one batch keeps its latest sighting.
+            rows.sort(key=lambda row: row[:3])
+            conn = self._connect()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(
+                    'INSERT INTO hearings (case_id, date, court, case_number, serial_no, purpose, court_room, '
+                    'source, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?9, ?9) '
+                    'ON CONFLICT (case_id, date, court) DO UPDATE SET serial_no = excluded.serial_no, '
+                    'purpose = excluded.purpose, court_room = excluded.court_room, last_seen = excluded.last_seen',
+                    rows)
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                with self._pending_ready:
+                    self._pending[:0] = rows
+                raise
+            self.flushes += 1
+            self.rows_written += len(rows)
+        return len(rows)
+
+    # Reading --------------------------------------------------------------
+
+    def history(self, cnr=None, case_number=None, start=None, end=None, limit=MAX_HISTORY, court=None):
+        """Listings of one case (by CNR or case number), oldest first, optionally within start..end.
+
+        A case number is only unique within a court, so ``court`` (a leading
+        part of a COURT_FIELDS tuple, e.g. just the state and district)
+        keeps the listings of that court or those under it. Case-status rows
+        carry no court code and are left out when ``court`` is given.
+        """
+        self.flush()
+        if cnr:
+            column, params = 'case_id', [cnr]
+        elif case_number:
+            column, params = 'case_number', [case_number_key(case_number)]
+        else:
+            raise ValueError("Provide a cnr or a case number")
+        sql = ('SELECT date, court, serial_no, purpose, court_room, source, first_seen, last_seen '
+               f'FROM hearings WHERE {column} = ?')
+        if court:
+            prefix = '/'.join(str(part) for part in court)
+            sql += ' AND (court = ? OR substr(court, 1, ?) = ?)'
+            params += [prefix, len(prefix) + 1, prefix + '/']
+        for bound, op in ((start, '>='), (end, '<=')):
+            if bound:
+                day = parse_date(bound)
+                if day is None:
+                    raise ValueError("Dates must be YYYY-MM-DD or DD-MM-YYYY")
+                sql += f' AND date {op} ?'
+                params.append(day.isoformat())
+        sql += ' ORDER BY date, court LIMIT ?'
+        params.append(max(1, min(int(limit), MAX_HISTORY)))
+        return [{
+            "date": day,
+            "court": dict(zip(COURT_FIELDS, court.split('/'))) if court else None,
+            "serial_no": serial_no,
+            "purpose": purpose,
+            "court_room": court_room,
+            "source": SOURCES[source],
+            "first_seen": datetime.fromtimestamp(first_seen).isoformat(),
+            "last_seen": datetime.fromtimestamp(last_seen).isoformat(),
+        } for day, court, serial_no, purpose, court_room, source, first_seen, last_seen
+            in self._connect().execute(sql, params)]
+
+    def stats(self):
+        with self._pending_ready:
+            pending = len(self._pending)
+        return {"pending": pending, "flushes": self.flushes, "rows_written": self.rows_written}
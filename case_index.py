@@ -0,0 +1,430 @@
+"""Inverted index from CNR, case number and party names to cause-list listings.
+
+Every cause list the scraper fetches is passed to ``CaseIndex.ingest``. The
+index keeps the lists themselves (columnar, see ``records.CauseList``) plus a
+posting map::
+
+    'C' + CNR               -> postings
+    'N' + TYPE/NUM/YEAR     -> postings
+    'P' + party name token  -> postings
+
+A posting packs ``(list id, row)`` into one int. A key with a single posting
+holds the bare int and only grows into an ``array('Q')`` on its second one.
+Ingesting a (court, date) again supersedes the earlier list: its rows are
+skipped at lookup and dropped when the index compacts itself. Lists dated
+more than RETENTION_DAYS before today are dropped the same way, so the index
+(and the startup replay) stays bounded by how many days it keeps.
+
+A case number is only unique within a court, so ``lookup_case`` takes the
+court, or a leading part of it, and only returns listings under it.
+
+On disk the index is an append-only log of pickled ``(court, date, cases)``
+records, replayed at startup and rewritten on compaction. Every worker
+appends to the same log, and before a lookup (at most every SYNC_INTERVAL
+seconds) reads what the others appended since it last looked, so a list
+fetched by any worker, or by the pre-warm crawler, is found by all of them.
+
+Compaction runs on a thread of its own. It holds an exclusive ``flock`` on
+``<path>.lock`` (appends hold it shared), rebuilds from the log itself so
+lists other workers appended survive the rewrite, and swaps the new lists in
+with one assignment, so a lookup never sees a half-built index. Writers
+notice the new inode and reopen before their next append; readers rebuild
+from the new file.
+"""
+import os
+import pickle
+import string
+import threading
+import time
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from bulk_search import COURT_FIELDS, case_number_key
+from cache import parse_date
+from records import CauseList
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'case_index.log')
+
+ROW_BITS = 24
+ROW_MASK = (1 << ROW_BITS) - 1
+MIN_TOKEN_LENGTH = 3
+PARTY_STOPWORDS = frozenset((
+    'and', 'anr', 'another', 'others', 'ors', 'the', 'through', 'thr', 'versus', 'vs',
+    'smt', 'shri', 'sri', 'mrs', 'mr', 'alias',
+))
+COMPACT_MIN_ROWS = 100000
+COMPACT_RATIO = 0.5
+RETENTION_DAYS = 30
+SYNC_INTERVAL = 1.0
+
+_PUNCTUATION = str.maketrans({ch: ' ' for ch in string.punctuation})
+
+
+def party_tokens(text):
+    """Distinct lower-case alphanumeric words of a parties string, minus filler words."""
+    text = text.lower()
+    if text.isascii():
+        text = text.translate(_PUNCTUATION)
+    else:
+        text = ''.join(ch if ch.isalnum() else ' ' for ch in text)
+    return {
+        token for token in text.split()
+        if len(token) >= MIN_TOKEN_LENGTH and token not in PARTY_STOPWORDS
+    }
+
+
+def _day(value):
+    day = parse_date(value)
+    return day.isoformat() if day else None
+
+
+class Listing(namedtuple('Listing', 'court date entry')):
+    """One row of an indexed cause list: court tuple, ISO date and its ``CaseEntry``."""
+    __slots__ = ()
+
+    def to_dict(self):
+        return {"court": dict(zip(COURT_FIELDS, self.court)), "date": self.date,
+                "cnr": self.entry.cnr, **self.entry.to_dict()}
+
+
+class _Lists:
+    """Indexed lists, the current list id of each (court, date), and the postings over them.
+
+    Compaction builds a new one and swaps it in whole; a lookup that already
+    holds the old one keeps reading a complete index.
+    """
+    __slots__ = ('lists', 'current', 'postings', 'rows', 'dead_rows')
+
+    def __init__(self, records=()):
+        self.lists = []
+        self.current = {}
+        self.postings = {}
+        self.rows = 0
+        self.dead_rows = 0
+        for court, day, cases in records:
+            self.add(court, day, cases)
+
+    def has(self, court, day, cases):
+        list_id = self.current.get((court, day))
+        return list_id is not None and self.lists[list_id][2] == cases
+
+    def add(self, court, day, cases):
+        old = self.current.get((court, day))
+        if old is not None:
+            self.dead_rows += len(self.lists[old][2])
+            self.lists[old] = None
+        list_id = len(self.lists)
+        self.lists.append((court, day, cases))
+        self.current[(court, day)] = list_id
+        self.rows += len(cases)
+
+        postings = self.postings
+        base = list_id << ROW_BITS
+        for row, (case_number, parties, cnr) in enumerate(zip(cases.case_number, cases.parties, cases.cnr)):
+            posting = base | row
+            keys = ['N' + case_number_key(case_number)]
+            if cnr:
+                keys.append('C' + cnr)
+            keys.extend('P' + token for token in party_tokens(parties))
+            for key in keys:
+                value = postings.get(key)
+                if value is None:
+                    postings[key] = posting
+                elif type(value) is int:
+                    postings[key] = array('Q', (value, posting))
+                else:
+                    value.append(posting)
+
+    def expire(self, cutoff):
+        """Retire lists dated before ``cutoff``; compaction then drops their rows."""
+        for key, list_id in list(self.current.items()):
+            if key[1] < cutoff:
+                self.dead_rows += len(self.lists[list_id][2])
+                self.lists[list_id] = None
+                del self.current[key]
+
+    def live(self):
+        return [entry for entry in self.lists if entry is not None]
+
+    def postings_of(self, key):
+        value = self.postings.get(key)
+        if value is None:
+            return ()
+        return (value,) if type(value) is int else value
+
+    def listing(self, posting, day=None):
+        entry = self.lists[posting >> ROW_BITS]
+        if entry is None or (day is not None and entry[1] != day):
+            return None
+        court, list_day, cases = entry
+        return Listing(court, list_day, cases[posting & ROW_MASK])
+
+
+class CaseIndex:
+    def __init__(self, path=None, retention_days=RETENTION_DAYS, sync_interval=SYNC_INTERVAL):
+        self.path = path
+        self.retention_days = retention_days
+        self.sync_interval = sync_interval
+        self._lists = _Lists()
+        self._lock = threading.Lock()
+        self._compacting = False
+        self._log = None
+        self._log_inode = None
+        self._lock_file = None
+        self._lock_pid = None
+        self._file_mutex = threading.Lock()
+        self._read_inode = None
+        self._read_offset = 0
+        self._synced_at = 0.0
+        self._expired_before = self._cutoff()
+        if path:
+            self._load()
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get('CASE_INDEX_PATH', DEFAULT_PATH) or None,
+                   retention_days=int(os.environ.get('CASE_INDEX_RETENTION_DAYS', RETENTION_DAYS)))
+
+    def _cutoff(self):
+        """ISO date before which lists are dropped, or None to keep every list."""
+        if self.retention_days <= 0:
+            return None
+        return (date.today() - timedelta(days=self.retention_days)).isoformat()
+
+    # Building -------------------------------------------------------------
+
+    def ingest(self, court, day, cases):
+        """Index one court's cause list for ``day``; returns False if it was unchanged."""
+        court = tuple(str(part) for part in court)
+        day = _day(day)
+        cutoff = self._cutoff()
+        if day is None or (cutoff and day < cutoff):
+            return False
+        if not isinstance(cases, CauseList):
+            cases = CauseList.from_rows(cases)
+        with self._lock:
+            lists = self._lists
+            if cutoff != self._expired_before:
+                self._expired_before = cutoff
+                lists.expire(cutoff)
+            if lists.has(court, day, cases):
+                return False
+            lists.add(court, day, cases)
+            if self.path:
+                self._append(court, day, cases)
+            if (lists.dead_rows > COMPACT_MIN_ROWS and lists.dead_rows > lists.rows * COMPACT_RATIO
+                    and not self._compacting):
+                self._compacting = True
+                threading.Thread(target=self._compact, name='case-index-compact', daemon=True).start()
+        return True
+
+    # Lookups --------------------------------------------------------------
+
+    def _view(self):
+        """The lists to read, after picking up what other workers appended to the log lately.
+
+        A lookup that finds the index busy reads it as it stands rather than wait.
+        """
+        if self.path and time.monotonic() - self._synced_at >= self.sync_interval:
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._sync()
+                finally:
+                    self._lock.release()
+        return self._lists
+
+    def _lookup(self, key, day):
+        if day is not None:
+            day = _day(day)
+            if day is None:
+                return []
+        lists = self._view()
+        listings = (lists.listing(posting, day) for posting in lists.postings_of(key))
+        return [listing for listing in listings if listing is not None]
+
+    def lookup_cnr(self, cnr, day=None):
+        return self._lookup('C' + str(cnr).strip().upper(), day)
+
+    def lookup_case(self, case_number, day=None, court=()):
+        """Listings of ``case_number`` in ``court`` (a leading part of a COURT_FIELDS tuple) or under it."""
+        court = tuple(str(part) for part in court)
+        return [listing for listing in self._lookup('N' + case_number_key(case_number), day)
+                if listing.court[:len(court)] == court]
+
+    def search_parties(self, text, day=None, limit=50):
+        """Listings whose parties contain every word of ``text``."""
+        tokens = party_tokens(text)
+        if not tokens:
+            return []
+        if day is not None:
+            day = _day(day)
+        lists = self._view()
+        candidates = min((lists.postings_of('P' + token) for token in tokens), key=len)
+        results = []
+        for posting in candidates:
+            listing = lists.listing(posting, day)
+            if listing is not None and tokens <= party_tokens(listing.entry.parties):
+                results.append(listing)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def stats(self):
+        lists = self._lists
+        return {'lists': len(lists.current), 'rows': lists.rows - lists.dead_rows,
+                'superseded_rows': lists.dead_rows, 'keys': len(lists.postings),
+                'retention_days': self.retention_days}
+
+    # Persistence ----------------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        """Hold a shared or exclusive ``flock`` on the log's lock file; a no-op without fcntl.
+
+        Threads of one process share the lock file, and a second ``flock`` on
+        it would convert the lock rather than wait, so they take turns first.
+        """
+        with self._file_mutex:
+            if fcntl is None:
+                yield
+                return
+            # flock belongs to the open file, which a forked worker shares with its parent, so each process opens its own.
+            if self._lock_pid != os.getpid():
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._lock_file = open(self.path + '.lock', 'a')
+                self._lock_pid = os.getpid()
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _read_log(self, offset=0, inode=None):
+        """``(records, end offset, inode)`` for the log's whole records from ``offset`` on.
+
+        ``offset`` only applies while the file is still ``inode``; a new file
+        is read from the start. Reading stops before a record that does not
+        unpickle: one still being appended, or a torn one left by a crash.
+        """
+        records = []
+        with open(self.path, 'rb') as fh:
+            current = os.fstat(fh.fileno()).st_ino
+            if current == inode:
+                fh.seek(offset)
+            else:
+                offset = 0
+            while True:
+                try:
+                    records.append(pickle.load(fh))
+                except Exception:
+                    break
+                offset = fh.tell()
+        return records, offset, current
+
+    def _sync(self):
+        """Add the lists appended to the log since this index last read it; the caller holds ``_lock``.
+
+        After another worker's compaction replaced the file, the lists are
+        rebuilt from the new one. Returns whether any record read was past
+        the retention.
+        """
+        self._synced_at = time.monotonic()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if stat.st_ino == self._read_inode and stat.st_size == self._read_offset:
+            return False
+        records, offset, inode = self._read_log(self._read_offset, self._read_inode)
+        lists = self._lists if inode == self._read_inode else _Lists()
+        cutoff = self._expired_before
+        expired = False
+        for court, day, cases in records:
+            if cutoff and day < cutoff:
+                expired = True
+            elif not lists.has(court, day, cases):
+                lists.add(court, day, cases)
+        self._lists = lists
+        self._read_offset, self._read_inode = offset, inode
+        return expired
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with self._file_lock(exclusive=True):
+            expired = self._sync()
+            if self._read_offset != os.path.getsize(self.path):
+                # A torn record at the tail, left by a crash mid-append.
+                with open(self.path, 'r+b') as fh:
+                    fh.truncate(self._read_offset)
+            if expired or self._lists.dead_rows > COMPACT_MIN_ROWS:
+                # Rewrite now, so the next start does not replay lists that are gone.
+                self._lists = _Lists(self._lists.live())
+                self._read_offset, self._read_inode = self._rewrite(self._lists)
+
+    def _append(self, court, day, cases):
+        record = pickle.dumps((court, day, cases), pickle.HIGHEST_PROTOCOL)
+        with self._file_lock(exclusive=False):
+            try:
+                inode = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                inode = None
+            if self._log is not None and inode != self._log_inode:
+                # Another worker compacted the log into a new file.
+                os.close(self._log)
+                self._log = None
+            if self._log is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._log = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                self._log_inode = os.fstat(self._log).st_ino
+            # One write per record, so appends from several workers do not interleave.
+            os.write(self._log, record)
+            end = os.lseek(self._log, 0, os.SEEK_CUR)
+            if self._log_inode == self._read_inode and end - len(record) == self._read_offset:
+                # Nothing else was appended since the last read, so there is no need to read this back.
+                self._read_offset = end
+
+    def _compact(self):
+        """Drop superseded and expired rows, from the log too; runs on its own thread."""
+        try:
+            if not self.path:
+                with self._lock:
+                    self._lists = _Lists(self._lists.live())
+                return
+            with self._file_lock(exclusive=True):
+                # The log holds every worker's lists, not just this one's, so rebuild from it.
+                latest = {}
+                if os.path.exists(self.path):
+                    for court, day, cases in self._read_log()[0]:
+                        latest[court, day] = cases
+                cutoff = self._expired_before
+                lists = _Lists((court, day, cases) for (court, day), cases in latest.items()
+                               if not (cutoff and day < cutoff))
+                offset, inode = self._rewrite(lists)
+            with self._lock:
+                self._lists = lists
+                self._read_offset, self._read_inode = offset, inode
+                # Lists ingested while the rebuild ran were appended to the new file.
+                self._sync()
+        finally:
+            self._compacting = False
+
+    def _rewrite(self, lists):
+        """Replace the log with ``lists``; returns its size and inode. The caller holds the exclusive file lock."""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as fh:
+            for record in lists.live():
+                pickle.dump(record, fh, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        if self._log is not None:
+            os.close(self._log)
+            self._log = None
+        stat = os.stat(self.path)
+        return stat.st_size, stat.st_ino
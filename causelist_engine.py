@@ -0,0 +1,289 @@
+"""Asyncio fan-out engine for fetching many cause lists at once.
+
+Python API::
+
+    keys = district_keys(directory, '26', '1', dates)
+    async for key, result in fetch_cause_lists(keys, concurrency=32):
+        ...
+
+CLI::
+
+    python causelist_engine.py --state 26 --district 1 --days 3 > lists.ndjson
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from court_directory import CourtDirectory
+from metrics import stage
+from parsers import parse_cause_list
+from records import CauseList, json_default
+from transport import RETRY_STATUSES, DeadlineExceeded, TokenBucket, TransportMetrics, backoff_delay
+
+DEFAULT_BASE_URL = "https://services.ecourts.gov.in/ecourtindia_v6/"
+CAUSE_LIST_PATH = 'causelist/index.php'
+CASE_STATUS_PATH = 'index.php'
+CAPTCHA_PATH = 'vendor/securimage/securimage_show.php'
+CAPTCHA_FIELD = 'fcaptcha_code'
+
+
+class CauseListKey(namedtuple('CauseListKey', 'state_code dist_code complex_code court_code date')):
+    __slots__ = ()
+
+    def to_dict(self):
+        return self._asdict()
+
+
+def cause_list_form(key):
+    return {
+        'state_code': key.state_code,
+        'dist_code': key.dist_code,
+        'court_complex_code': key.complex_code,
+        'court_code': key.court_code,
+        'causelist_date': key.date,
+        'submit': 'Get Cause List',
+    }
+
+
+def cnr_status_form(cnr):
+    return {'action_type': 'CNR', 'cnr_no': cnr, 'submit': 'Get Status'}
+
+
+def case_status_form(case_type, case_number, case_year):
+    return {
+        'action_type': 'CASENO',
+        'case_no': case_number,
+        'case_type': case_type,
+        'rgyear': case_year,
+        'submit': 'Get Status',
+    }
+
+
+def district_keys(directory, state_code, dist_code, dates, complex_code=None):
+    """Every (court, date) key under a district, or under one of its complexes."""
+    complexes = [complex_code] if complex_code else list(directory.complexes(state_code, dist_code))
+    for complex_ in complexes:
+        for court_code in directory.courts(state_code, dist_code, complex_):
+            for day in dates:
+                yield CauseListKey(state_code, dist_code, complex_, court_code, day)
+
+
+class CauseListEngine:
+    """Fetch and parse cause lists for many keys with bounded concurrency.
+
+    At most ``concurrency`` requests are in flight (``per_host_limit`` to one
+    host), all requests share one token bucket, and a failure for one key
+    (after retries) is reported as that key's result without disturbing the
+    others. ``timeout`` bounds each attempt and ``deadline``, if given, the
+    whole request with its retries and waits.
+
+    ``bucket`` and ``host_slot`` can be replaced to share another client's
+    limits; ``async_scraper`` uses the ``Transport``'s.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, concurrency=16, rate=5.0, burst=None,
+                 timeout=30.0, max_retries=3, backoff_base=0.5, backoff_max=8.0, headers=None, metrics=None,
+                 per_host_limit=None, deadline=None):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.per_host_limit = per_host_limit or concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.host_slot = self._request_slot
+        self.metrics = metrics or TransportMetrics(concurrency)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.headers = headers or {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        }
+
+    def session(self, cookie_jar=None):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host_limit)
+        return aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers=self.headers,
+                                     cookie_jar=cookie_jar)
+
+    @asynccontextmanager
+    async def _request_slot(self, host, deadline=None):
+        """The default ``host_slot``: the connector alone limits connections, so this only counts the request."""
+        self.metrics.enter()
+        try:
+            yield
+        finally:
+            self.metrics.leave()
+
+    async def _throttle(self, deadline=None):
+        while True:
+            wait = self.bucket.reserve()
+            if wait == 0.0:
+                return
+            if deadline is not None and time.monotonic() + wait > deadline:
+                self.metrics.incr('deadline_exceeded')
+                raise DeadlineExceeded("Rate limit wait exceeds deadline")
+            await asyncio.sleep(wait)
+
+    async def fetch_html(self, session, key):
+        return await self.post_html(session, CAUSE_LIST_PATH, cause_list_form(key))
+
+    async def post_html(self, session, path, form, cookies=None, received=None):
+        """POST ``form`` to ``path`` under the base URL, with throttling and retries; returns the body.
+
+        ``cookies`` (an upstream session's, see session_pool) go with this
+        request only, and ``received``, if given, is called with a name ->
+        value dict of any cookies the response sets.
+        """
+        url = self.base_url + path
+        host = urlsplit(url).netloc
+        deadline = time.monotonic() + self.deadline if self.deadline is not None else None
+        attempt = 0
+        while True:
+            await self._throttle(deadline)
+            status = retry_after = None
+            try:
+                async with self.host_slot(host, deadline):
+                    timeout = self.timeout
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise DeadlineExceeded(f"Deadline exceeded before requesting {url}")
+                        timeout = aiohttp.ClientTimeout(total=min(timeout.total, remaining))
+                    async with session.post(url, data=form, cookies=cookies, timeout=timeout) as response:
+                        self.metrics.record_response(response.status)
+                        if received is not None and response.cookies:
+                            received({name: morsel.value for name, morsel in response.cookies.items()})
+                        if response.status not in RETRY_STATUSES:
+                            response.raise_for_status()
+                            return await response.text()
+                        status, retry_after = response.status, response.headers.get('Retry-After')
+                        error = aiohttp.ClientResponseError(
+                            response.request_info, response.history, status=status, message=response.reason)
+            except DeadlineExceeded:
+                self.metrics.incr('deadline_exceeded')
+                raise
+            except asyncio.TimeoutError as e:
+                self.metrics.incr('timeouts')
+                error = e
+            except aiohttp.ClientConnectionError as e:
+                self.metrics.incr('connection_errors')
+                error = e
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max, status, retry_after)
+            if attempt >= self.max_retries or (deadline is not None and time.monotonic() + delay >= deadline):
+                raise error
+            self.metrics.incr('retries')
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def cause_list_result(self, key, html):
+        with stage('parse'):
+            cases = CauseList.from_rows(parse_cause_list(html))
+        return {
+            "success": True,
+            "data": {
+                "date": key.date,
+                "total_cases": len(cases),
+                "cases": cases
+            }
+        }
+
+    async def fetch(self, session, key):
+        try:
+            with stage('upstream'):
+                html = await self.fetch_html(session, key)
+            return self.cause_list_result(key, html)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return {"success": False, "message": str(e) or type(e).__name__}
+
+    async def stream(self, keys, session=None):
+        """Yield ``(key, result)`` pairs in completion order.
+
+        Keys are consumed lazily, so an arbitrarily long iterable only ever
+        holds ``concurrency`` keys in memory. Closing the generator or
+        cancelling the consuming task cancels all outstanding fetches.
+        """
+        own_session = session is None
+        if own_session:
+            session = self.session()
+        keys = iter(keys)
+        pending = {}
+        try:
+            while True:
+                for key in keys:
+                    pending[asyncio.ensure_future(self.fetch(session, key))] = key
+                    if len(pending) >= self.concurrency:
+                        break
+                if not pending:
+                    return
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            if own_session:
+                await session.close()
+
+
+async def fetch_cause_lists(keys, **options):
+    async for key, result in CauseListEngine(**options).stream(keys):
+        yield key, result
+
+
+def _date_range(start, days):
+    return [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch cause lists for every court in a district as NDJSON.")
+    parser.add_argument('--state', required=True)
+    parser.add_argument('--district', required=True)
+    parser.add_argument('--complex', help="limit to one court complex")
+    parser.add_argument('--from', dest='start', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        default=date.today() + timedelta(days=1), help="first date, YYYY-MM-DD (default: tomorrow)")
+    parser.add_argument('--days', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=float(os.environ.get('ECOURTS_RATE_LIMIT', 5.0)))
+    parser.add_argument('--base-url', default=os.environ.get('ECOURTS_BASE_URL', DEFAULT_BASE_URL))
+    parser.add_argument('--output', '-o', help="write NDJSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    keys = list(district_keys(CourtDirectory(), args.state, args.district,
+                              _date_range(args.start, args.days), args.complex))
+    engine = CauseListEngine(base_url=args.base_url, concurrency=args.concurrency, rate=args.rate)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+
+    async def run():
+        failures = 0
+        async for key, result in engine.stream(keys):
+            failures += not result['success']
+            out.write(json.dumps({"key": key.to_dict(), **result}, ensure_ascii=False, default=json_default) + '\n')
+            out.flush()
+        return failures
+
+    try:
+        failures = asyncio.run(run())
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{len(keys) - failures}/{len(keys)} cause lists fetched", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""Cause-list snapshots, row-level diffs and an append-only change feed.
+
+For each (court, date) the store keeps the content hash and the rows of the
+last fetch. When a new fetch hashes differently it is diffed against the
+previous rows and the diff is appended to the ``changes`` table:
+
+    added / removed     rows that appeared or disappeared
+    moved               same case, new serial number
+    purpose_changed     same case, new purpose
+    updated             same case, other fields changed (parties, court room)
+
+Rows are matched by CNR when the page links one, else by normalised case
+number. The first fetch of a list is recorded with every row under
+``added``, so a consumer that starts from ``since=0`` can rebuild each list
+from the feed alone. ``seq`` is the feed position: clients remember the last
+one they processed and ask for anything after it.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime
+
+from bulk_search import COURT_FIELDS, case_number_key
+from cache import parse_date
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'causelist_store.db')
+
+ROW_FIELDS = ('serial_no', 'case_number', 'parties', 'purpose', 'court_room', 'cnr')
+RETENTION = 30 * 24 * 3600
+PRUNE_EVERY = 500
+MAX_FEED_PAGE = 500
+POLL_INTERVAL = 1.0
+
+
+def _pack(value):
+    return zlib.compress(json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+def content_hash(rows):
+    return hashlib.sha256(json.dumps(rows, separators=(',', ':'), ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _keyed(rows):
+    keyed = {}
+    seen = defaultdict(int)
+    for row in rows:
+        identity = row[5] or case_number_key(row[1])
+        keyed[(identity, seen[identity])] = row
+        seen[identity] += 1
+    return keyed
+
+
+def _row_dict(row):
+    return dict(zip(ROW_FIELDS, row))
+
+
+def diff_rows(old, new):
+    """Row-level diff between two lists of ROW_FIELDS rows."""
+    old_keyed, new_keyed = _keyed(old), _keyed(new)
+    diff = {'added': [], 'removed': [], 'moved': [], 'purpose_changed': [], 'updated': []}
+    for key, row in new_keyed.items():
+        before = old_keyed.get(key)
+        if before is None:
+            diff['added'].append(_row_dict(row))
+            continue
+        ref = {'case_number': row[1], 'cnr': row[5]}
+        if before[0] != row[0]:
+            diff['moved'].append({**ref, 'from': before[0], 'to': row[0]})
+        if before[3] != row[3]:
+            diff['purpose_changed'].append({**ref, 'from': before[3], 'to': row[3]})
+        fields = {name: [before[i], row[i]] for i, name in ((1, 'case_number'), (2, 'parties'), (4, 'court_room'))
+                  if before[i] != row[i]}
+        if fields:
+            diff['updated'].append({**ref, 'fields': fields})
+    diff['removed'] = [_row_dict(row) for key, row in old_keyed.items() if key not in new_keyed]
+    return diff
+
+
+class CauseListStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._inserts = 0
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript('''
+            CREATE TABLE IF NOT EXISTS snapshots (
+                court TEXT NOT NULL,
+                date TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                rows BLOB NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (court, date)
+            );
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                court TEXT NOT NULL,
+                date TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                previous_hash TEXT,
+                diff BLOB NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS changes_created ON changes (created_at);
+        ''')
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get('CAUSE_LIST_STORE_PATH', DEFAULT_PATH))
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection; the next use opens a new one."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Writing --------------------------------------------------------------
+
+    def record(self, key, cases):
+        """Store one fetch of ``key`` (a ``CauseListKey``); return the change event, or None if unchanged."""
+        day = parse_date(key.date)
+        if day is None:
+            return None
+        court = '/'.join(str(part) for part in key[:4])
+        day = day.isoformat()
+        rows = [[getattr(entry, field) for field in ROW_FIELDS] for entry in cases]
+        digest = content_hash(rows)
+        now = time.time()
+
+        conn = self._connect()
+        with self._write_lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                previous = conn.execute('SELECT hash, rows FROM snapshots WHERE court = ? AND date = ?',
+                                        (court, day)).fetchone()
+                if previous is not None and previous[0] == digest:
+                    conn.execute('UPDATE snapshots SET fetched_at = ? WHERE court = ? AND date = ?',
+                                 (now, court, day))
+                    conn.execute('COMMIT')
+                    return None
+                diff = diff_rows(_unpack(previous[1]) if previous else [], rows)
+                conn.execute('INSERT OR REPLACE INTO snapshots (court, date, hash, rows, fetched_at) '
+                             'VALUES (?, ?, ?, ?, ?)', (court, day, digest, _pack(rows), now))
+                seq = conn.execute(
+                    'INSERT INTO changes (court, date, hash, previous_hash, diff, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                    (court, day, digest, previous[0] if previous else None, _pack(diff), now)).lastrowid
+                self._inserts += 1
+                if self._inserts % PRUNE_EVERY == 0:
+                    conn.execute('DELETE FROM changes WHERE created_at < ?', (now - RETENTION,))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        with self._changed:
+            self._changed.notify_all()
+        return self._event(seq, court, day, digest, previous[0] if previous else None, diff, now)
+
+    # Reading --------------------------------------------------------------
+
+    @staticmethod
+    def _event(seq, court, day, digest, previous_hash, diff, created_at):
+        return {
+            "seq": seq,
+            "court": dict(zip(COURT_FIELDS, court.split('/'))),
+            "date": day,
+            "hash": digest,
+            "previous_hash": previous_hash,
+            "created_at": datetime.fromtimestamp(created_at).isoformat(),
+            **diff,
+        }
+
+    def snapshot_hash(self, court, date):
+        day = parse_date(date)
+        row = day and self._connect().execute(
+            'SELECT hash FROM snapshots WHERE court = ? AND date = ?',
+            ('/'.join(str(part) for part in court), day.isoformat())).fetchone()
+        return row[0] if row else None
+
+    def snapshot_partitions(self, start, end, since=0.0):
+        """Distinct ``(state_code, dist_code, date)`` with a snapshot dated start..end fetched after ``since``."""
+        partitions = set()
+        for court, day in self._connect().execute(
+                'SELECT court, date FROM snapshots WHERE date >= ? AND date <= ? AND fetched_at > ?',
+                (start.isoformat(), end.isoformat(), since)):
+            state_code, dist_code = court.split('/', 2)[:2]
+            partitions.add((state_code, dist_code, day))
+        return sorted(partitions, key=lambda p: (p[2], p[0], p[1]))
+
+    def iter_snapshots(self, state_code, dist_code, date):
+        """Yield ``(court key tuple, hash, rows, fetched_at)`` for every court of a district on ``date``."""
+        prefix = f'{state_code}/{dist_code}/'
+        for court, digest, rows, fetched_at in self._connect().execute(
+                'SELECT court, hash, rows, fetched_at FROM snapshots WHERE date = ? AND court >= ? AND court < ? '
+                'ORDER BY court', (date, prefix, prefix[:-1] + '0')):
+            yield tuple(court.split('/')), digest, _unpack(rows), fetched_at
+
+    def latest_seq(self):
+        return self._connect().execute('SELECT COALESCE(MAX(seq), 0) FROM changes').fetchone()[0]
+
+    def changes(self, since=0, limit=100, state_code=None):
+        """Change events with ``seq > since``, oldest first."""
+        sql = 'SELECT seq, court, date, hash, previous_hash, diff, created_at FROM changes WHERE seq > ?'
+        params = [int(since)]
+        if state_code:
+            sql += ' AND court >= ? AND court < ?'
+            params.extend((f'{state_code}/', f'{state_code}0'))
+        sql += ' ORDER BY seq LIMIT ?'
+        params.append(max(1, min(int(limit), MAX_FEED_PAGE)))
+        return [self._event(seq, court, day, digest, previous_hash, _unpack(diff), created_at)
+                for seq, court, day, digest, previous_hash, diff, created_at
+                in self._connect().execute(sql, params)]
+
+    def wait_for_changes(self, since=0, timeout=25.0, limit=100, state_code=None):
+        """Long-poll: return as soon as there are events after ``since``, or [] after ``timeout``.
+
+        Writes from this process wake waiters immediately; writes from other
+        worker processes are picked up by re-checking every POLL_INTERVAL.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.changes(since, limit, state_code)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            with self._changed:
+                self._changed.wait(min(remaining, POLL_INTERVAL))
@@ -0,0 +1,149 @@
+"""CNR (Case Number Record) parsing and validation.
+
+A CNR is 16 ASCII characters:
+
+    MH MB 01 002472 2021
+    |  |  |  |      `- filing year
+    |  |  |  `- case serial within the establishment
+    |  |  `- establishment (court complex) code
+    |  `- district code
+    `- state code
+
+``parse`` splits one CNR into those fields. ``is_valid`` checks one, and
+``invalid_indexes`` checks a whole batch. Nothing here uses a regex. The
+batch check joins each block of CNRs into one newline-separated bytes buffer
+and maps every byte to its character class with ``bytes.translate``. It then
+compares the result with ``AAAA999999999999`` and a newline, repeated, so
+the per-character work runs in C. Only the entries where the two differ are
+looked at one by one.
+
+A CNR is valid when it has the right shape and its year is 19xx or 20xx.
+Lower-case letters are accepted, and ``normalize`` upper-cases them.
+
+``CourtDirectory.locate_cnr`` maps the first six characters to the court
+complex (or the first four to the district) using a table built from the
+directory file.
+"""
+from collections import namedtuple
+
+CNR_LENGTH = 16
+PATTERN = b'AAAA999999999999'
+SEPARATOR = '\n'
+SEPARATOR_BYTE = b'\n'
+RECORD = CNR_LENGTH + 1
+BLOCK = 1024
+
+_BLOCK_PATTERN = (PATTERN + SEPARATOR_BYTE) * BLOCK
+
+CNR = namedtuple('CNR', 'state district establishment serial year')
+
+# Letters -> 'A', digits -> '9', the separator -> '\n', everything else -> '?'.
+_CLASSES = bytes(
+    ord('A') if chr(i).isascii() and chr(i).isalpha() else ord('9') if chr(i).isascii() and chr(i).isdigit()
+    else i if i == SEPARATOR_BYTE[0] else ord('?') for i in range(256)
+)
+# First year digit -> the second digit it must be followed by: 19xx or 20xx.
+_CENTURY = bytes(ord('9') if i == ord('1') else ord('0') if i == ord('2') else ord('?') for i in range(256))
+
+
+class InvalidCNR(ValueError):
+    pass
+
+
+def normalize(text):
+    return str(text).strip().upper()
+
+
+def _reason(cnr):
+    if not isinstance(cnr, str):
+        return "must be a string"
+    if len(cnr) != CNR_LENGTH:
+        return f"must be {CNR_LENGTH} characters, got {len(cnr)}"
+    if not cnr.isascii():
+        return "must be ASCII"
+    if not cnr[:4].isalpha():
+        return "must start with a 4-letter state and district code"
+    if not cnr[4:].isdigit():
+        return "must end with 12 digits"
+    if cnr[12:14] not in ('19', '20'):
+        return f"has an implausible year {cnr[12:]}"
+    return None
+
+
+def is_valid(cnr):
+    return (isinstance(cnr, str) and len(cnr) == CNR_LENGTH and cnr.isascii() and cnr[:4].isalpha()
+            and cnr[4:].isdigit() and cnr[12:14] in ('19', '20'))
+
+
+def parse(cnr):
+    """Split a CNR into its fields; raises ``InvalidCNR`` saying what is wrong."""
+    cnr = normalize(cnr)
+    reason = _reason(cnr)
+    if reason:
+        raise InvalidCNR(f"Invalid CNR {cnr!r}: {reason}")
+    return CNR(cnr[:2], cnr[2:4], cnr[4:6], cnr[6:12], int(cnr[12:]))
+
+
+def _mismatched_records(actual, expected, width):
+    """Yield the indexes of the ``width``-byte records where two equal-length byte strings differ."""
+    records = -(-len(actual) // width)
+    start = 0
+    while actual[start * width:] != expected[start * width:]:
+        lo, hi = start, records
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if actual[lo * width:mid * width] != expected[lo * width:mid * width]:
+                hi = mid
+            else:
+                lo = mid
+        yield lo
+        start = lo + 1
+
+
+def _invalid_in_block(block):
+    bad = []
+    start = 0
+    while start < len(block):
+        rest = block[start:] if start else block
+        count = len(rest)
+        size = RECORD * count - 1
+        try:
+            buf = SEPARATOR.join(rest).encode('ascii')
+        except (TypeError, UnicodeEncodeError):
+            buf = None
+        if buf is None or buf.count(SEPARATOR_BYTE) != count - 1:
+            bad.extend(start + n for n, cnr in enumerate(rest) if not is_valid(cnr))
+            break
+        head = buf[:size]
+        classes = head.translate(_CLASSES)
+        expected = (_BLOCK_PATTERN if count == BLOCK else (PATTERN + SEPARATOR_BYTE) * count)[:len(head)]
+        years, after = head[12::RECORD].translate(_CENTURY), head[13::RECORD]
+        if len(buf) == size and classes == expected and years == after:
+            break
+        # With no newline inside any entry, the first entry of the wrong length
+        # is always among the mismatches. Records after it no longer line up
+        # with the pattern, so the rest of the block is checked again from there.
+        last = count if len(buf) == size else count - 1
+        found = set()
+        for n in _mismatched_records(classes, expected, RECORD):
+            if n >= last or len(rest[n]) != CNR_LENGTH:
+                last = min(n, last)
+                break
+            found.add(n)
+        if last < count:
+            found.add(last)
+        for n in _mismatched_records(years[:len(after)], after, 1):
+            if n >= last:
+                break
+            found.add(n)
+        bad.extend(start + n for n in sorted(found))
+        start += last + 1
+    return bad
+
+
+def invalid_indexes(cnrs):
+    """Indexes of the entries of ``cnrs`` (a sequence of str) that are not valid CNRs."""
+    bad = []
+    for start in range(0, len(cnrs), BLOCK):
+        bad.extend(start + n for n in _invalid_in_block(cnrs[start:start + BLOCK]))
+    return bad
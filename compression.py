@@ -0,0 +1,200 @@
+"""Negotiated gzip / Brotli compression of API responses.
+
+    compressor = Compressor.from_env()
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, compressor)
+
+A response is compressed when the client accepts ``br`` or ``gzip``, its
+type is text-like (JSON, HTML, JS, CSS, SVG), it carries a Content-Length
+of at least COMPRESSION_MIN_SIZE bytes and it is not encoded already.
+Brotli is preferred when the ``brotli`` package is installed; without it
+only gzip is offered. Responses with no Content-Length (the NDJSON and
+server-sent-event streams) pass through untouched, so nothing waits on a
+buffer.
+
+Compressed responses get ``Vary: Accept-Encoding`` and their ETag is made
+weak, as nginx does, because the bytes differ from the identity encoding.
+Werkzeug compares If-None-Match weakly, so 304s keep working. Bodies with an
+ETag (the hierarchy payloads) are compressed once per ETag and encoding and
+then served from a small cache.
+
+``Compressor.encode`` does the same for the ASGI routes in asgi.py.
+``Compressor.stats`` reports how many bodies were compressed and the
+overall ratio.
+
+    COMPRESSION_ENABLED=0            turn it off
+    COMPRESSION_MIN_SIZE=1024        smaller bodies go out as they are
+    COMPRESSION_GZIP_LEVEL=6
+    COMPRESSION_BROTLI_QUALITY=5
+"""
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENABLED = os.environ.get('COMPRESSION_ENABLED', '1') != '0'
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CACHE_ENTRIES = 64
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+COMPRESSIBLE_TYPES = frozenset({
+    'application/json', 'application/javascript', 'application/x-ndjson', 'application/xml', 'image/svg+xml',
+})
+
+
+def negotiate(accept_encoding):
+    """The encoding to use for an Accept-Encoding header value, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.lower().split(','):
+        name, _, params = item.partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+    best = None
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (encoding, q)
+    return best[0] if best else None
+
+
+def compressible(content_type):
+    media_type = content_type.partition(';')[0].strip().lower()
+    return media_type.startswith('text/') or media_type in COMPRESSIBLE_TYPES
+
+
+def compress(body, encoding, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+    if encoding == 'br':
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, gzip_level, mtime=0)
+
+
+def weak_etag(etag):
+    return etag if etag.startswith('W/') else 'W/' + etag
+
+
+class Compressor:
+    def __init__(self, minimum_size=MIN_SIZE, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY,
+                 cache_entries=CACHE_ENTRIES):
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @classmethod
+    def from_env(cls):
+        env = os.environ
+        return cls(
+            minimum_size=int(env.get('COMPRESSION_MIN_SIZE', MIN_SIZE)),
+            gzip_level=int(env.get('COMPRESSION_GZIP_LEVEL', GZIP_LEVEL)),
+            brotli_quality=int(env.get('COMPRESSION_BROTLI_QUALITY', BROTLI_QUALITY)),
+        )
+
+    def wants(self, content_type, length, encoded):
+        """Whether a response like this is worth compressing (its Vary header depends on it)."""
+        return not encoded and length is not None and length >= self.minimum_size and compressible(content_type)
+
+    def compress(self, body, encoding, etag=None):
+        if etag is not None:
+            with self._lock:
+                cached = self._cache.get((etag, encoding))
+                if cached is not None:
+                    self._cache.move_to_end((etag, encoding))
+                    self.cache_hits += 1
+                    return cached
+        data = compress(body, encoding, self.gzip_level, self.brotli_quality)
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(data)
+            if etag is not None:
+                self._cache[(etag, encoding)] = data
+                if len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+        return data
+
+    def encode(self, body, headers, accept_encoding):
+        """``(body, headers)`` compressed for ``accept_encoding`` if worthwhile; ``headers`` is a list of str pairs."""
+        names = {name.lower(): value for name, value in headers}
+        if not self.wants(names.get('content-type', ''), len(body), 'content-encoding' in names):
+            return body, headers
+        headers = [(name, value) for name, value in headers if name.lower() != 'vary'] + [
+            ('Vary', ', '.join(filter(None, (names.get('vary'), 'Accept-Encoding'))))]
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            return body, headers
+        etag = names.get('etag')
+        body = self.compress(body, encoding, etag)
+        headers = [(name, weak_etag(value) if name.lower() == 'etag' else value)
+                   for name, value in headers if name.lower() != 'content-length']
+        headers += [('Content-Encoding', encoding), ('Content-Length', str(len(body)))]
+        return body, headers
+
+    def stats(self):
+        with self._lock:
+            return {
+                "encodings": list(ENCODINGS),
+                "compressed": self.compressed,
+                "cache_hits": self.cache_hits,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else 0.0,
+            }
+
+
+class CompressionMiddleware:
+    """WSGI middleware applying a ``Compressor`` to every response that has a Content-Length."""
+
+    def __init__(self, wsgi_app, compressor=None):
+        self.wsgi_app = wsgi_app
+        self.compressor = compressor or Compressor()
+
+    def __call__(self, environ, start_response):
+        captured = []
+
+        def capture(status, headers, exc_info=None):
+            names = {name.lower(): value for name, value in headers}
+            length = names.get('content-length')
+            if (status[:3] in ('200', '201') and environ.get('REQUEST_METHOD') != 'HEAD'
+                    and self.compressor.wants(names.get('content-type', ''),
+                                              int(length) if length and length.isdigit() else None,
+                                              'content-encoding' in names)):
+                captured[:] = [status, headers]
+                return self._no_write
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, capture)
+        if not captured:
+            return app_iter
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        status, headers = captured
+        body, headers = self.compressor.encode(body, headers, environ.get('HTTP_ACCEPT_ENCODING'))
+        start_response(status, headers)
+        return [body]
+
+    @staticmethod
+    def _no_write(data):
+        raise RuntimeError("CompressionMiddleware does not support the WSGI write() callable")
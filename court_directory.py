@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_VERSIONS = (1, 2)
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'court_directory.json')
+
+EMPTY = MappingProxyType({})
+
+
+class DirectorySnapshot:
+    """Immutable view of one version of the court directory file.
+
+    ``nodes`` maps a hierarchy key to the read-only ``{code: name}`` mapping
+    of its children: ``()`` -> states, ``(state,)`` -> districts,
+    ``(state, dist)`` -> complexes and ``(state, dist, complex)`` -> courts.
+
+    ``tree`` holds the same data in the compact nested form sent by
+    ``/api/hierarchy``: ``{state: [name, {dist: [name, {complex: [name,
+    {court: name}]}]}]}``, with default courts filled in.
+
+    ``cnr_codes`` maps CNR prefixes from the ``cnr_code`` fields (version 2)
+    to hierarchy keys: ``"MHMB01"`` -> ``(state, dist, complex)`` and
+    ``"MHMB"`` -> ``(state, dist)``.
+    """
+
+    __slots__ = ('version', 'mtime', 'nodes', 'default_courts', 'tree', 'cnr_codes', '_payloads')
+
+    def __init__(self, version, mtime, nodes, default_courts, tree, cnr_codes=EMPTY):
+        self.version = version
+        self.mtime = mtime
+        self.nodes = nodes
+        self.default_courts = default_courts
+        self.tree = tree
+        self.cnr_codes = cnr_codes
+        self._payloads = {}
+
+    def hierarchy_payload(self, state_code=None):
+        """Return ``(body, etag)`` for the whole tree or one state, or ``None``.
+
+        Payloads are encoded once per snapshot and reused afterwards.
+        """
+        payload = self._payloads.get(state_code)
+        if payload is None:
+            if state_code is None:
+                states = self.tree
+            elif state_code in self.tree:
+                states = {state_code: self.tree[state_code]}
+            else:
+                return None
+            body = json.dumps(
+                {'version': self.version, 'states': states},
+                ensure_ascii=False, separators=(',', ':'), sort_keys=True,
+            ).encode('utf-8')
+            payload = (body, hashlib.sha256(body).hexdigest()[:32])
+            self._payloads[state_code] = payload
+        return payload
+
+    @classmethod
+    def from_dict(cls, raw, mtime=0.0):
+        version = raw.get('version')
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported court directory version: {version!r}")
+
+        default_courts = MappingProxyType(dict(raw.get('default_courts', {})))
+        nodes = {}
+        tree = {}
+        states = {}
+        cnr_codes = {}
+
+        def add_cnr_code(prefix, key):
+            if prefix in cnr_codes:
+                raise ValueError(f"CNR code {prefix} is used by both {cnr_codes[prefix]} and {key}")
+            cnr_codes[prefix] = key
+
+        for state_code, state in raw.get('states', {}).items():
+            states[state_code] = state['name']
+            districts = {}
+            district_tree = {}
+            for dist_code, district in state.get('districts', {}).items():
+                districts[dist_code] = district['name']
+                district_prefix = None
+                if state.get('cnr_code') and district.get('cnr_code'):
+                    district_prefix = state['cnr_code'] + district['cnr_code']
+                    add_cnr_code(district_prefix, (state_code, dist_code))
+                complexes = {}
+                complex_tree = {}
+                for complex_code, complex_ in district.get('complexes', {}).items():
+                    complexes[complex_code] = complex_['name']
+                    if district_prefix and complex_.get('cnr_code'):
+                        add_cnr_code(district_prefix + complex_['cnr_code'], (state_code, dist_code, complex_code))
+                    courts = complex_.get('courts')
+                    if courts:
+                        courts = nodes[(state_code, dist_code, complex_code)] = MappingProxyType(dict(courts))
+                    else:
+                        courts = default_courts
+                    complex_tree[complex_code] = [complex_['name'], dict(courts)]
+                nodes[(state_code, dist_code)] = MappingProxyType(complexes)
+                district_tree[dist_code] = [district['name'], complex_tree]
+            nodes[(state_code,)] = MappingProxyType(districts)
+            tree[state_code] = [state['name'], district_tree]
+        nodes[()] = MappingProxyType(states)
+
+        return cls(version, mtime, nodes, default_courts, tree, MappingProxyType(cnr_codes))
+
+
+class CourtDirectory:
+    """State -> district -> complex -> court tree loaded once from disk.
+
+    Lookups return shared read-only mappings, so serving a dropdown never
+    allocates a new dict. The backing file is re-stat'ed at most every
+    ``check_interval`` seconds and swapped in atomically when it changes;
+    a broken file leaves the previous snapshot in place.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, check_interval=5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._next_check = time.monotonic() + check_interval
+        self._snapshot = self._load()
+
+    def _load(self):
+        mtime = os.stat(self.path).st_mtime
+        with open(self.path, encoding='utf-8') as fh:
+            raw = json.load(fh)
+        return DirectorySnapshot.from_dict(raw, mtime)
+
+    def reload(self):
+        with self._lock:
+            self._snapshot = self._load()
+            self._next_check = time.monotonic() + self.check_interval
+        return self._snapshot
+
+    def refresh_if_changed(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        with self._lock:
+            if now < self._next_check:
+                return False
+            self._next_check = now + self.check_interval
+            try:
+                if os.stat(self.path).st_mtime == self._snapshot.mtime:
+                    return False
+                self._snapshot = self._load()
+            except (OSError, ValueError, KeyError) as e:
+                logger.error("Keeping court directory v%s, reload failed: %s", self._snapshot.version, e)
+                return False
+        logger.info("Reloaded court directory v%s from %s", self._snapshot.version, self.path)
+        return True
+
+    @property
+    def snapshot(self):
+        self.refresh_if_changed()
+        return self._snapshot
+
+    def hierarchy(self, state_code=None):
+        return self.snapshot.hierarchy_payload(state_code)
+
+    def states(self):
+        return self.snapshot.nodes[()]
+
+    def districts(self, state_code):
+        return self.snapshot.nodes.get((state_code,), EMPTY)
+
+    def complexes(self, state_code, dist_code):
+        return self.snapshot.nodes.get((state_code, dist_code), EMPTY)
+
+    def courts(self, state_code, dist_code, complex_code):
+        snapshot = self.snapshot
+        return snapshot.nodes.get((state_code, dist_code, complex_code)) or snapshot.default_courts
+
+    def locate_cnr(self, cnr):
+        """Hierarchy key of the complex (or failing that, the district) a normalised CNR belongs to, or None."""
+        codes = self.snapshot.cnr_codes
+        return codes.get(cnr[:6]) or codes.get(cnr[:4])
+
+    def court_keys(self):
+        """Every (state, district, complex, court) code tuple in the directory."""
+        snapshot = self.snapshot
+        for state_code in snapshot.nodes[()]:
+            for dist_code in snapshot.nodes.get((state_code,), EMPTY):
+                for complex_code in snapshot.nodes.get((state_code, dist_code), EMPTY):
+                    courts = snapshot.nodes.get((state_code, dist_code, complex_code)) or snapshot.default_courts
+                    for court_code in courts:
+                        yield state_code, dist_code, complex_code, court_code
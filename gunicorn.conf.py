@@ -0,0 +1,54 @@
+"""Gunicorn settings for ``gunicorn -c gunicorn.conf.py wsgi:application``.
+
+Every value can be overridden from the environment (see README, "Production
+Serving"). Workers are threaded: most request time is spent waiting on the
+eCourts site.
+
+The change feed's long-polls and event streams hold a thread each for up to
+minutes, so with gthread workers at most half of each worker's threads may
+be held by them (CHANGES_MAX_HELD); further long-polls are answered at once
+and further streams get a 503 with Retry-After. Deployments with many feed
+clients should serve asgi.py with the uvicorn worker instead, where feed
+clients wait on the event loop and hold no thread.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# For the ASGI app (asgi.py) use GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+if worker_class == 'gthread':
+    # Read by app.py when preload_app imports it, after this file.
+    os.environ.setdefault('CHANGES_MAX_HELD', str(max(1, threads // 2)))
+
+# Import the app once in the master and fork workers from it (see wsgi.py).
+preload_app = True
+
+# A worker that stops heartbeating for ``timeout`` seconds is killed. On
+# SIGTERM / SIGHUP workers get ``graceful_timeout`` seconds to finish
+# in-flight requests; long-polls and streams end on their own within that.
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Keep idle client connections open for a few seconds so the browser (or a
+# load balancer) reuses them; set above the balancer's idle timeout if there is one.
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Recycle workers now and then to bound slow memory growth; the jitter keeps
+# them from all restarting at once.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # Every worker starts the background jobs; the pre-warm crawler itself
+    # only runs in whichever worker holds its lock file.
+    import wsgi
+    wsgi.post_fork()
@@ -0,0 +1,38 @@
+"""Shared Jinja environment for the HTML cause-list and case-details pages.
+
+Templates live in ``templates/`` and are compiled once at import; compiled
+bytecode is also kept on disk (``TEMPLATE_CACHE_DIR``, default a per-user
+temp directory) so new worker processes skip the parse as well. ``stream``
+renders through ``Template.generate()`` in small buffered chunks, so a large
+cause list is never held as a single HTML string.
+"""
+import os
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+from metrics import stage, timed_iter
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+TEMPLATE_NAMES = ('cause_list.html', 'case_details.html')
+STREAM_BUFFER = 64
+
+environment = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    bytecode_cache=FileSystemBytecodeCache(os.environ.get('TEMPLATE_CACHE_DIR') or None),
+    autoescape=select_autoescape(['html']),
+    auto_reload=False,
+)
+
+TEMPLATES = {name: environment.get_template(name) for name in TEMPLATE_NAMES}
+
+
+def stream(name, **context):
+    """Yield the rendered template as str chunks."""
+    template_stream = TEMPLATES[name].stream(**context)
+    template_stream.enable_buffering(STREAM_BUFFER)
+    return timed_iter('render', template_stream)
+
+
+def render(name, **context):
+    with stage('render'):
+        return TEMPLATES[name].render(**context)
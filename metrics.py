@@ -0,0 +1,372 @@
+"""In-process metrics in the Prometheus text format, plus stage timing and a slow-request profiler.
+
+    REQUESTS = REGISTRY.histogram('ecourts_http_request_seconds', 'Request latency', ('route', 'status'))
+    REQUESTS.observe(0.012, ('/api/courts', '200'))
+
+    with stage('parse'):
+        cases = parse_cause_list(html)
+
+Metrics are plain dicts of label tuples guarded by one lock per metric, so
+recording costs about a microsecond. ``Registry.collector`` adds values
+that are computed at scrape time from stats the app already keeps (cache
+hit counts, transport counters). Each process keeps its own registry: under
+gunicorn a scrape of ``/metrics`` reports the worker that served it.
+
+Set METRICS_ENABLED=0 to turn recording into no-ops.
+
+``SlowRequestProfiler`` samples the stacks of threads that are serving
+requests every PROFILE_INTERVAL_MS. When a request takes longer than
+PROFILE_SLOW_MS, it writes the samples to PROFILE_DIR as collapsed stacks
+(one ``frame;frame;frame count`` line per distinct stack). flamegraph.pl
+and speedscope read that format directly.
+"""
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+
+ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, self.labelnames, labels, value
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, labels=()):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, labels=(), amount=1):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        if not ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        names = self.labelnames + ('le',)
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield self.name + '_bucket', names, labels + (_number(bound),), cumulative
+            yield self.name + '_sum', self.labelnames, labels, total
+            yield self.name + '_count', self.labelnames, labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, func):
+        """Register ``func() -> iterable of (name, kind, help, labelnames, [(labels, value), ...])``."""
+        self._collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labelnames, labels, value in metric.samples():
+                lines.append(f'{name}{_labels(labelnames, labels)} {_number(value)}')
+        for collect in self._collectors:
+            for name, kind, documentation, labelnames, values in collect():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in values:
+                    lines.append(f'{name}{_labels(labelnames, labels)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGES = REGISTRY.histogram(
+    'ecourts_stage_seconds', 'Time spent in one stage of serving a request', ('stage',))
+REQUESTS = REGISTRY.histogram(
+    'ecourts_http_request_seconds', 'Request latency by route', ('route', 'method', 'status'))
+IN_FLIGHT = REGISTRY.gauge(
+    'ecourts_http_requests_in_flight', 'Requests currently being served')
+
+# Where the app leaves the matched URL rule for MetricsMiddleware.
+ROUTE_KEY = 'ecourts.route'
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('labels', 'started')
+
+    def __init__(self, name):
+        self.labels = (name,)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGES.observe(time.perf_counter() - self.started, self.labels)
+        return False
+
+
+def stage(name):
+    """Context manager that records its duration under ``ecourts_stage_seconds{stage=name}``."""
+    return _Stage(name) if ENABLED else _NULL_STAGE
+
+
+def timed_iter(name, iterable):
+    """Yield from ``iterable``, recording only the time spent producing items as stage ``name``."""
+    if not ENABLED:
+        yield from iterable
+        return
+    spent = 0.0
+    iterator = iter(iterable)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                spent += time.perf_counter() - started
+                return
+            spent += time.perf_counter() - started
+            yield item
+    finally:
+        STAGES.observe(spent, (name,))
+
+
+@contextmanager
+def track_request(route, method):
+    """Time one request into REQUESTS and count it in IN_FLIGHT; set ``.status`` on the yielded object."""
+    outcome = _Outcome()
+    if not ENABLED:
+        yield outcome
+        return
+    IN_FLIGHT.inc()
+    started = time.perf_counter()
+    try:
+        yield outcome
+    finally:
+        IN_FLIGHT.dec()
+        REQUESTS.observe(time.perf_counter() - started, (route, method, str(outcome.status)))
+
+
+class _Outcome:
+    __slots__ = ('status',)
+
+    def __init__(self):
+        self.status = 500
+
+
+class MetricsMiddleware:
+    """WSGI middleware that feeds REQUESTS, IN_FLIGHT and an optional ``SlowRequestProfiler``.
+
+    The app names the route by storing its matched URL rule under
+    ``environ[ROUTE_KEY]`` (app.py does it in a ``before_request`` hook);
+    requests that match no rule count as ``unmatched``. A request is timed
+    until the server closes its response body, so streamed responses count
+    the time spent streaming, not just the time to set them up.
+    """
+
+    def __init__(self, wsgi_app, profiler=None):
+        self.wsgi_app = wsgi_app
+        self.profiler = profiler
+
+    def __call__(self, environ, start_response):
+        status = ['500']
+
+        def capture_status(status_line, headers, exc_info=None):
+            status[0] = status_line[:3]
+            return start_response(status_line, headers, exc_info)
+
+        IN_FLIGHT.inc()
+        if self.profiler is not None:
+            self.profiler.start_request()
+        started = time.perf_counter()
+
+        def finish():
+            duration = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            route = environ.get(ROUTE_KEY, 'unmatched')
+            REQUESTS.observe(duration, (route, environ.get('REQUEST_METHOD', ''), status[0]))
+            if self.profiler is not None:
+                self.profiler.end_request(route, duration)
+
+        try:
+            app_iter = self.wsgi_app(environ, capture_status)
+        except BaseException:
+            finish()
+            raise
+        return _ClosingBody(app_iter, finish)
+
+
+class _ClosingBody:
+    """A response iterable that calls ``on_close`` once the server has closed it."""
+
+    def __init__(self, app_iter, on_close):
+        self.app_iter = app_iter
+        self.on_close = on_close
+
+    def __iter__(self):
+        return iter(self.app_iter)
+
+    def close(self):
+        try:
+            if hasattr(self.app_iter, 'close'):
+                self.app_iter.close()
+        finally:
+            self.on_close()
+
+
+class SlowRequestProfiler:
+    def __init__(self, directory, slow_ms=1000, interval_ms=5):
+        self.directory = directory
+        self.slow = slow_ms / 1000
+        self.interval = interval_ms / 1000
+        self.dumps = 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls):
+        slow_ms = os.environ.get('PROFILE_SLOW_MS')
+        if not slow_ms:
+            return None
+        return cls(os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                              'var', 'profiles')),
+                   slow_ms=float(slow_ms), interval_ms=float(os.environ.get('PROFILE_INTERVAL_MS', 5)))
+
+    def start_request(self):
+        with self._lock:
+            self._active[threading.get_ident()] = {}
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._sample, name='profiler', daemon=True)
+                self._thread.start()
+
+    def end_request(self, route, duration):
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+        if stacks and duration >= self.slow:
+            self._dump(route, duration, stacks)
+
+    def _sample(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, stacks in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                        frame = frame.f_back
+                    key = ';'.join(reversed(stack))
+                    stacks[key] = stacks.get(key, 0) + 1
+
+    def _dump(self, route, duration, stacks):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{int(duration * 1000)}ms-" \
+               f"{route.strip('/').replace('/', '_') or 'root'}-{threading.get_ident()}.folded"
+        with open(os.path.join(self.directory, name), 'w', encoding='utf-8') as fh:
+            for stack, count in sorted(stacks.items()):
+                fh.write(f'{stack} {count}\n')
+        self.dumps += 1
@@ -0,0 +1,185 @@
+"""Export cause-list history from the cause-list store to partitioned Parquet.
+
+    python parquet_export.py --from 2025-01-01 --to 2025-03-31 --output exports/cause_lists
+
+Every ingested cause list (``causelist_store.CauseListStore`` snapshots) is
+written as one row per case, in Hive-style partitions that Arrow, DuckDB,
+Spark and pandas all read as columns:
+
+    exports/cause_lists/state_code=26/dist_code=1/date=2025-01-07/part-0.parquet
+
+Court codes, purpose and court room are dictionary-encoded, so a column
+with a few hundred distinct values across millions of rows costs an index
+per row. Each court's snapshot becomes one Arrow record batch. Batches are
+flushed as a row group every ROW_GROUP_ROWS rows, so memory is bounded by one
+row group whatever the date range.
+
+Exports are incremental. ``_export_state.json`` in the output directory
+records when the last export started. The next run rewrites only the
+partitions that gained or changed a snapshot since then, replacing each file
+atomically. ``--full`` rewrites every partition in the range.
+
+pyarrow is optional, since only this export needs it:
+``pip install -r requirements-parquet.txt`` to use this module.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from causelist_store import ROW_FIELDS, CauseListStore
+
+ROW_GROUP_ROWS = 128 * 1024
+STATE_FILE = '_export_state.json'
+DICTIONARY_COLUMNS = ('complex_code', 'court_code', 'purpose', 'court_room')
+
+
+def _schema():
+    text = pa.string()
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('complex_code', dictionary),
+        ('court_code', dictionary),
+        ('serial_no', text),
+        ('case_number', text),
+        ('cnr', text),
+        ('parties', text),
+        ('purpose', dictionary),
+        ('court_room', dictionary),
+        ('snapshot_hash', text),
+        ('fetched_at', pa.timestamp('s')),
+    ])
+
+
+def _constant(value, length):
+    return pa.DictionaryArray.from_arrays(pa.array([0] * length, pa.int32()), pa.array([value], pa.string()))
+
+
+def snapshot_batch(schema, court, digest, rows, fetched_at):
+    """One Arrow record batch holding the cases of one court's cause list."""
+    columns = list(zip(*rows)) if rows else [()] * len(ROW_FIELDS)
+    values = dict(zip(ROW_FIELDS, columns))
+    length = len(rows)
+    return pa.record_batch([
+        _constant(court[2], length),
+        _constant(court[3], length),
+        pa.array(values['serial_no'], pa.string()),
+        pa.array(values['case_number'], pa.string()),
+        pa.array(values['cnr'], pa.string()),
+        pa.array(values['parties'], pa.string()),
+        pa.array(values['purpose'], pa.string()).dictionary_encode(),
+        pa.array(values['court_room'], pa.string()).dictionary_encode(),
+        pa.array([digest] * length, pa.string()),
+        pa.array([int(fetched_at)] * length, pa.timestamp('s')),
+    ], schema=schema)
+
+
+class ParquetExporter:
+    def __init__(self, store, output, row_group_rows=ROW_GROUP_ROWS):
+        if pa is None:
+            raise RuntimeError("Parquet export needs pyarrow: pip install -r requirements-parquet.txt")
+        self.store = store
+        self.output = output
+        self.row_group_rows = row_group_rows
+        self.schema = _schema()
+
+    def _state_path(self):
+        return os.path.join(self.output, STATE_FILE)
+
+    def last_export(self):
+        try:
+            with open(self._state_path(), encoding='utf-8') as fh:
+                return json.load(fh).get('started_at', 0.0)
+        except (OSError, ValueError):
+            return 0.0
+
+    def partition_path(self, state_code, dist_code, day):
+        return os.path.join(self.output, f'state_code={state_code}', f'dist_code={dist_code}', f'date={day}',
+                            'part-0.parquet')
+
+    def write_partition(self, state_code, dist_code, day):
+        """Rewrite one partition from the store; returns the number of rows written."""
+        path = self.partition_path(state_code, dist_code, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Dot-prefixed, so dataset readers skip it while it is being written.
+        tmp = os.path.join(os.path.dirname(path), '.part-0.parquet.tmp')
+        batches = []
+        pending = written = 0
+        with pq.ParquetWriter(tmp, self.schema, compression='zstd',
+                              use_dictionary=list(DICTIONARY_COLUMNS)) as writer:
+            for court, digest, rows, fetched_at in self.store.iter_snapshots(state_code, dist_code, day):
+                if not rows:
+                    continue
+                batches.append(snapshot_batch(self.schema, court, digest, rows, fetched_at))
+                pending += len(rows)
+                if pending >= self.row_group_rows:
+                    writer.write_table(pa.Table.from_batches(batches).unify_dictionaries())
+                    written += pending
+                    batches, pending = [], 0
+            if batches:
+                writer.write_table(pa.Table.from_batches(batches).unify_dictionaries())
+                written += pending
+        os.replace(tmp, path)
+        return written
+
+    def export(self, start, end, full=False, progress=None):
+        """Write every partition in start..end that changed since the last export (all of them if ``full``)."""
+        started_at = time.time()
+        since = 0.0 if full else self.last_export()
+        partitions = self.store.snapshot_partitions(start, end, since)
+        rows = 0
+        for n, partition in enumerate(partitions, 1):
+            rows += self.write_partition(*partition)
+            if progress:
+                progress(n, len(partitions), partition)
+        os.makedirs(self.output, exist_ok=True)
+        with open(self._state_path() + '.tmp', 'w', encoding='utf-8') as fh:
+            json.dump({'started_at': started_at, 'finished_at': time.time()}, fh)
+        os.replace(self._state_path() + '.tmp', self._state_path())
+        return {'partitions': len(partitions), 'rows': rows}
+
+
+def _day(text):
+    return datetime.strptime(text, '%Y-%m-%d').date()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored cause lists to partitioned Parquet.")
+    parser.add_argument('--from', dest='start', type=_day, default=date.today() - timedelta(days=30),
+                        help="first date, YYYY-MM-DD (default: 30 days ago)")
+    parser.add_argument('--to', dest='end', type=_day, default=date.today() + timedelta(days=1),
+                        help="last date, YYYY-MM-DD (default: tomorrow)")
+    parser.add_argument('--output', '-o', default=os.path.join('var', 'exports', 'cause_lists'))
+    parser.add_argument('--store', default=os.environ.get('CAUSE_LIST_STORE_PATH'),
+                        help="cause-list store database (default: CAUSE_LIST_STORE_PATH or var/causelist_store.db)")
+    parser.add_argument('--full', action='store_true', help="rewrite every partition in the range")
+    args = parser.parse_args(argv)
+
+    store = CauseListStore(args.store) if args.store else CauseListStore()
+    try:
+        exporter = ParquetExporter(store, args.output)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    def progress(n, total, partition):
+        print(f"[{n}/{total}] state {partition[0]} district {partition[1]} {partition[2]}", file=sys.stderr)
+
+    try:
+        result = exporter.export(args.start, args.end, args.full, progress)
+    except KeyboardInterrupt:
+        return 130
+    print(f"{result['rows']} rows in {result['partitions']} partitions written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""Parsers for eCourts cause-list and case-status pages.
+
+``parse_cause_list`` streams the page through lxml's ``iterparse`` and only
+falls back to BeautifulSoup when that finds no ``#causelist`` table, which
+is what badly broken markup usually looks like to the strict path.
+"""
+from collections import namedtuple
+from io import BytesIO
+
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+from records import CASE_FIELDS, CaseEntry
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+CAUSE_LIST_FIELDS = CASE_FIELDS
+CNR_LENGTH = 16
+
+CaseStatus = namedtuple('CaseStatus', (
+    'cnr', 'case_type', 'filing_number', 'filing_date', 'registration_number',
+    'first_hearing_date', 'next_hearing_date', 'stage', 'court', 'petitioner', 'respondent',
+))
+
+HEADER_FIELDS = (
+    ('sr', 'serial_no'),
+    ('serial', 'serial_no'),
+    ('case', 'case_number'),
+    ('part', 'parties'),
+    ('purpose', 'purpose'),
+    ('stage', 'purpose'),
+    ('court', 'court_room'),
+)
+
+CASE_STATUS_LABELS = (
+    ('cnr', 'cnr'),
+    ('case type', 'case_type'),
+    ('filing number', 'filing_number'),
+    ('filing date', 'filing_date'),
+    ('registration number', 'registration_number'),
+    ('first hearing', 'first_hearing_date'),
+    ('next hearing', 'next_hearing_date'),
+    ('decision date', 'next_hearing_date'),
+    ('case stage', 'stage'),
+    ('case status', 'stage'),
+    ('court number', 'court'),
+)
+
+
+class ParseError(Exception):
+    pass
+
+
+def _clean(text):
+    return ' '.join(text.split())
+
+
+def _column_fields(header_cells):
+    fields = []
+    for cell in header_cells:
+        label = cell.lower()
+        fields.append(next((field for prefix, field in HEADER_FIELDS if label.startswith(prefix)), None))
+    return fields
+
+
+def _make_row(fields, cells, cnr=''):
+    values = dict.fromkeys(CAUSE_LIST_FIELDS, '')
+    for field, cell in zip(fields, cells):
+        if field:
+            values[field] = cell
+    return CaseEntry(cnr=cnr, **values)
+
+
+def _onclick_cnr(onclick):
+    """CNR from a ``viewHistory('MHMB010024722021')`` style click handler, or ''."""
+    if not onclick:
+        return ''
+    for quote in ("'", '"'):
+        start = onclick.find(quote)
+        if start != -1:
+            end = onclick.find(quote, start + 1)
+            value = onclick[start + 1:end].strip().upper()
+            if len(value) == CNR_LENGTH and value.isalnum():
+                return value
+    return ''
+
+
+def _lxml_row_cnr(row):
+    for node in row.iter():
+        onclick = node.get('onclick')
+        if onclick:
+            return _onclick_cnr(onclick)
+    return ''
+
+
+def _text(elem):
+    return _clean(' '.join(elem.itertext()))
+
+
+def _as_bytes(page):
+    return page.encode('utf-8') if isinstance(page, str) else page
+
+
+def parse_cause_list_lxml(page):
+    """Streaming parser: rows are emitted and freed as soon as they close."""
+    fields = None
+    rows = []
+    depth = 0
+    found = False
+    context = etree.iterparse(BytesIO(_as_bytes(page)), events=('start', 'end'),
+                              tag=('table', 'tr'), html=True, encoding='utf-8')
+    for event, elem in context:
+        if elem.tag == 'table':
+            if event == 'start':
+                if depth or elem.get('id') == 'causelist':
+                    depth += 1
+                    found = True
+            elif depth:
+                depth -= 1
+            continue
+        if event != 'end':
+            continue
+        if depth == 1:
+            cells = [_text(cell) for cell in elem if cell.tag in ('td', 'th')]
+            if cells and elem[0].tag == 'th':
+                if fields is None:
+                    fields = _column_fields(cells)
+            elif cells:
+                rows.append(_make_row(fields or CAUSE_LIST_FIELDS, cells, _lxml_row_cnr(elem)))
+        if not depth:
+            continue
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    if not found:
+        raise ParseError('No #causelist table found')
+    return rows
+
+
+_ROWS_XPATH = etree.XPath('//table[@id="causelist"]/tr | //table[@id="causelist"]/*/tr')
+_CELLS_XPATH = etree.XPath('./th|./td')
+
+
+def parse_cause_list_xpath(page):
+    """Whole-document lxml parse with precompiled XPath extractors."""
+    tree = lxml_html.fromstring(_as_bytes(page))
+    rows = _ROWS_XPATH(tree)
+    if not rows and not tree.xpath('//table[@id="causelist"]'):
+        raise ParseError('No #causelist table found')
+    fields = None
+    cases = []
+    for row in rows:
+        cells = _CELLS_XPATH(row)
+        if not cells:
+            continue
+        texts = [_text(cell) for cell in cells]
+        if cells[0].tag == 'th':
+            if fields is None:
+                fields = _column_fields(texts)
+        else:
+            cases.append(_make_row(fields or CAUSE_LIST_FIELDS, texts, _lxml_row_cnr(row)))
+    return cases
+
+
+def parse_cause_list_selectolax(page):
+    if SelectolaxParser is None:
+        raise ParseError('selectolax is not installed')
+    tree = SelectolaxParser(page if isinstance(page, str) else page.decode('utf-8', 'replace'))
+    table = tree.css_first('table#causelist')
+    if table is None:
+        raise ParseError('No #causelist table found')
+    fields = None
+    cases = []
+    for row in table.css('tr'):
+        headers = row.css('th')
+        if headers:
+            if fields is None:
+                fields = _column_fields([_clean(th.text(separator=' ')) for th in headers])
+            continue
+        cells = [_clean(td.text(separator=' ')) for td in row.css('td')]
+        if cells:
+            link = row.css_first('[onclick]')
+            cnr = _onclick_cnr(link.attributes.get('onclick')) if link is not None else ''
+            cases.append(_make_row(fields or CAUSE_LIST_FIELDS, cells, cnr))
+    return cases
+
+
+def parse_cause_list_bs4(page):
+    """Forgiving fallback for markup the lxml paths cannot make sense of."""
+    soup = BeautifulSoup(page, 'lxml')
+    table = soup.find('table', id='causelist') or soup.find('table')
+    if table is None:
+        raise ParseError('No cause list table found')
+
+    rows = table.find_all('tr')
+    header = [_clean(th.get_text(' ')) for th in rows[0].find_all('th')] if rows else []
+    fields = _column_fields(header) if header else CAUSE_LIST_FIELDS
+
+    cases = []
+    for row in rows:
+        cells = row.find_all('td')
+        if cells:
+            link = row.find(onclick=True)
+            cnr = _onclick_cnr(link['onclick']) if link is not None else ''
+            cases.append(_make_row(fields, [_clean(cell.get_text(' ')) for cell in cells], cnr))
+    return cases
+
+
+CAUSE_LIST_BACKENDS = {
+    'lxml': parse_cause_list_lxml,
+    'xpath': parse_cause_list_xpath,
+    'selectolax': parse_cause_list_selectolax,
+    'bs4': parse_cause_list_bs4,
+}
+
+
+def is_captcha_page(page):
+    """True for the captcha form eCourts serves instead of results when a session is not (or no longer) valid."""
+    return b'id="captcha_image"' in _as_bytes(page)
+
+
+def parse_cause_list(page):
+    """Parse an eCourts cause-list page into ``CaseEntry`` records."""
+    try:
+        return parse_cause_list_lxml(page)
+    except (ParseError, etree.LxmlError):
+        return parse_cause_list_bs4(page)
+
+
+def parse_case_status(page):
+    """Parse an eCourts case-status page into a ``CaseStatus`` record."""
+    tree = lxml_html.fromstring(_as_bytes(page))
+    values = dict.fromkeys(CaseStatus._fields, '')
+    for row in tree.iter('tr'):
+        cells = [_text(cell) for cell in row if cell.tag in ('td', 'th')]
+        if len(cells) < 2:
+            continue
+        for i in range(0, len(cells) - 1, 2):
+            label = cells[i].lower().rstrip(' :')
+            field = next((field for prefix, field in CASE_STATUS_LABELS if label.startswith(prefix)), None)
+            if field and not values[field]:
+                values[field] = cells[i + 1]
+
+    for field, css_class in (('petitioner', 'Petitioner_Advocate_table'), ('respondent', 'Respondent_Advocate_table')):
+        node = tree.find_class(css_class)
+        if node:
+            values[field] = _text(node[0])
+
+    if not values['cnr'] and not values['case_type']:
+        raise ParseError('No case details found')
+    return CaseStatus(**values)
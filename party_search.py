@@ -0,0 +1,191 @@
+"""Full-text party-name search over every ingested cause list.
+
+Rows live in a SQLite ``listings`` table. Their party names are indexed in a
+contentless FTS5 table (``detail=none``: no positions, just postings).
+Each word is indexed twice: as itself, and as a ``0``-prefixed phonetic key
+that absorbs the usual transliteration variants of Indian names::
+
+    Lakshmi / Laxmi           -> 0lksm
+    Srinivasan / Shrinivasan  -> 0srnvsn
+    Mohammed / Muhammad / Mohd -> 0md
+
+``search`` pages with a rowid cursor (newest first), so every page costs the
+same however deep it is. The index is fed through the scraper's cause-list
+listeners; re-ingesting a (court, date) replaces its rows.
+"""
+import os
+import sqlite3
+import threading
+
+from case_index import party_tokens
+from cache import parse_date
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'party_search.db')
+
+MODES = ('phonetic', 'exact', 'prefix')
+MAX_PAGE_SIZE = 100
+
+_DIGRAPHS = (
+    ('ksh', 'ks'), ('x', 'ks'), ('ph', 'f'), ('sh', 's'), ('kh', 'k'), ('gh', 'g'), ('th', 't'),
+    ('dh', 'd'), ('bh', 'b'), ('ch', 'c'), ('jh', 'j'), ('ck', 'k'), ('ow', 'o'), ('q', 'k'),
+    ('z', 'j'), ('w', 'v'),
+)
+_VOWELS = frozenset('aeiouy')
+
+
+def phonetic_key(word):
+    """Consonant skeleton of a romanised name: digraphs folded, vowels and 'h' dropped, repeats collapsed."""
+    for digraph, replacement in _DIGRAPHS:
+        if digraph in word:
+            word = word.replace(digraph, replacement)
+    if not word:
+        return ''
+    key = ['a' if word[0] in _VOWELS else word[0]]
+    for ch in word[1:]:
+        if ch in _VOWELS or ch == 'h' or ch == key[-1]:
+            continue
+        key.append(ch)
+    return ''.join(key)
+
+
+def index_terms(parties):
+    words = party_tokens(parties)
+    return ' '.join(sorted(words | {'0' + phonetic_key(word) for word in words}))
+
+
+def match_query(text, mode='phonetic'):
+    """FTS5 MATCH expression requiring every word of ``text``; None if nothing is searchable."""
+    words = sorted(party_tokens(text))
+    if not words:
+        return None
+    if mode == 'exact':
+        terms = [f'"{word}"' for word in words]
+    elif mode == 'prefix':
+        terms = [f'"{word}"*' for word in words]
+    else:
+        terms = [f'("{word}" OR "0{phonetic_key(word)}")' for word in words]
+    return ' AND '.join(terms)
+
+
+class PartySearch:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS listings (
+                id INTEGER PRIMARY KEY,
+                court TEXT NOT NULL,
+                date TEXT NOT NULL,
+                serial_no TEXT,
+                case_number TEXT,
+                parties TEXT,
+                purpose TEXT,
+                court_room TEXT,
+                cnr TEXT
+            );
+            CREATE INDEX IF NOT EXISTS listings_court_date ON listings (court, date);
+            CREATE VIRTUAL TABLE IF NOT EXISTS party_fts USING fts5(terms, content='', detail=none, prefix='3 4 5');
+        ''')
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get('PARTY_SEARCH_PATH', DEFAULT_PATH))
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection; the next use opens a new one."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def ingest(self, key, cases):
+        """Replace the rows for one (court, date) cause list; ``key`` is a ``CauseListKey``."""
+        day = parse_date(key.date)
+        if day is None:
+            return False
+        court = '/'.join(str(part) for part in key[:4])
+        day = day.isoformat()
+        rows = [(entry.serial_no, entry.case_number, entry.parties, entry.purpose, entry.court_room, entry.cnr)
+                for entry in cases]
+        conn = self._connect()
+        with self._write_lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                old = conn.execute(
+                    'SELECT id, serial_no, case_number, parties, purpose, court_room, cnr FROM listings '
+                    'WHERE court = ? AND date = ? ORDER BY id', (court, day)).fetchall()
+                if [row[1:] for row in old] == rows:
+                    conn.execute('ROLLBACK')
+                    return False
+                if old:
+                    conn.executemany("INSERT INTO party_fts (party_fts, rowid, terms) VALUES ('delete', ?, ?)",
+                                     [(row[0], index_terms(row[3])) for row in old])
+                    conn.execute('DELETE FROM listings WHERE court = ? AND date = ?', (court, day))
+                first_id = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM listings').fetchone()[0]
+                conn.executemany(
+                    'INSERT INTO listings (id, court, date, serial_no, case_number, parties, purpose, court_room, cnr) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(first_id + i, court, day) + row for i, row in enumerate(rows)])
+                conn.executemany('INSERT INTO party_fts (rowid, terms) VALUES (?, ?)',
+                                 [(first_id + i, index_terms(row[2])) for i, row in enumerate(rows)])
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return True
+
+    def search(self, text, mode='phonetic', limit=20, cursor=None, date_from=None, date_to=None, state_code=None):
+        """Return ``(results, next_cursor)``, newest listings first."""
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        match = match_query(text, mode)
+        if match is None:
+            return [], None
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+        sql = ['SELECT l.id, l.court, l.date, l.serial_no, l.case_number, l.parties, l.purpose, l.court_room, l.cnr '
+               'FROM party_fts JOIN listings l ON l.id = party_fts.rowid WHERE party_fts MATCH ?']
+        params = [match]
+        if cursor:
+            sql.append('AND party_fts.rowid < ?')
+            params.append(int(cursor))
+        for column, op, value in (('date', '>=', parse_date(date_from)), ('date', '<=', parse_date(date_to))):
+            if value is not None:
+                sql.append(f'AND l.{column} {op} ?')
+                params.append(value.isoformat())
+        if state_code:
+            sql.append('AND l.court >= ? AND l.court < ?')
+            params.extend((f'{state_code}/', f'{state_code}0'))
+        sql.append('ORDER BY party_fts.rowid DESC LIMIT ?')
+        params.append(limit + 1)
+
+        rows = self._connect().execute(' '.join(sql), params).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        results = []
+        for row_id, court, day, serial_no, case_number, parties, purpose, court_room, cnr in rows:
+            state, dist, complex_, court_code = court.split('/')
+            results.append({
+                "court": {"state_code": state, "dist_code": dist, "complex_code": complex_, "court_code": court_code},
+                "date": day,
+                "serial_no": serial_no,
+                "case_number": case_number,
+                "parties": parties,
+                "purpose": purpose,
+                "court_room": court_room,
+                "cnr": cnr,
+            })
+        return results, (rows[-1][0] if more else None)
@@ -0,0 +1,774 @@
+"""Pure-Python PDF writer for the cause-list and case-details layouts.
+
+Both layouts are simple tables of text, which the PDF base-14 Helvetica
+fonts handle without embedding anything, so there is no need to start a
+wkhtmltopdf process per download. Documents are produced as a generator of
+byte chunks, one page at a time, so memory stays flat however long the
+cause list is. ``PDF_BACKEND=wkhtmltopdf`` switches the endpoints back to
+rendering the HTML templates (see ``html_renderer``) through pdfkit.
+
+Helvetica only covers cp1252. Runs of text outside it (party names in
+Devanagari, Tamil and the like) are drawn in TrueType fonts embedded as
+CIDFontType2 with a ToUnicode map, so the text stays searchable and can be
+copied. The fonts are those of UNICODE_FONTS that exist (or the
+PDF_UNICODE_FONT list), and each character is drawn in the first one whose
+cmap has it. A font is embedded only in documents that use it, cut down to
+the glyphs they use. Glyphs are placed one per character without OpenType
+shaping, which is right for most scripts but leaves Indic conjuncts
+unjoined. When a character is in none of the fonts, ``can_render`` tells
+the endpoints to use wkhtmltopdf for that document instead.
+"""
+import hashlib
+import logging
+import os
+import re
+import struct
+import tempfile
+import zlib
+
+import pdfkit
+
+logger = logging.getLogger(__name__)
+
+PDF_BACKEND = os.environ.get('PDF_BACKEND', 'native')
+
+PDFKIT_OPTIONS = {
+    'page-size': 'A4',
+    'margin-top': '0.75in',
+    'margin-right': '0.75in',
+    'margin-bottom': '0.75in',
+    'margin-left': '0.75in',
+    'encoding': "UTF-8",
+}
+
+UNICODE_FONTS = (
+    '/usr/share/fonts/truetype/noto/NotoSansDevanagari-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansBengali-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansGurmukhi-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansGujarati-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansOriya-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansTamil-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansTelugu-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansKannada-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSansMalayalam-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf',
+    '/usr/share/fonts/truetype/freefont/FreeSans.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans.ttf',
+)
+
+PAGE_WIDTH, PAGE_HEIGHT = 595.28, 841.89
+MARGIN = 54.0
+
+_HELVETICA = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_HELVETICA_BOLD = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+
+
+def _checksum(data):
+    data += b'\0' * (-len(data) % 4)
+    return sum(struct.unpack('>%dI' % (len(data) // 4), data)) & 0xffffffff
+
+
+def _sfnt(tables):
+    """A TrueType file made of ``tables`` (tag to bytes)."""
+    tags = sorted(tables)
+    power = 1 << (len(tags).bit_length() - 1)
+    header = struct.pack('>IHHHH', 0x00010000, len(tags), 16 * power, power.bit_length() - 1,
+                         16 * (len(tags) - power))
+    directory, body, offsets = [], [], {}
+    offset = 12 + 16 * len(tags)
+    for tag in tags:
+        data = tables[tag]
+        directory.append(struct.pack('>4sIII', tag.encode('latin-1'), _checksum(data), offset, len(data)))
+        offsets[tag] = offset
+        data += b'\0' * (-len(data) % 4)
+        body.append(data)
+        offset += len(data)
+    font = bytearray(header + b''.join(directory) + b''.join(body))
+    struct.pack_into('>I', font, offsets['head'] + 8, (0xb1b0afba - _checksum(bytes(font))) & 0xffffffff)
+    return bytes(font)
+
+
+class TrueTypeFont:
+    """The parts of a TrueType file a PDF needs: metrics, the cmap and the outlines to embed."""
+
+    # Tables a PDF reader uses to draw an embedded TrueType font; the rest are left out.
+    EMBEDDED_TABLES = ('head', 'hhea', 'maxp', 'hmtx', 'loca', 'glyf', 'cvt ', 'fpgm', 'prep')
+
+    def __init__(self, path):
+        with open(path, 'rb') as fh:
+            self.data = fh.read()
+        num_tables = struct.unpack_from('>H', self.data, 4)[0]
+        self.tables = {}
+        for n in range(num_tables):
+            tag, _, offset, length = struct.unpack_from('>4sIII', self.data, 12 + 16 * n)
+            self.tables[tag.decode('latin-1')] = (offset, length)
+        if 'glyf' not in self.tables or 'loca' not in self.tables:
+            raise ValueError("Font has no TrueType outlines")
+        head = self.tables['head'][0]
+        self.long_loca = struct.unpack_from('>h', self.data, head + 50)[0] == 1
+        self.units_per_em = struct.unpack_from('>H', self.data, head + 18)[0]
+        self.bbox = [self._scale(v) for v in struct.unpack_from('>hhhh', self.data, head + 36)]
+        hhea = self.tables['hhea'][0]
+        ascent, descent = struct.unpack_from('>hh', self.data, hhea + 4)
+        self.ascent, self.descent = self._scale(ascent), self._scale(descent)
+        self.cap_height = self.ascent
+        if 'OS/2' in self.tables:
+            os2, length = self.tables['OS/2']
+            if struct.unpack_from('>H', self.data, os2)[0] >= 2 and length >= 90:
+                self.cap_height = self._scale(struct.unpack_from('>h', self.data, os2 + 88)[0])
+        self.num_glyphs = struct.unpack_from('>H', self.data, self.tables['maxp'][0] + 4)[0]
+        num_metrics = struct.unpack_from('>H', self.data, hhea + 34)[0]
+        hmtx = self.tables['hmtx'][0]
+        advances = [struct.unpack_from('>H', self.data, hmtx + 4 * n)[0] for n in range(num_metrics)]
+        advances += advances[-1:] * (self.num_glyphs - num_metrics)
+        self.widths = [self._scale(advance) for advance in advances]
+        self.cmap = self._read_cmap()
+        self.name = self._postscript_name() or os.path.splitext(os.path.basename(path))[0]
+
+    def _scale(self, value):
+        return int(round(value * 1000 / self.units_per_em))
+
+    def _read_cmap(self):
+        cmap = self.tables['cmap'][0]
+        subtables = {}
+        for n in range(struct.unpack_from('>H', self.data, cmap + 2)[0]):
+            platform, encoding, offset = struct.unpack_from('>HHI', self.data, cmap + 4 + 8 * n)
+            subtables[(platform, encoding)] = cmap + offset
+        for key in ((3, 10), (0, 4), (0, 6), (3, 1), (0, 3)):
+            offset = subtables.get(key)
+            if offset is None:
+                continue
+            fmt = struct.unpack_from('>H', self.data, offset)[0]
+            if fmt == 12:
+                return self._cmap_format_12(offset)
+            if fmt == 4:
+                return self._cmap_format_4(offset)
+        raise ValueError("Font has no Unicode cmap in format 4 or 12")
+
+    def _cmap_format_4(self, offset):
+        segments = struct.unpack_from('>H', self.data, offset + 6)[0] // 2
+        ends = offset + 14
+        starts = ends + 2 * segments + 2
+        deltas = starts + 2 * segments
+        range_offsets = deltas + 2 * segments
+        cmap = {}
+        for n in range(segments):
+            end = struct.unpack_from('>H', self.data, ends + 2 * n)[0]
+            start = struct.unpack_from('>H', self.data, starts + 2 * n)[0]
+            delta = struct.unpack_from('>h', self.data, deltas + 2 * n)[0]
+            range_offset = struct.unpack_from('>H', self.data, range_offsets + 2 * n)[0]
+            for code in range(start, min(end, 0xfffe) + 1):
+                if range_offset:
+                    at = range_offsets + 2 * n + range_offset + 2 * (code - start)
+                    glyph = struct.unpack_from('>H', self.data, at)[0]
+                    glyph = (glyph + delta) & 0xffff if glyph else 0
+                else:
+                    glyph = (code + delta) & 0xffff
+                if glyph:
+                    cmap[chr(code)] = glyph
+        return cmap
+
+    def _cmap_format_12(self, offset):
+        cmap = {}
+        for n in range(struct.unpack_from('>I', self.data, offset + 12)[0]):
+            start, end, glyph = struct.unpack_from('>III', self.data, offset + 16 + 12 * n)
+            for code in range(start, min(end, 0x10ffff) + 1):
+                cmap[chr(code)] = glyph + code - start
+        return cmap
+
+    def _postscript_name(self):
+        if 'name' not in self.tables:
+            return None
+        table = self.tables['name'][0]
+        count, strings = struct.unpack_from('>HH', self.data, table + 2)
+        for n in range(count):
+            platform, _, _, name_id, length, offset = struct.unpack_from('>HHHHHH', self.data, table + 6 + 12 * n)
+            if name_id != 6:
+                continue
+            raw = self.data[table + strings + offset:table + strings + offset + length]
+            name = raw.decode('utf-16-be' if platform in (0, 3) else 'latin-1', 'ignore')
+            return ''.join(ch for ch in name if ch.isalnum() or ch in '-_') or None
+        return None
+
+    def width(self, ch):
+        return self.widths[self.cmap.get(ch, 0)]
+
+    def encode(self, text):
+        """``text`` as the hex string of its glyph ids, for an Identity-H font."""
+        return b'<' + b''.join(b'%04X' % self.cmap.get(ch, 0) for ch in text) + b'>'
+
+    def _table(self, tag):
+        offset, length = self.tables[tag]
+        return self.data[offset:offset + length]
+
+    def _outline(self, glyph):
+        loca, glyf = self.tables['loca'][0], self.tables['glyf'][0]
+        if self.long_loca:
+            start, end = struct.unpack_from('>II', self.data, loca + 4 * glyph)
+        else:
+            start, end = (2 * value for value in struct.unpack_from('>HH', self.data, loca + 2 * glyph))
+        return self.data[glyf + start:glyf + end]
+
+    @staticmethod
+    def _components(outline):
+        """Glyph ids a composite outline is built from (none for a simple one)."""
+        if len(outline) < 10 or struct.unpack_from('>h', outline)[0] >= 0:
+            return []
+        components, at = [], 10
+        while True:
+            flags, glyph = struct.unpack_from('>HH', outline, at)
+            components.append(glyph)
+            at += 8 if flags & 0x0001 else 6
+            at += 8 if flags & 0x0080 else 4 if flags & 0x0040 else 2 if flags & 0x0008 else 0
+            if not flags & 0x0020:
+                return components
+
+    def subset(self, glyphs):
+        """The font file cut down to ``glyphs``, with .notdef and the parts of any composites.
+
+        Glyph ids are kept, so the other glyphs are left empty rather than
+        removed and the content streams need no renumbering.
+        """
+        keep, pending = set(), [0] + [glyph for glyph in glyphs if glyph < self.num_glyphs]
+        while pending:
+            glyph = pending.pop()
+            if glyph not in keep:
+                keep.add(glyph)
+                pending.extend(self._components(self._outline(glyph)))
+        outlines, loca = [], [0]
+        for glyph in range(self.num_glyphs):
+            if glyph in keep:
+                outline = self._outline(glyph)
+                outlines.append(outline + b'\0' * (-len(outline) % 4))
+            loca.append(loca[-1] + len(outlines[-1]) if glyph in keep else loca[-1])
+        head = bytearray(self._table('head'))
+        struct.pack_into('>Ih', head, 8, 0, 0)
+        struct.pack_into('>h', head, 50, 1)
+        tables = {tag: self._table(tag) for tag in self.EMBEDDED_TABLES if tag in self.tables}
+        tables.update(head=bytes(head), loca=struct.pack('>%dI' % len(loca), *loca), glyf=b''.join(outlines))
+        return _sfnt(tables)
+
+    def objects(self, first_id, glyphs):
+        """Bodies of the Type0 font at ``first_id`` and the four objects after it that it refers to.
+
+        Only ``glyphs`` are embedded, described in the widths and mapped back
+        to text.
+        """
+        glyphs = sorted(glyph for glyph in set(glyphs) if glyph < self.num_glyphs)
+        widths = b' '.join(b'%d [%d]' % (glyph, self.widths[glyph]) for glyph in glyphs)
+        data = self.subset(glyphs)
+        font_file = zlib.compress(data, 6)
+        to_unicode = zlib.compress(self._to_unicode(glyphs), 6)
+        digest = hashlib.sha1(repr(glyphs).encode()).digest()
+        name = bytes(65 + byte % 26 for byte in digest[:6]) + b'+' + self.name.encode('ascii')
+        return [
+            b'<< /Type /Font /Subtype /Type0 /BaseFont /%s /Encoding /Identity-H /DescendantFonts [%d 0 R] '
+            b'/ToUnicode %d 0 R >>' % (name, first_id + 1, first_id + 4),
+            b'<< /Type /Font /Subtype /CIDFontType2 /BaseFont /%s '
+            b'/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> '
+            b'/FontDescriptor %d 0 R /CIDToGIDMap /Identity /W [%s] >>' % (name, first_id + 2, widths),
+            b'<< /Type /FontDescriptor /FontName /%s /Flags 32 /FontBBox [%d %d %d %d] /ItalicAngle 0 '
+            b'/Ascent %d /Descent %d /CapHeight %d /StemV 80 /FontFile2 %d 0 R >>'
+            % ((name,) + tuple(self.bbox) + (self.ascent, self.descent, self.cap_height, first_id + 3)),
+            b'<< /Length %d /Length1 %d /Filter /FlateDecode >>\nstream\n%s\nendstream'
+            % (len(font_file), len(data), font_file),
+            b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(to_unicode), to_unicode),
+        ]
+
+    def _to_unicode(self, used):
+        glyphs = {}
+        for ch, glyph in sorted(self.cmap.items()):
+            glyphs.setdefault(glyph, ch)
+        glyphs = {glyph: glyphs[glyph] for glyph in used if glyph in glyphs}
+        lines = [b'/CIDInit /ProcSet findresource begin 12 dict begin begincmap',
+                 b'/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def',
+                 b'/CMapName /Adobe-Identity-UCS def /CMapType 2 def',
+                 b'1 begincodespacerange <0000> <FFFF> endcodespacerange']
+        items = [(glyph, ch) for glyph, ch in sorted(glyphs.items()) if glyph <= 0xffff]
+        for n in range(0, len(items), 100):
+            block = items[n:n + 100]
+            lines.append(b'%d beginbfchar' % len(block))
+            lines.extend(b'<%04X> <%s>' % (glyph, ch.encode('utf-16-be').hex().upper().encode())
+                         for glyph, ch in block)
+            lines.append(b'endbfchar')
+        lines.append(b'endcmap CMapName currentdict /CMap defineresource pop end end')
+        return b'\n'.join(lines)
+
+
+_unicode_fonts = []
+_font_for = {}
+
+
+def unicode_fonts():
+    """The TrueType fonts for text outside cp1252, in order of preference, loaded on first use.
+
+    PDF_UNICODE_FONT, a list of paths separated like PATH, replaces UNICODE_FONTS.
+    """
+    if not _unicode_fonts:
+        paths = os.environ.get('PDF_UNICODE_FONT')
+        fonts = []
+        for path in filter(os.path.exists, paths.split(os.pathsep) if paths else UNICODE_FONTS):
+            try:
+                fonts.append(TrueTypeFont(path))
+            except (ValueError, KeyError, struct.error) as exc:
+                logger.warning("Skipping font %s: %s", path, exc)
+        _unicode_fonts.append(fonts)
+    return _unicode_fonts[0]
+
+
+def font_for(ch):
+    """Index in ``unicode_fonts()`` of the first font with a glyph for ``ch``; None when none has one."""
+    try:
+        return _font_for[ch]
+    except KeyError:
+        index = _font_for[ch] = next((n for n, font in enumerate(unicode_fonts()) if ch in font.cmap), None)
+        return index
+
+
+def _cp1252(text):
+    try:
+        text.encode('cp1252')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _covered(text):
+    return _cp1252(text) or all(_cp1252(ch) or font_for(ch) is not None for ch in text)
+
+
+def can_render(texts):
+    """Whether the native writer has a glyph, in Helvetica or a Unicode font, for every character in ``texts``."""
+    return all(_covered(str(text)) for text in texts)
+
+
+class _Widths(dict):
+    """Glyph widths keyed by character.
+
+    Non-ASCII characters get 556, except those outside cp1252, which are
+    drawn in (and measured with) the first Unicode font that has them.
+    """
+
+    def __init__(self, table):
+        super().__init__((chr(32 + i), width) for i, width in enumerate(table))
+
+    def __missing__(self, ch):
+        index = None if _cp1252(ch) else font_for(ch)
+        width = unicode_fonts()[index].width(ch) if index is not None else 556
+        self[ch] = width
+        return width
+
+
+FONTS = {'F1': ('Helvetica', _Widths(_HELVETICA)), 'F2': ('Helvetica-Bold', _Widths(_HELVETICA_BOLD))}
+
+
+def text_width(text, font, size):
+    return sum(map(FONTS[font][1].__getitem__, text)) * size / 1000.0
+
+
+def wrap(text, font, size, width):
+    """Greedy word wrap; words wider than the column are split by character."""
+    widths = FONTS[font][1]
+    limit = width * 1000.0 / size
+    space = widths[' ']
+    lines = []
+    line, line_width = '', 0
+    for word in str(text).split():
+        word_width = sum(map(widths.__getitem__, word))
+        if line and line_width + space + word_width <= limit:
+            line, line_width = f'{line} {word}', line_width + space + word_width
+            continue
+        if not line and word_width <= limit:
+            line, line_width = word, word_width
+            continue
+        if line:
+            lines.append(line)
+        while word_width > limit and len(word) > 1:
+            cut = len(word) - 1
+            while cut > 1 and sum(map(widths.__getitem__, word[:cut])) > limit:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+            word_width = sum(map(widths.__getitem__, word))
+        line, line_width = word, word_width
+    lines.append(line)
+    return lines
+
+
+def _pdf_string(text):
+    data = text.encode('cp1252', 'replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _text_string(text):
+    """A PDF text string (bookmark titles): cp1252 if it fits, else UTF-16 with a byte-order mark."""
+    if _cp1252(text):
+        return _pdf_string(text)
+    return b'<FEFF' + text.encode('utf-16-be').hex().upper().encode() + b'>'
+
+
+def _runs(text):
+    """Split ``text`` into ``(font index, run)`` pieces.
+
+    The index is into ``unicode_fonts()``, or None for Helvetica, which
+    also gets the characters no font has.
+    """
+    runs = []
+    for ch in text:
+        index = None if _cp1252(ch) else font_for(ch)
+        if runs and runs[-1][0] == index:
+            runs[-1][1].append(ch)
+        else:
+            runs.append((index, [ch]))
+    return [(index, ''.join(chars)) for index, chars in runs]
+
+
+_UNICODE_SHOW = re.compile(rb'/U([0-9]+) [0-9.]+ Tf <([0-9A-F]*)> Tj')
+
+
+class PdfDocument:
+    """Minimal streaming PDF writer.
+
+    Object 1 is the catalog and object 2 the page tree; both are written
+    last, once every page id is known. ``header()``, ``end_page()`` and
+    ``trailer()`` each return the bytes for their part of the file, so a
+    finished page can be sent before the next one is drawn. A Unicode
+    font's ids are taken by the first page that uses it, and its objects,
+    holding the glyphs the document used, are written with the trailer.
+    """
+
+    def __init__(self, compress=True):
+        self.compress = compress
+        self.offset = 0
+        self.offsets = {}
+        self.next_id = 5
+        self.page_ids = []
+        self.ops = []
+        self.outline_id = None
+        self.unicode_font_ids = {}
+        self.glyphs = {}
+        self.page_fonts = set()
+
+    def _object(self, obj_id, body):
+        self.offsets[obj_id] = self.offset
+        data = b'%d 0 obj\n' % obj_id + body + b'\nendobj\n'
+        self.offset += len(data)
+        return data
+
+    def header(self):
+        data = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+        self.offset += len(data)
+        fonts = b''.join(
+            self._object(obj_id, b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>'
+                         % name.encode())
+            for obj_id, (name, _) in zip((3, 4), FONTS.values())
+        )
+        return data + fonts
+
+    # Drawing operations on the current page ---------------------------------
+
+    def text(self, x, y, text, font='F1', size=10, gray=0.0):
+        if _cp1252(text) or not unicode_fonts():
+            self.ops.append(b'BT %.3f g /%s %.1f Tf %.2f %.2f Td %s Tj ET'
+                            % (gray, font.encode(), size, x, y, _pdf_string(text)))
+            return
+        shows = []
+        for index, run in _runs(text):
+            if index is None:
+                shows.append(b'/%s %.1f Tf %s Tj' % (font.encode(), size, _pdf_string(run)))
+                continue
+            unicode = unicode_fonts()[index]
+            self.page_fonts.add(index)
+            self.glyphs.setdefault(index, set()).update(map(unicode.cmap.__getitem__, run))
+            shows.append(b'/U%d %.1f Tf %s Tj' % (index + 1, size, unicode.encode(run)))
+        self.ops.append(b'BT %.3f g %.2f %.2f Td %s ET' % (gray, x, y, b' '.join(shows)))
+
+    def centered_text(self, y, text, font='F1', size=10, gray=0.0):
+        self.text((PAGE_WIDTH - text_width(text, font, size)) / 2, y, text, font, size, gray)
+
+    def rect(self, x, y, w, h, fill=None, stroke=None, line_width=0.5):
+        ops = []
+        if fill is not None:
+            ops.append(b'%.3f %.3f %.3f rg' % fill)
+        if stroke is not None:
+            ops.append(b'%.3f %.3f %.3f RG %.2f w' % (stroke + (line_width,)))
+        paint = b'B' if fill is not None and stroke is not None else b'f' if fill is not None else b'S'
+        ops.append(b'%.2f %.2f %.2f %.2f re %s' % (x, y, w, h, paint))
+        self.ops.append(b' '.join(ops))
+
+    def line(self, x1, y1, x2, y2, gray=0.2, line_width=1.0):
+        self.ops.append(b'%.3f G %.2f w %.2f %.2f m %.2f %.2f l S' % (gray, line_width, x1, y1, x2, y2))
+
+    def page_content(self):
+        """Finish the current page and return its content stream, compressed if ``compress``."""
+        content = b'\n'.join(self.ops)
+        self.ops = []
+        return zlib.compress(content, 3) if self.compress else content
+
+    def _scan(self, content):
+        """The Unicode fonts drawn with in another document's content, noting the glyphs it uses."""
+        fonts = set()
+        for match in _UNICODE_SHOW.finditer(zlib.decompress(content) if self.compress else content):
+            index = int(match[1]) - 1
+            if index < len(unicode_fonts()):
+                fonts.add(index)
+                self.glyphs.setdefault(index, set()).update(
+                    int(match[2][at:at + 4], 16) for at in range(0, len(match[2]), 4))
+        return fonts
+
+    def page(self, content, fonts=None):
+        """Bytes for one page object around a content stream from ``page_content``.
+
+        ``fonts`` are the indexes of the Unicode fonts the content draws
+        with; None (content from another document) means look for them.
+        """
+        for index in sorted(self._scan(content) if fonts is None else fonts):
+            if index not in self.unicode_font_ids:
+                self.unicode_font_ids[index] = self.next_id
+                self.next_id += 5
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        fonts = b' '.join([b'/F1 3 0 R /F2 4 0 R'] + [b'/U%d %d 0 R' % (index + 1, font_id)
+                                                       for index, font_id in self.unicode_font_ids.items()])
+        self.page_ids.append(page_id)
+        if self.compress:
+            stream = b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content)
+        else:
+            stream = b'<< /Length %d >>\nstream\n' % len(content)
+        return self._object(content_id, stream + content + b'\nendstream') + self._object(
+            page_id,
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Contents %d 0 R '
+            b'/Resources << /Font << %s >> >> >>' % (PAGE_WIDTH, PAGE_HEIGHT, content_id, fonts)
+        )
+
+    def end_page(self):
+        fonts, self.page_fonts = self.page_fonts, set()
+        return self.page(self.page_content(), fonts)
+
+    def outline(self, entries):
+        """Bytes for a flat bookmark tree over ``(title, page id)`` pairs; sets the catalog's /Outlines."""
+        if not entries:
+            return b''
+        root = self.next_id
+        first = root + 1
+        last = root + len(entries)
+        self.next_id = last + 1
+        self.outline_id = root
+        data = self._object(root, b'<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>'
+                            % (first, last, len(entries)))
+        for n, (title, page_id) in enumerate(entries):
+            obj_id = first + n
+            links = b''.join((b' /Prev %d 0 R' % (obj_id - 1) if obj_id > first else b'',
+                              b' /Next %d 0 R' % (obj_id + 1) if obj_id < last else b''))
+            data += self._object(obj_id, b'<< /Title %s /Parent %d 0 R%s /Dest [%d 0 R /XYZ null null null] >>'
+                                 % (_text_string(title), root, links, page_id))
+        return data
+
+    def trailer(self):
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self.page_ids)
+        data = b''
+        for index, font_id in self.unicode_font_ids.items():
+            for n, body in enumerate(unicode_fonts()[index].objects(font_id, self.glyphs[index])):
+                data += self._object(font_id + n, body)
+        data += self._object(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(self.page_ids)))
+        outlines = b' /Outlines %d 0 R /PageMode /UseOutlines' % self.outline_id if self.outline_id else b''
+        data += self._object(1, b'<< /Type /Catalog /Pages 2 0 R%s >>' % outlines)
+        xref_offset = self.offset
+        size = self.next_id
+        xref = [b'xref\n0 %d\n' % size, b'0000000000 65535 f \n']
+        for obj_id in range(1, size):
+            xref.append(b'%010d 00000 n \n' % self.offsets[obj_id])
+        xref.append(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, xref_offset))
+        return data + b''.join(xref)
+
+
+CAUSE_LIST_COLUMNS = (
+    ('Serial No', 'serial_no', 50.0),
+    ('Case Number', 'case_number', 95.0),
+    ('Parties', 'parties', None),
+    ('Purpose', 'purpose', 80.0),
+    ('Court Room', 'court_room', 85.0),
+)
+TABLE_FONT_SIZE = 9.0
+LINE_HEIGHT = 11.0
+CELL_PADDING = 4.0
+BORDER = (0.867, 0.867, 0.867)
+HEADER_FILL = (0.949, 0.949, 0.949)
+
+
+def _column_widths():
+    fixed = sum(width for _, _, width in CAUSE_LIST_COLUMNS if width)
+    flexible = PAGE_WIDTH - 2 * MARGIN - fixed
+    return [width or flexible for _, _, width in CAUSE_LIST_COLUMNS]
+
+
+def _value(case, field):
+    return getattr(case, field) if not isinstance(case, dict) else case.get(field, '')
+
+
+def cause_list_texts(cases):
+    """Every cell ``cause_list_pdf`` would draw for ``cases``, for ``can_render``."""
+    fields = [field for _, field, _ in CAUSE_LIST_COLUMNS]
+    return (str(_value(case, field)) for case in cases for field in fields)
+
+
+def _wrap_row(cells, widths, font):
+    wrapped = [wrap(text, font, TABLE_FONT_SIZE, width - 2 * CELL_PADDING) for text, width in zip(cells, widths)]
+    return wrapped, max(len(lines) for lines in wrapped) * LINE_HEIGHT + 2 * CELL_PADDING
+
+
+def _draw_row(doc, y, wrapped, height, widths, font, fill=None):
+    x = MARGIN
+    for lines, width in zip(wrapped, widths):
+        doc.rect(x, y - height, width, height, fill=fill, stroke=BORDER)
+        baseline = y - CELL_PADDING - TABLE_FONT_SIZE
+        for line in lines:
+            doc.text(x + CELL_PADDING, baseline, line, font, TABLE_FONT_SIZE, 0.2)
+            baseline -= LINE_HEIGHT
+        x += width
+    return height
+
+
+def _page_number(doc, number):
+    doc.centered_text(MARGIN / 2, f'Page {number}', 'F1', 8, 0.4)
+
+
+def _cause_list_pages(doc, date, cases, total_cases, generated_on, court=None):
+    """Draw a cause list on ``doc``, yielding each time a page is complete and ready to be ended."""
+    widths = _column_widths()
+    header, header_height = _wrap_row([title for title, _, _ in CAUSE_LIST_COLUMNS], widths, 'F2')
+    fields = [field for _, field, _ in CAUSE_LIST_COLUMNS]
+    bottom = MARGIN + 30
+
+    y = PAGE_HEIGHT - MARGIN
+    doc.centered_text(y - 18, 'eCourts Cause List', 'F2', 18)
+    doc.centered_text(y - 42, f'{court} | Date: {date}' if court else f'Date: {date}', 'F2', 13)
+    doc.line(MARGIN, y - 58, PAGE_WIDTH - MARGIN, y - 58, line_width=2)
+    y -= 80
+
+    page = 1
+    if cases:
+        y -= _draw_row(doc, y, header, header_height, widths, 'F2', HEADER_FILL)
+        for case in cases:
+            wrapped, height = _wrap_row([str(_value(case, field)) for field in fields], widths, 'F1')
+            if y - height < bottom:
+                _page_number(doc, page)
+                yield
+                page += 1
+                y = PAGE_HEIGHT - MARGIN
+                y -= _draw_row(doc, y, header, header_height, widths, 'F2', HEADER_FILL)
+            y -= _draw_row(doc, y, wrapped, height, widths, 'F1')
+    else:
+        doc.centered_text(y - 50, 'No cases listed for this date.', 'F1', 11, 0.4)
+        y -= 60
+
+    if y - 40 < bottom:
+        _page_number(doc, page)
+        yield
+        page += 1
+        y = PAGE_HEIGHT - MARGIN
+    doc.centered_text(y - 40, f'Generated on: {generated_on} | Total Cases: {total_cases}', 'F1', 9, 0.4)
+    _page_number(doc, page)
+    yield
+
+
+def cause_list_pdf(date, cases, total_cases, generated_on, compress=True, court=None):
+    """Yield the cause-list PDF as byte chunks, one page at a time."""
+    doc = PdfDocument(compress)
+    yield doc.header()
+    for _ in _cause_list_pages(doc, date, cases, total_cases, generated_on, court):
+        yield doc.end_page()
+    yield doc.trailer()
+
+
+def cause_list_page_contents(date, cases, total_cases, generated_on, compress=True, court=None):
+    """The content stream of each page of a cause list, for ``merged_pdf`` to place in a larger document."""
+    doc = PdfDocument(compress)
+    return [doc.page_content() for _ in _cause_list_pages(doc, date, cases, total_cases, generated_on, court)]
+
+
+def merged_pdf(sections, compress=True):
+    """Yield one PDF made of ``(bookmark title, page contents)`` sections, with a bookmark per section.
+
+    Sections are consumed one at a time, so only the section being written
+    is held in memory.
+    """
+    doc = PdfDocument(compress)
+    yield doc.header()
+    bookmarks = []
+    for title, contents in sections:
+        for n, content in enumerate(contents):
+            yield doc.page(content)
+            if n == 0:
+                bookmarks.append((title, doc.page_ids[-1]))
+    if not doc.page_ids:
+        doc.centered_text(PAGE_HEIGHT / 2, 'No cause lists to export.', 'F1', 11, 0.4)
+        yield doc.end_page()
+    yield doc.outline(bookmarks)
+    yield doc.trailer()
+
+
+CASE_DETAIL_FIELDS = (
+    ('Case Number', 'case_number'),
+    ('Court Name', 'court_name'),
+    ('Serial Number', 'serial_number'),
+    ('Listing Date', 'listing_date'),
+    ('Status', 'status'),
+    ('Checked On', 'checked_on'),
+)
+ACCENT = (0.0, 0.486, 0.729)
+
+
+def case_details_pdf(details, generated_on, compress=True):
+    """Yield the single-case PDF; ``details`` maps the CASE_DETAIL_FIELDS keys to text."""
+    doc = PdfDocument(compress)
+    yield doc.header()
+
+    y = PAGE_HEIGHT - MARGIN
+    doc.centered_text(y - 18, 'eCourts Case Information', 'F2', 18)
+    doc.centered_text(y - 42, 'Case Details', 'F2', 13)
+    doc.line(MARGIN, y - 58, PAGE_WIDTH - MARGIN, y - 58, line_width=2)
+    y -= 90
+
+    value_width = PAGE_WIDTH - 2 * MARGIN - 130
+    for label, field in CASE_DETAIL_FIELDS:
+        lines = wrap(details.get(field, 'N/A'), 'F1', 11, value_width)
+        height = len(lines) * 14 + 12
+        doc.rect(MARGIN, y - height, 3, height, fill=ACCENT)
+        doc.text(MARGIN + 14, y - 18, f'{label}:', 'F2', 11, 0.2)
+        baseline = y - 18
+        for line in lines:
+            doc.text(MARGIN + 130, baseline, line, 'F1', 11, 0.4)
+            baseline -= 14
+        y -= height + 12
+
+    doc.centered_text(y - 40, f'Generated on: {generated_on} | Source: eCourts Database', 'F1', 9, 0.4)
+    yield doc.end_page()
+    yield doc.trailer()
+
+
+def html_to_pdf(chunks):
+    """Render streamed HTML chunks through wkhtmltopdf (the pre-native path).
+
+    The chunks are spooled to a temporary file for wkhtmltopdf to read, so the
+    page is never joined into one string here.
+    """
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.html') as html_file:
+        html_file.writelines(chunks)
+        html_file.flush()
+        return pdfkit.from_file(html_file.name, False, options=PDFKIT_OPTIONS)
@@ -0,0 +1,318 @@
+"""Off-peak crawler that fetches tomorrow's cause list for every court ahead of time.
+
+During ``PREWARM_WINDOW`` (local time, default 01:00-06:00) a background
+thread walks every court in the directory and calls
+``ECourtsScraper.get_cause_list`` for tomorrow's date. That fills the
+response cache (with the usual ``date_ttl`` for the day) and, through the
+cause-list listeners, the case index, party search and change feed. Those
+three are shared already: every worker reads the case index's log before its
+lookups (see ``case_index``), and party search and the change feed are
+SQLite files.
+
+The crawl is only worth anything if every worker reads what it fetched, so
+it also needs the shared disk tier of the response cache
+(``RESPONSE_CACHE_PATH``). Without it ``start`` logs a warning and does
+nothing, and the command line refuses to run.
+
+Courts are crawled busiest first, ranked by how often users have asked for
+them (``record_request``). Fetches are paced by their own token bucket
+(``PREWARM_RATE``) on top of the transport's limit, so users keep most of
+the upstream budget. Progress lives in SQLite: a court is claimed before it
+is fetched and marked done after. A crashed or restarted worker picks up the
+remaining courts, and claims older than STALE_CLAIM seconds are retried.
+
+Every gunicorn worker starts the background thread, but only one crawls: the
+one holding an exclusive ``flock`` on ``<PREWARM_PATH>.lock``. The others
+stand by and try for the lock on each idle pass, so when the crawling worker
+exits (or is recycled) another one takes over. Several ``prewarm.py`` runs
+can still share one crawl through the claims.
+
+    RESPONSE_CACHE_PATH=/var/cache/ecourts/responses.db python prewarm.py [--date 2025-01-07]
+
+runs one crawl now, ignoring the window.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from transport import TokenBucket
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'var', 'prewarm.db')
+DEFAULT_WINDOW = '01:00-06:00'
+STALE_CLAIM = 600
+MAX_ATTEMPTS = 3
+FLUSH_INTERVAL = 60
+IDLE_SLEEP = 60
+
+
+def parse_window(text):
+    """'HH:MM-HH:MM' -> (start, end) in minutes after midnight; the window may wrap past midnight."""
+    start, end = text.split('-')
+    to_minutes = lambda hhmm: int(hhmm.split(':')[0]) * 60 + int(hhmm.split(':')[1])  # noqa: E731
+    return to_minutes(start.strip()), to_minutes(end.strip())
+
+
+def in_window(window, now=None):
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    start, end = window
+    return start <= minute < end if start <= end else minute >= start or minute < end
+
+
+class PrewarmCrawler:
+    def __init__(self, scraper, path=DEFAULT_PATH, window=DEFAULT_WINDOW, rate=1.0, days_ahead=1):
+        self.scraper = scraper
+        self.path = path
+        self.window = parse_window(window)
+        self.window_text = window
+        self.bucket = TokenBucket(rate, 1)
+        self.rate = rate
+        self.days_ahead = days_ahead
+        self.state = 'stopped'
+        self.current_date = None
+        self._hits = Counter()
+        self._hits_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript('''
+            CREATE TABLE IF NOT EXISTS court_hits (
+                court TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL,
+                last_hit REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS crawl (
+                date TEXT NOT NULL,
+                court TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                claimed_at REAL,
+                fetched_at REAL,
+                message TEXT,
+                PRIMARY KEY (date, court)
+            );
+            CREATE INDEX IF NOT EXISTS crawl_queue ON crawl (date, status, priority);
+        ''')
+
+    @classmethod
+    def from_env(cls, scraper):
+        return cls(
+            scraper,
+            path=os.environ.get('PREWARM_PATH', DEFAULT_PATH),
+            window=os.environ.get('PREWARM_WINDOW', DEFAULT_WINDOW),
+            rate=float(os.environ.get('PREWARM_RATE', 1.0)),
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close the calling thread's connection; the next use opens a new one."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Request frequency ----------------------------------------------------
+
+    def record_request(self, state_code, dist_code, complex_code, court_code):
+        if not (state_code and dist_code and complex_code and court_code):
+            return
+        with self._hits_lock:
+            self._hits[f'{state_code}/{dist_code}/{complex_code}/{court_code}'] += 1
+            due = time.monotonic() - self._last_flush >= FLUSH_INTERVAL
+        if due:
+            self.flush_hits()
+
+    def flush_hits(self):
+        with self._hits_lock:
+            hits, self._hits = self._hits, Counter()
+            self._last_flush = time.monotonic()
+        if not hits:
+            return
+        now = time.time()
+        self._connect().executemany(
+            'INSERT INTO court_hits (court, hits, last_hit) VALUES (?, ?, ?) '
+            'ON CONFLICT (court) DO UPDATE SET hits = hits + excluded.hits, last_hit = excluded.last_hit',
+            [(court, count, now) for court, count in hits.items()])
+
+    # Crawl queue ----------------------------------------------------------
+
+    def plan(self, day):
+        """Queue every court for ``day`` (already-queued courts keep their progress)."""
+        self.flush_hits()
+        conn = self._connect()
+        hits = dict(conn.execute('SELECT court, hits FROM court_hits'))
+        courts = ['/'.join(key) for key in self.scraper.directory.court_keys()]
+        conn.executemany(
+            "INSERT OR IGNORE INTO crawl (date, court, priority, status) VALUES (?, ?, ?, 'pending')",
+            [(day.isoformat(), court, hits.get(court, 0)) for court in courts])
+        return len(courts)
+
+    def claim(self, day):
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                "SELECT court FROM crawl WHERE date = ? AND (status = 'pending' "
+                "OR (status = 'claimed' AND claimed_at < ?) OR (status = 'failed' AND attempts < ?)) "
+                "ORDER BY status = 'failed', priority DESC, court LIMIT 1",
+                (day.isoformat(), now - STALE_CLAIM, MAX_ATTEMPTS)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE crawl SET status = 'claimed', claimed_at = ?, attempts = attempts + 1 "
+                             "WHERE date = ? AND court = ?", (now, day.isoformat(), row[0]))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return row[0] if row else None
+
+    def finish(self, day, court, ok, message=None):
+        self._connect().execute(
+            'UPDATE crawl SET status = ?, fetched_at = ?, message = ? WHERE date = ? AND court = ?',
+            ('done' if ok else 'failed', time.time(), message, day.isoformat(), court))
+
+    def crawl(self, day, keep_going=lambda: True):
+        """Fetch ``day``'s list for every queued court; returns the number fetched this run."""
+        self.plan(day)
+        self.current_date = day
+        fetched = 0
+        while not self._stop.is_set() and keep_going():
+            court = self.claim(day)
+            if court is None:
+                break
+            self.bucket.acquire()
+            try:
+                result = self.scraper.get_cause_list(*court.split('/'), day.strftime('%d-%m-%Y'))
+                self.finish(day, court, result.get('success'), result.get('message'))
+            except Exception as e:
+                logger.exception("Pre-warm fetch failed for %s on %s", court, day)
+                self.finish(day, court, False, str(e))
+            fetched += 1
+        return fetched
+
+    # Scheduling -----------------------------------------------------------
+
+    def _lead(self):
+        """Whether this process is the one that crawls (it holds the lock file; kept until it exits)."""
+        if fcntl is None or self.path == ':memory:':
+            return True
+        if self._lock_file is None:
+            self._lock_file = open(self.path + '.lock', 'a')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            if not self._lead():
+                self.state = 'standby'
+            elif in_window(self.window):
+                self.state = 'running'
+                day = date.today() + timedelta(days=self.days_ahead)
+                count = self.crawl(day, keep_going=lambda: in_window(self.window))
+                logger.info("Pre-warm pass for %s fetched %d cause lists", day, count)
+                self.state = 'waiting'
+            else:
+                self.state = 'waiting'
+            self._stop.wait(IDLE_SLEEP)
+        self.state = 'stopped'
+
+    @property
+    def shared_cache(self):
+        """Whether fetched lists land in the disk cache every worker reads."""
+        return self.scraper.cache.disk is not None
+
+    def start(self):
+        if not self.shared_cache:
+            logger.warning("Pre-warm is off: RESPONSE_CACHE_PATH is not set, so fetched lists would only "
+                           "reach this process's memory cache")
+            return self
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name='prewarm', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self, day=None):
+        day = day or self.current_date or date.today() + timedelta(days=self.days_ahead)
+        conn = self._connect()
+        counts = dict(conn.execute('SELECT status, COUNT(*) FROM crawl WHERE date = ? GROUP BY status',
+                                   (day.isoformat(),)))
+        oldest, newest = conn.execute(
+            "SELECT MIN(fetched_at), MAX(fetched_at) FROM crawl WHERE date = ? AND status = 'done'",
+            (day.isoformat(),)).fetchone()
+        total = sum(counts.values())
+        done = counts.get('done', 0)
+        return {
+            "state": self.state,
+            "window": self.window_text,
+            "in_window": in_window(self.window),
+            "rate": self.rate,
+            "date": day.isoformat(),
+            "total": total,
+            "done": done,
+            "failed": counts.get('failed', 0),
+            "remaining": counts.get('pending', 0) + counts.get('claimed', 0),
+            "progress": round(done / total, 4) if total else 0.0,
+            "oldest_fetch": datetime.fromtimestamp(oldest).isoformat() if oldest else None,
+            "newest_fetch": datetime.fromtimestamp(newest).isoformat() if newest else None,
+            "oldest_fetch_age_s": round(time.time() - oldest) if oldest else None,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-fetch one day's cause list for every court.")
+    parser.add_argument('--date', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(),
+                        default=date.today() + timedelta(days=1), help="YYYY-MM-DD (default: tomorrow)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    from app import scraper
+    crawler = PrewarmCrawler.from_env(scraper)
+    if not crawler.shared_cache:
+        print("Set RESPONSE_CACHE_PATH to the API's disk cache; otherwise the crawl is lost when this exits",
+              file=sys.stderr)
+        return 2
+    try:
+        crawler.crawl(args.date)
+    except KeyboardInterrupt:
+        return 130
+    status = crawler.status(args.date)
+    print(f"{status['done']}/{status['total']} cause lists for {status['date']} "
+          f"({status['failed']} failed)", file=sys.stderr)
+    return 1 if status['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
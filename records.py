@@ -0,0 +1,183 @@
+"""Compact record types for cases and cause lists.
+
+``CauseList`` stores its rows column-wise: free-text columns are plain lists
+of strings, while the low-cardinality ``purpose`` and ``court_room`` columns
+are dictionary-encoded into ``array('I')`` codes, so thousands of rows share
+one copy of "Hearing". Rows are materialised as ``CaseEntry`` objects only
+when iterated, and ``iter_json`` writes the existing ``cases`` JSON shape
+straight from the columns. ``to_rows`` gives the compact alternative, one
+array of CASE_FIELDS values per case. The CNR, when the page links one, is
+kept for indexing but is not part of either JSON shape.
+"""
+import sys
+from array import array
+from dataclasses import dataclass
+from json.encoder import encode_basestring_ascii
+
+CASE_FIELDS = ('serial_no', 'case_number', 'parties', 'purpose', 'court_room')
+
+
+@dataclass(slots=True)
+class CaseEntry:
+    serial_no: str
+    case_number: str
+    parties: str
+    purpose: str
+    court_room: str
+    cnr: str = ''
+
+    def to_dict(self):
+        return {
+            "serial_no": self.serial_no,
+            "case_number": self.case_number,
+            "parties": self.parties,
+            "purpose": self.purpose,
+            "court_room": self.court_room
+        }
+
+
+@dataclass(slots=True)
+class CaseDetails:
+    case_number: str
+    court_name: str
+    serial_number: str
+    listing_date: str
+    status: str
+    checked_on: str
+    source: str
+    filing_date: str
+    petitioner: str
+    respondent: str
+
+    def to_dict(self):
+        return {
+            "caseNumber": self.case_number,
+            "courtName": self.court_name,
+            "serialNumber": self.serial_number,
+            "listingDate": self.listing_date,
+            "status": self.status,
+            "checkedOn": self.checked_on,
+            "source": self.source,
+            "filingDate": self.filing_date,
+            "petitioner": self.petitioner,
+            "respondent": self.respondent
+        }
+
+
+class _Vocabulary:
+    __slots__ = ('values', 'codes', 'encoded')
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+        self.encoded = []
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+            self.encoded.append(encode_basestring_ascii(value))
+        return code
+
+    def __getstate__(self):
+        return (self.values,)
+
+    def __setstate__(self, state):
+        values, = state
+        self.values = []
+        self.codes = {}
+        self.encoded = []
+        for value in values:
+            self.code(value)
+
+
+class CauseList:
+    __slots__ = ('serial_no', 'case_number', 'parties', 'purpose', 'court_room', 'cnr', '_purposes', '_rooms')
+
+    def __init__(self):
+        self.serial_no = []
+        self.case_number = []
+        self.parties = []
+        self.cnr = []
+        self.purpose = array('I')
+        self.court_room = array('I')
+        self._purposes = _Vocabulary()
+        self._rooms = _Vocabulary()
+
+    @classmethod
+    def from_rows(cls, rows):
+        cause_list = cls()
+        for row in rows:
+            cause_list.append(row)
+        return cause_list
+
+    def append(self, row):
+        if isinstance(row, dict):
+            row = CaseEntry(**row)
+        self.serial_no.append(sys.intern(row.serial_no))
+        self.case_number.append(row.case_number)
+        self.parties.append(row.parties)
+        self.purpose.append(self._purposes.code(row.purpose))
+        self.court_room.append(self._rooms.code(row.court_room))
+        self.cnr.append(sys.intern(row.cnr))
+
+    def __len__(self):
+        return len(self.case_number)
+
+    def __getitem__(self, index):
+        return CaseEntry(
+            self.serial_no[index],
+            self.case_number[index],
+            self.parties[index],
+            self._purposes.values[self.purpose[index]],
+            self._rooms.values[self.court_room[index]],
+            self.cnr[index],
+        )
+
+    def __iter__(self):
+        purposes, rooms = self._purposes.values, self._rooms.values
+        for serial_no, case_number, parties, purpose, court_room, cnr in zip(
+                self.serial_no, self.case_number, self.parties, self.purpose, self.court_room, self.cnr):
+            yield CaseEntry(serial_no, case_number, parties, purposes[purpose], rooms[court_room], cnr)
+
+    def __eq__(self, other):
+        if not isinstance(other, CauseList):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def to_dicts(self):
+        return [entry.to_dict() for entry in self]
+
+    def to_rows(self):
+        """One ``(serial_no, case_number, parties, purpose, court_room)`` tuple per case: the compact ``cases`` shape."""
+        return list(zip(self.serial_no, self.case_number, self.parties,
+                        map(self._purposes.values.__getitem__, self.purpose),
+                        map(self._rooms.values.__getitem__, self.court_room)))
+
+    def iter_json(self):
+        """Yield the JSON array of case objects (keys sorted, as Flask emits them)."""
+        purposes, rooms = self._purposes.encoded, self._rooms.encoded
+        yield '['
+        sep = ''
+        for serial_no, case_number, parties, purpose, court_room in zip(
+                self.serial_no, self.case_number, self.parties, self.purpose, self.court_room):
+            yield (f'{sep}{{"case_number":{encode_basestring_ascii(case_number)},'
+                   f'"court_room":{rooms[court_room]},'
+                   f'"parties":{encode_basestring_ascii(parties)},'
+                   f'"purpose":{purposes[purpose]},'
+                   f'"serial_no":{encode_basestring_ascii(serial_no)}}}')
+            sep = ','
+        yield ']'
+
+    def to_json(self):
+        return ''.join(self.iter_json())
+
+
+def json_default(o):
+    """``default=`` hook for ``json.dumps`` covering the record types."""
+    if isinstance(o, CauseList):
+        return o.to_dicts()
+    if isinstance(o, (CaseEntry, CaseDetails)):
+        return o.to_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
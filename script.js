@@ -44,6 +44,7 @@ const cursorFollower = document.querySelector('.cursor-follower');
 
 let currentCaseData = null;
 let currentCauseListData = null;
+let courtHierarchy = null;
 
 document.addEventListener('DOMContentLoaded', function() {
     initApp();
@@ -299,129 +300,88 @@ function toggleTheme() {
 
 async function loadStates() {
     try {
-        const response = await fetch(`${API_BASE_URL}/states`);
+        const response = await fetch(`${API_BASE_URL}/hierarchy`);
         const data = await response.json();
         
-        if (data.success) {
-            stateSelect.innerHTML = '<option value="">Select State</option>';
-            for (const [code, name] of Object.entries(data.data)) {
-                const option = document.createElement('option');
-                option.value = code;
-                option.textContent = name;
-                stateSelect.appendChild(option);
-            }
-        }
+        courtHierarchy = data.states;
+        fillSelect(stateSelect, 'Select State', Object.fromEntries(
+            Object.entries(courtHierarchy).map(([code, [name]]) => [code, name])
+        ));
     } catch (error) {
         showError('Failed to load states');
     }
 }
 
-async function loadDistricts() {
+function fillSelect(select, placeholder, options) {
+    select.innerHTML = `<option value="">${placeholder}</option>`;
+    for (const [code, name] of Object.entries(options)) {
+        const option = document.createElement('option');
+        option.value = code;
+        option.textContent = name;
+        select.appendChild(option);
+    }
+}
+
+function hierarchyChildren(...codes) {
+    let node = [null, courtHierarchy || {}];
+    for (const code of codes) {
+        node = node[1][code];
+        if (!node) return {};
+    }
+    return node[1];
+}
+
+function childNames(children) {
+    return Object.fromEntries(
+        Object.entries(children).map(([code, child]) => [code, Array.isArray(child) ? child[0] : child])
+    );
+}
+
+function loadDistricts() {
     const stateCode = stateSelect.value;
+    
+    districtSelect.disabled = true;
+    complexSelect.disabled = true;
+    courtSelect.disabled = true;
+    
+    fillSelect(districtSelect, 'Select District', {});
+    fillSelect(complexSelect, 'Select Court Complex', {});
+    fillSelect(courtSelect, 'Select Court', {});
+    
     if (!stateCode) return;
     
-    try {
-        districtSelect.disabled = true;
-        complexSelect.disabled = true;
-        courtSelect.disabled = true;
-        
-        districtSelect.innerHTML = '<option value="">Select District</option>';
-        complexSelect.innerHTML = '<option value="">Select Court Complex</option>';
-        courtSelect.innerHTML = '<option value="">Select Court</option>';
-        
-        const response = await fetch(`${API_BASE_URL}/districts`, {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({state_code: stateCode})
-        });
-        
-        const data = await response.json();
-        
-        if (data.success) {
-            districtSelect.innerHTML = '<option value="">Select District</option>';
-            for (const [code, name] of Object.entries(data.data)) {
-                const option = document.createElement('option');
-                option.value = code;
-                option.textContent = name;
-                districtSelect.appendChild(option);
-            }
-            districtSelect.disabled = false;
-        }
-    } catch (error) {
-        showError('Failed to load districts');
-    }
+    fillSelect(districtSelect, 'Select District', childNames(hierarchyChildren(stateCode)));
+    districtSelect.disabled = false;
 }
 
-async function loadCourtComplexes() {
+function loadCourtComplexes() {
     const stateCode = stateSelect.value;
     const distCode = districtSelect.value;
+    
+    complexSelect.disabled = true;
+    courtSelect.disabled = true;
+    
+    fillSelect(complexSelect, 'Select Court Complex', {});
+    fillSelect(courtSelect, 'Select Court', {});
+    
     if (!stateCode || !distCode) return;
     
-    try {
-        complexSelect.disabled = true;
-        courtSelect.disabled = true;
-        
-        complexSelect.innerHTML = '<option value="">Select Court Complex</option>';
-        courtSelect.innerHTML = '<option value="">Select Court</option>';
-        
-        const response = await fetch(`${API_BASE_URL}/court-complexes`, {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({state_code: stateCode, dist_code: distCode})
-        });
-        
-        const data = await response.json();
-        
-        if (data.success) {
-            complexSelect.innerHTML = '<option value="">Select Court Complex</option>';
-            for (const [code, name] of Object.entries(data.data)) {
-                const option = document.createElement('option');
-                option.value = code;
-                option.textContent = name;
-                complexSelect.appendChild(option);
-            }
-            complexSelect.disabled = false;
-        }
-    } catch (error) {
-        showError('Failed to load court complexes');
-    }
+    fillSelect(complexSelect, 'Select Court Complex', childNames(hierarchyChildren(stateCode, distCode)));
+    complexSelect.disabled = false;
 }
 
-async function loadCourts() {
+function loadCourts() {
     const stateCode = stateSelect.value;
     const distCode = districtSelect.value;
     const complexCode = complexSelect.value;
+    
+    courtSelect.disabled = true;
+    fillSelect(courtSelect, 'Select Court', {});
+    
     if (!stateCode || !distCode || !complexCode) return;
     
-    try {
-        courtSelect.disabled = true;
-        courtSelect.innerHTML = '<option value="">Select Court</option>';
-        
-        const response = await fetch(`${API_BASE_URL}/courts`, {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({
-                state_code: stateCode,
-                dist_code: distCode,
-                complex_code: complexCode
-            })
-        });
-        
-        const data = await response.json();
-        
-        if (data.success) {
-            courtSelect.innerHTML = '<option value="">Select Court</option>';
-            for (const [code, name] of Object.entries(data.data)) {
-                const option = document.createElement('option');
-                option.value = code;
-                option.textContent = name;
-                courtSelect.appendChild(option);
-            }
-            courtSelect.disabled = false;
-        }
-    } catch (error) {
-        showError('Failed to load courts');
-    }
+    fillSelect(courtSelect, 'Select Court', hierarchyChildren(stateCode, distCode, complexCode));
+    courtSelect.disabled = false;
 }
 
 async function fetchCauseList() {
@@ -450,7 +410,8 @@ async function fetchCauseList() {
                 dist_code: distCode,
                 complex_code: complexCode,
                 court_code: courtCode,
-                date: formattedDate
+                date: formattedDate,
+                case_format: 'rows'
             })
         });
         
@@ -470,14 +431,29 @@ async function fetchCauseList() {
     }
 }
 
+// With case_format 'rows' each case arrives as an array of data.case_fields values
+// rather than an object, which keeps large cause lists about 40% smaller.
+function causeListRecords(data) {
+    if (!data.case_fields) {
+        return data.cases || [];
+    }
+    const fields = data.case_fields;
+    return data.cases.map(row => {
+        const record = {};
+        fields.forEach((field, i) => { record[field] = row[i]; });
+        return record;
+    });
+}
+
 function displayCauseListResults(data) {
     resultCauseDate.textContent = data.date;
     resultTotalCases.textContent = data.total_cases;
     
     causeListCases.innerHTML = '';
     
-    if (data.cases && data.cases.length > 0) {
-        data.cases.forEach(caseItem => {
+    const cases = causeListRecords(data);
+    if (cases.length > 0) {
+        cases.forEach(caseItem => {
             const caseElement = document.createElement('div');
             caseElement.className = 'case-item';
             caseElement.innerHTML = `
@@ -0,0 +1,334 @@
+"""Authenticated eCourts sessions, solved once and shared by every scraping worker.
+
+eCourts ties a search to a PHP session: a ``PHPSESSID`` cookie plus the
+captcha solved for it. A session stays valid for a while after that, so a
+solved captcha can serve many requests. ``SessionPool`` keeps ``size``
+sessions authenticated and lends them out:
+
+    with scraper.sessions.lease() as session:
+        response = transport.post(url, data=session.form(form), session=session.http)
+    if is_captcha_page(response.content):
+        scraper.sessions.invalidate(session)
+
+A lease does not hold the session exclusively. It takes the live session
+with the fewest leases in flight, so load spreads over the pool and a lease
+only blocks while no session is authenticated yet. The first lease after
+start logs in on the caller's thread. Concurrent callers wait for that one
+login rather than each solving their own captcha.
+
+Upstream does not say when a session will expire, so each one is given
+SESSION_TTL seconds from its login. A background thread (started by the
+first lease, so each forked worker runs its own) logs in replacements
+REFRESH_MARGIN seconds before sessions expire. Old sessions keep serving
+until their replacement is ready. A session that gets a captcha page
+anyway is invalidated and replaced at once.
+
+Logging in is a GET of the home page for the cookie and a GET of the
+captcha image, which the solver turns into text. The solver is any object
+with ``solve(image_bytes) -> str``. ``ECOURTS_CAPTCHA_SOLVER`` names one as
+``module:attribute`` (called with no arguments), or ``stub`` for
+``StubSolver``. That reads the answer straight from the image, which only
+works against simulator.py.
+
+``ECOURTS_SESSIONS=0`` turns pooling off: leases then hand out the
+transport's own session and an empty captcha. Pooling is also off, with a
+warning in live mode, while no solver is configured, since no login could
+succeed.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from importlib import import_module
+
+from causelist_engine import CAPTCHA_FIELD, CAPTCHA_PATH
+from transport import TransportError
+
+SESSION_TTL = 1200.0
+REFRESH_MARGIN = 120.0
+RETRY_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+class CaptchaError(TransportError):
+    pass
+
+
+class SessionUnavailable(TransportError):
+    pass
+
+
+class UpstreamSession:
+    __slots__ = ('http', 'captcha', 'started', 'expires', 'leases', 'in_use')
+
+    def __init__(self, http, captcha, started, expires):
+        self.http = http
+        self.captcha = captcha
+        self.started = started
+        self.expires = expires
+        self.leases = 0
+        self.in_use = 0
+
+    @property
+    def cookies(self):
+        return self.http.cookies.get_dict() if self.http is not None else {}
+
+    def update_cookies(self, cookies):
+        """Store cookies (name -> value) that a response received outside ``http`` set, as ``http`` would have."""
+        if self.http is None:
+            return
+        jar = self.http.cookies
+        for name, value in cookies.items():
+            known = next((cookie for cookie in jar if cookie.name == name), None)
+            if known is None:
+                jar.set(name, value)
+            else:
+                jar.set(name, value, domain=known.domain, path=known.path)
+
+    def form(self, form):
+        """``form`` with this session's captcha answer added."""
+        return {**form, CAPTCHA_FIELD: self.captcha} if self.captcha else form
+
+
+# Handed out when pooling is off: the transport's default session, no captcha.
+NO_SESSION = UpstreamSession(None, '', 0.0, float('inf'))
+
+
+class StubSolver:
+    """Answers simulator captchas, whose "image" is the answer in plain ASCII.
+
+    ``delay`` seconds are spent per solve to stand in for a real solver, and
+    ``answer`` (if given) is returned whatever the image says.
+    """
+
+    def __init__(self, answer=None, delay=0.0):
+        self.answer = answer
+        self.delay = delay
+
+    def solve(self, image):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.answer is not None:
+            return self.answer
+        try:
+            answer = image.decode('ascii').strip()
+        except UnicodeDecodeError:
+            answer = ''
+        if not answer.isalnum():
+            raise CaptchaError("Captcha image is not a simulator captcha")
+        return answer
+
+
+def load_solver(spec):
+    """A solver from ``stub`` or ``module:attribute`` (a class or factory called with no arguments)."""
+    if spec == 'stub':
+        return StubSolver()
+    module, _, name = spec.partition(':')
+    if not name:
+        raise ValueError(f"Captcha solver must be 'stub' or 'module:attribute', got {spec!r}")
+    return getattr(import_module(module), name)()
+
+
+def ecourts_login(transport, base_url, solver):
+    """A ``login()`` for ``SessionPool``: new cookie jar, captcha fetched and solved; returns ``(http, captcha)``."""
+    def login():
+        http = transport.new_session()
+        transport.get(base_url, session=http).raise_for_status()
+        response = transport.get(base_url + CAPTCHA_PATH, session=http)
+        response.raise_for_status()
+        return http, solver.solve(response.content)
+    return login
+
+
+class SessionPool:
+    def __init__(self, login, size=4, ttl=SESSION_TTL, refresh_margin=REFRESH_MARGIN, retry_interval=RETRY_INTERVAL):
+        self.login = login
+        self.size = size
+        self.ttl = ttl
+        self.refresh_margin = min(refresh_margin, ttl / 2)
+        self.retry_interval = retry_interval
+        self._sessions = []
+        self._logging_in = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self.leases = 0
+        self.reused = 0
+        self.waits = 0
+        self.logins = 0
+        self.inline_logins = 0
+        self.login_failures = 0
+        self.refreshes = 0
+        self.invalidated = 0
+        self.last_error = None
+
+    @classmethod
+    def from_env(cls, transport, base_url, live=False):
+        env = os.environ
+        spec = env.get('ECOURTS_CAPTCHA_SOLVER')
+        size = int(env.get('ECOURTS_SESSIONS', 4))
+        if size > 0 and not spec:
+            if live:
+                logger.warning("ECOURTS_CAPTCHA_SOLVER is not set, so upstream sessions are not pooled and "
+                               "searches go out without a solved captcha; set it to module:attribute "
+                               "(or 'stub' against simulator.py)")
+            size = 0
+        return cls(
+            ecourts_login(transport, base_url, load_solver(spec) if spec else None),
+            size=size,
+            ttl=float(env.get('ECOURTS_SESSION_TTL', SESSION_TTL)),
+            refresh_margin=float(env.get('ECOURTS_SESSION_REFRESH_MARGIN', REFRESH_MARGIN)),
+        )
+
+    # Leasing --------------------------------------------------------------
+
+    @contextmanager
+    def lease(self, timeout=None, since=None):
+        session = self.acquire(timeout, since)
+        try:
+            yield session
+        finally:
+            self.release(session)
+
+    def _take(self, session):
+        session.in_use += 1
+        session.leases += 1
+        self.leases += 1
+        if session.leases > 1:
+            self.reused += 1
+        return session
+
+    def _live(self, now, since):
+        live = [session for session in self._sessions
+                if session.expires > now and (since is None or session.started >= since)]
+        return min(live, key=lambda session: session.in_use) if live else None
+
+    def try_acquire(self, since=None):
+        """A session if one can be leased without blocking, else None."""
+        if self.size <= 0:
+            return NO_SESSION
+        with self._cond:
+            self._ensure_thread()
+            session = self._live(time.monotonic(), since)
+            return self._take(session) if session is not None else None
+
+    def acquire(self, timeout=None, since=None):
+        """Lease a live session, logging one in here if none is; pair with ``release``.
+
+        After upstream rejects a session, others may be gone as well, so a
+        retry passes ``since`` (a ``time.monotonic()`` from just before the
+        rejected request) to lease only sessions logged in after it.
+        """
+        if self.size <= 0:
+            return NO_SESSION
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            self._ensure_thread()
+            while True:
+                now = time.monotonic()
+                session = self._live(now, since)
+                if session is not None:
+                    return self._take(session)
+                if not self._logging_in:
+                    self._logging_in += 1
+                    break
+                if deadline is not None and now >= deadline:
+                    raise SessionUnavailable("No upstream session became available in time")
+                self.waits += 1
+                self._cond.wait(deadline - now if deadline is not None else None)
+        session = self._login()
+        with self._cond:
+            self.inline_logins += 1
+            return self._take(session)
+
+    def release(self, session):
+        if session is NO_SESSION:
+            return
+        with self._cond:
+            session.in_use -= 1
+
+    def invalidate(self, session):
+        """Drop a session upstream no longer accepts (it answered with a captcha page)."""
+        if session is NO_SESSION:
+            return
+        with self._cond:
+            if session in self._sessions:
+                self._sessions.remove(session)
+                self.invalidated += 1
+                self._cond.notify_all()
+
+    # Logging in -----------------------------------------------------------
+
+    def _login(self):
+        """Log in one session and add it to the pool; the caller must have counted itself in ``_logging_in``."""
+        started = time.monotonic()
+        try:
+            http, captcha = self.login()
+        except BaseException as e:
+            with self._cond:
+                self._logging_in -= 1
+                self.login_failures += 1
+                self.last_error = str(e) or type(e).__name__
+                self._cond.notify_all()
+            raise
+        session = UpstreamSession(http, captcha, started, started + self.ttl)
+        with self._cond:
+            self._logging_in -= 1
+            self.logins += 1
+            self._sessions.append(session)
+            self._cond.notify_all()
+        return session
+
+    def _ensure_thread(self):
+        # A thread does not survive a fork, so each worker starts its own refresher on first use.
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='session-pool', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                self._sessions = [session for session in self._sessions if session.expires > now]
+                fresh = [session for session in self._sessions if session.expires - self.refresh_margin > now]
+                if len(fresh) >= self.size:
+                    # Replacements are ready, so sessions past their refresh point retire now.
+                    self._sessions = fresh
+                    wake = min(session.expires for session in fresh) - self.refresh_margin
+                    self._cond.wait(wake - now)
+                    continue
+                if self._logging_in:
+                    self._cond.wait(self.retry_interval)
+                    continue
+                self._logging_in += 1
+                replacing = len(self._sessions) > len(fresh)
+            try:
+                self._login()
+            except Exception:
+                time.sleep(self.retry_interval)
+                continue
+            if replacing:
+                with self._cond:
+                    self.refreshes += 1
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            live = [session for session in self._sessions if session.expires > now]
+            return {
+                "size": self.size,
+                "live": len(live),
+                "in_use": sum(session.in_use for session in live),
+                "leases": self.leases,
+                "reused": self.reused,
+                "reuse_rate": round(self.reused / self.leases, 4) if self.leases else 0.0,
+                "leases_per_login": round(self.leases / self.logins, 1) if self.logins else 0.0,
+                "waits": self.waits,
+                "logins": self.logins,
+                "inline_logins": self.inline_logins,
+                "login_failures": self.login_failures,
+                "refreshes": self.refreshes,
+                "invalidated": self.invalidated,
+                "last_error": self.last_error,
+            }
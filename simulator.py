@@ -0,0 +1,308 @@
+"""Deterministic stand-in for the eCourts site, for load tests and local development.
+
+    python simulator.py --port 8800 --cases 20 400 --latency 0.3 --error-rate 0.02
+    ECOURTS_LIVE=1 ECOURTS_BASE_URL=http://127.0.0.1:8800/ ECOURTS_CAPTCHA_SOLVER=stub python app.py
+
+It answers the requests the live scraper makes:
+
+    POST causelist/index.php   cause list: table#causelist with cases-min..cases-max rows
+    POST index.php             case status for action_type CNR or CASENO
+    GET  /                     home page (sets the PHPSESSID cookie), for /api/test-connection
+    GET  vendor/securimage/securimage_show.php
+                               the session's captcha, as plain-text "image" (session_pool.StubSolver reads it)
+
+Page contents depend only on ``seed`` and the submitted form, so the same
+court and date always give the same cases. Latency, 5xx errors and captcha
+pages are drawn per request from the same seed, the form and how many times
+that form has been seen. A retry can therefore succeed where the first
+attempt failed, and a run that sends the same requests sees the same
+failures whatever order they arrive in. ``throttle_rate`` puts a token
+bucket in front of everything. Past it, requests get 429 with Retry-After,
+as eCourts does under load. ``GET /__stats`` reports what has been served.
+
+With ``session_ttl`` set, POSTs also need what eCourts needs: a PHPSESSID
+cookie from the home page, younger than ``session_ttl`` seconds, and the
+``fcaptcha_code`` last issued to that session. Anything else gets the
+captcha page.
+"""
+import argparse
+import asyncio
+import calendar
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from html import escape
+
+from aiohttp import web
+
+from causelist_engine import CAPTCHA_FIELD, CAPTCHA_PATH, CASE_STATUS_PATH, CAUSE_LIST_PATH
+from court_directory import CourtDirectory
+from transport import TokenBucket
+
+PARTIES = (
+    'State of Maharashtra', 'Union of India', 'Public Prosecutor', 'Raj Kumar', 'Sunita Devi',
+    'Abdul Rahman', 'Venkatesh Rao', 'Kavita Joshi', 'Priya Iyer', 'Mohd. Irfan Shaikh',
+    'Oriental Insurance Co. Ltd.', 'Municipal Corporation of Greater Mumbai', 'Gupta Traders',
+    'Sharma Enterprises', 'Anjali Deshpande', 'Fatima Begum', 'Suresh Chandra Patil',
+)
+CASE_TYPES = ('CR', 'CS', 'CC', 'RCA', 'RPT', 'WP', 'APL', 'SC', 'MACP', 'BA')
+PURPOSES = ('Hearing', 'Evidence', 'Arguments', 'Judgment', 'Orders', 'Appearance', 'Framing of Charge', 'Admission')
+STATE_PREFIXES = ('MH', 'DL', 'KA', 'TN', 'UP', 'GJ', 'RJ', 'WB', 'KL', 'AP', 'TS', 'MP', 'PB', 'HR', 'BR', 'OR')
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>eCourts Services - {title}</title>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+CAPTCHA_BODY = """  <div id="captcha_container">
+    <span class="text-danger">Invalid Captcha</span>
+    <img id="captcha_image" src="/ecourtindia_v6/vendor/securimage/securimage_show.php" alt="captcha">
+    <input type="text" name="captcha" id="captcha" maxlength="6">
+  </div>"""
+
+
+SESSION_COOKIE = 'PHPSESSID'
+
+
+def _rng(*parts):
+    return random.Random('|'.join(str(part) for part in parts))
+
+
+# Courts in the directory get its CNR prefix, so bulk checks can route their CNRs back to them.
+CNR_PREFIXES = {key: prefix for prefix, key in CourtDirectory().snapshot.cnr_codes.items() if len(key) == 3}
+
+
+def _hearing_date(day, month, year):
+    # Case-status pages spell hearing dates out: "15th January 2024".
+    suffix = 'th' if 10 <= day % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+    return f'{day}{suffix} {calendar.month_name[month]} {year}'
+
+
+def _cnr(rng, state_code, dist_code, complex_code, year):
+    state = STATE_PREFIXES[int(state_code) % len(STATE_PREFIXES) if state_code.isdigit() else 0]
+    district = ''.join(chr(65 + _rng('district', state_code, dist_code).randrange(26)) for _ in range(2))
+    establishment = rng.randrange(1, 100)
+    prefix = CNR_PREFIXES.get((state_code, dist_code, complex_code)) or f'{state}{district}{establishment:02d}'
+    return f'{prefix}{rng.randrange(1, 1000000):06d}{year}'
+
+
+class ECourtsSimulator:
+    def __init__(self, seed=0, cases=(20, 200), latency=0.0, jitter=0.0, error_rate=0.0,
+                 captcha_rate=0.0, not_found_rate=0.0, throttle_rate=0.0, throttle_burst=None, session_ttl=None):
+        self.seed = seed
+        self.cases = cases
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.captcha_rate = captcha_rate
+        self.not_found_rate = not_found_rate
+        self.bucket = TokenBucket(throttle_rate, throttle_burst)
+        self.session_ttl = session_ttl
+        self._sessions = {}
+        self.stats = Counter()
+        self._seen = Counter()
+        self._thread = None
+        self._loop = None
+        self._runner = None
+
+    def cause_list_page(self, form):
+        state_code, dist_code = form.get('state_code', ''), form.get('dist_code', '')
+        complex_code = form.get('court_complex_code', '')
+        rng = _rng(self.seed, 'causelist', state_code, dist_code, form.get('court_complex_code'),
+                   form.get('court_code'), form.get('causelist_date'))
+        rows = []
+        for serial in range(1, rng.randint(*self.cases) + 1):
+            case_type, year = rng.choice(CASE_TYPES), rng.randint(2010, 2025)
+            rows.append(
+                '        <tr>\n'
+                f'          <td align="center">{serial}</td>\n'
+                f'          <td><a href="#" onclick="viewHistory(\'{_cnr(rng, state_code, dist_code, complex_code, year)}\')">'
+                f'{case_type}/{rng.randint(1, 9999)}/{year}</a></td>\n'
+                f'          <td>{escape(rng.choice(PARTIES))}<br>versus<br>{escape(rng.choice(PARTIES))}</td>\n'
+                f'          <td>Adv. {escape(rng.choice(PARTIES))}</td>\n'
+                f'          <td>{rng.choice(PURPOSES)}</td>\n'
+                f'          <td>Court Room {rng.randint(1, 9)}</td>\n'
+                '        </tr>'
+            )
+        body = (
+            f'  <div id="cause_list_header"><span>Cause List for {escape(form.get("causelist_date", ""))}</span>'
+            f'<span>Court {escape(form.get("court_code", ""))}</span></div>\n'
+            '  <table id="causelist" class="table table-bordered">\n'
+            '    <thead><tr><th>Sr No</th><th>Case Number</th><th>Parties</th><th>Advocate</th>'
+            '<th>Purpose</th><th>Court Room</th></tr></thead>\n'
+            '    <tbody>\n' + '\n'.join(rows) + '\n    </tbody>\n  </table>'
+        )
+        return PAGE.format(title='Cause List', body=body)
+
+    def case_status_page(self, form):
+        if form.get('action_type') == 'CNR':
+            query = (form.get('cnr_no', ''),)
+        else:
+            query = (form.get('case_type', ''), form.get('case_no', ''), form.get('rgyear', ''))
+        rng = _rng(self.seed, 'status', *query)
+        if rng.random() < self.not_found_rate:
+            return PAGE.format(title='Case Status', body='  <div id="caseHistoryDiv">This Case Code does not exists</div>')
+        if len(query) == 1:
+            cnr, case_type, number, year = query[0], rng.choice(CASE_TYPES), rng.randint(1, 9999), query[0][-4:]
+        else:
+            case_type, number, year = query
+            cnr = _cnr(rng, '1', '1', '1', year if year.isdigit() else 2024)
+        rows = (
+            ('Case Type', case_type),
+            ('Filing Number', f'{number}/{year}'),
+            ('Filing Date', f'{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{year}'),
+            ('Registration Number', f'{number}/{year}'),
+            ('CNR Number', cnr),
+            ('First Hearing Date', _hearing_date(rng.randint(1, 28), rng.randint(1, 12), year)),
+            ('Next Hearing Date', _hearing_date(rng.randint(1, 28), rng.randint(1, 12), 2025)),
+            ('Case Stage', rng.choice(PURPOSES)),
+            ('Court Number and Judge', f'{rng.randint(1, 9)}-Civil Judge Senior Division'),
+        )
+        body = (
+            '  <div id="caseHistoryDiv">\n    <table class="table case_details_table">\n'
+            + ''.join(f'      <tr><td>{label}</td><td>{escape(str(value))}</td></tr>\n' for label, value in rows)
+            + '    </table>\n'
+            f'    <span class="Petitioner_Advocate_table">1) {escape(rng.choice(PARTIES))}</span>\n'
+            f'    <span class="Respondent_Advocate_table">1) {escape(rng.choice(PARTIES))}</span>\n  </div>'
+        )
+        return PAGE.format(title='Case Status', body=body)
+
+    def _session(self, request, response=None):
+        """The request's session as ``[started, captcha]``; a new one (cookie set on ``response``) if it has none."""
+        session_id = request.cookies.get(SESSION_COOKIE)
+        session = self._sessions.get(session_id)
+        if session is None and response is not None:
+            session_id = uuid.uuid4().hex
+            session = self._sessions[session_id] = [time.monotonic(), None]
+            response.set_cookie(SESSION_COOKIE, session_id)
+            self.stats['sessions'] += 1
+        return session
+
+    async def _respond(self, request, render):
+        form = dict(await request.post())
+        captcha = form.pop(CAPTCHA_FIELD, None)
+        if self.bucket.rate > 0:
+            wait = self.bucket.reserve()
+            if wait:
+                self.stats['throttled'] += 1
+                return web.Response(status=429, text='Too Many Requests',
+                                    headers={'Retry-After': str(max(1, round(wait)))})
+        if self.session_ttl is not None:
+            session = self._session(request)
+            if (session is None or time.monotonic() - session[0] > self.session_ttl
+                    or session[1] is None or captcha != session[1]):
+                self.stats['session_rejected'] += 1
+                return web.Response(text=PAGE.format(title='Captcha', body=CAPTCHA_BODY), content_type='text/html')
+        fingerprint = (request.path, tuple(sorted(form.items())))
+        self._seen[fingerprint] += 1
+        rng = _rng(self.seed, 'request', *fingerprint, self._seen[fingerprint])
+        delay = self.latency + rng.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if rng.random() < self.error_rate:
+            self.stats['errors'] += 1
+            return web.Response(status=rng.choice((500, 502, 503)), text='Service Unavailable')
+        if rng.random() < self.captcha_rate:
+            self.stats['captcha'] += 1
+            return web.Response(text=PAGE.format(title='Captcha', body=CAPTCHA_BODY), content_type='text/html')
+        self.stats['ok'] += 1
+        return web.Response(text=render(form), content_type='text/html')
+
+    async def cause_list(self, request):
+        self.stats['cause_list'] += 1
+        return await self._respond(request, self.cause_list_page)
+
+    async def case_status(self, request):
+        self.stats['case_status'] += 1
+        return await self._respond(request, self.case_status_page)
+
+    async def home(self, request):
+        response = web.Response(text=PAGE.format(title='Home', body='  <h1>eCourts Services</h1>'),
+                                content_type='text/html')
+        self._session(request, response)
+        return response
+
+    async def captcha(self, request):
+        response = web.Response(content_type='text/plain')
+        session = self._session(request, response)
+        rng = _rng(self.seed, 'captcha', self.stats['captcha_images'])
+        session[1] = response.text = ''.join(rng.choice('abcdefghijkmnpqrstuvwxyz23456789') for _ in range(6))
+        self.stats['captcha_images'] += 1
+        return response
+
+    async def stats_view(self, request):
+        return web.json_response(dict(self.stats))
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post('/' + CAUSE_LIST_PATH, self.cause_list)
+        app.router.add_post('/' + CASE_STATUS_PATH, self.case_status)
+        app.router.add_get('/', self.home)
+        app.router.add_get('/' + CAPTCHA_PATH, self.captcha)
+        app.router.add_get('/__stats', self.stats_view)
+        return app
+
+    def start(self, host='127.0.0.1', port=0):
+        """Serve on a background thread; returns the base URL to use as ECOURTS_BASE_URL."""
+        ready = threading.Event()
+        bound = []
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            self._runner = web.AppRunner(self.app(), access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, host, port, backlog=4096)
+            self._loop.run_until_complete(site.start())
+            bound.append(self._runner.addresses[0][1])
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name='ecourts-simulator', daemon=True)
+        self._thread.start()
+        ready.wait()
+        return f'http://{host}:{bound[0]}/'
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(10)
+        self._loop = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a deterministic fake eCourts site.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cases', type=int, nargs=2, default=(20, 200), metavar=('MIN', 'MAX'),
+                        help="cases per cause list")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds before each response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="latency varies by up to this many seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with a 5xx")
+    parser.add_argument('--captcha-rate', type=float, default=0.0, help="share answered with a captcha page")
+    parser.add_argument('--not-found-rate', type=float, default=0.0, help="share of case lookups with no case")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="requests/second before 429s (0: off)")
+    parser.add_argument('--throttle-burst', type=float)
+    parser.add_argument('--session-ttl', type=float, help="require a session and captcha, valid this many seconds")
+    args = parser.parse_args(argv)
+
+    simulator = ECourtsSimulator(seed=args.seed, cases=tuple(args.cases), latency=args.latency,
+                                 jitter=args.jitter, error_rate=args.error_rate, captcha_rate=args.captcha_rate,
+                                 not_found_rate=args.not_found_rate, throttle_rate=args.throttle_rate,
+                                 throttle_burst=args.throttle_burst, session_ttl=args.session_ttl)
+    web.run_app(simulator.app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
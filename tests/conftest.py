@@ -0,0 +1,96 @@
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Tests that import app must not write to the stores under var/.
+STORES = tempfile.mkdtemp(prefix='ecourts-tests-')
+for name, filename in (('CASE_INDEX_PATH', 'case_index.log'), ('CAUSE_LIST_STORE_PATH', 'cause_lists.db'),
+                       ('CASE_HISTORY_PATH', 'case_history.db'), ('PARTY_SEARCH_PATH', 'party_search.db'),
+                       ('PREWARM_PATH', 'prewarm.db'), ('BULK_EXPORT_DIR', 'exports')):
+    os.environ[name] = os.path.join(STORES, filename)
+
+from simulator import ECourtsSimulator  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+
+@pytest.fixture
+def simulator():
+    """Factory for running simulators: ``simulator(**options)`` returns ``(simulator, base_url)``."""
+    started = []
+
+    def start(**options):
+        sim = ECourtsSimulator(**options)
+        started.append(sim)
+        return sim, sim.start()
+
+    yield start
+    for sim in started:
+        sim.stop()
+
+
+@pytest.fixture
+def fixture_page():
+    def read(name):
+        with open(os.path.join(FIXTURES, name), 'rb') as fh:
+            return fh.read()
+    return read
+
+
+@pytest.fixture
+def closed_port_url():
+    """A base URL nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/'
+
+
+@pytest.fixture
+def asgi_request():
+    """Run one request through asgi.application: ``(method, path, query, headers, body, disconnect_after)``.
+
+    Returns ``(status, headers, body)``; the client stays connected unless ``disconnect_after`` seconds is given.
+    """
+    import asgi
+
+    def request(method, path, query='', headers=(), body=None, disconnect_after=None):
+        scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+                 'headers': [(name.lower().encode(), value.encode()) for name, value in headers]}
+        messages = [] if body is None else [{'type': 'http.request', 'body': json.dumps(body).encode()}]
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            if disconnect_after is None:
+                await asyncio.Event().wait()
+            await asyncio.sleep(disconnect_after)
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        async def run():
+            await asgi.application(scope, receive, send)
+            await asgi.async_scraper.close()
+
+        asyncio.run(run())
+        return sent[0]['status'], dict(sent[0]['headers']), b''.join(m.get('body', b'') for m in sent[1:])
+
+    return request
+
+
+@pytest.fixture
+def asgi_get(asgi_request):
+    def get(path, query='', headers=(), disconnect_after=None):
+        return asgi_request('GET', path, query, headers, disconnect_after=disconnect_after)
+    return get
@@ -0,0 +1,80 @@
+import json
+import threading
+
+import pytest
+
+import app as api
+import asgi
+from cache import MISS
+
+
+def scope(method, path):
+    return {'type': 'http', 'method': method, 'path': path}
+
+
+@pytest.mark.parametrize('method, path, view', [
+    ('POST', '/api/cause-list', asgi.cause_list),
+    ('POST', '/api/check-case', asgi.check_case),
+    ('POST', '/api/download-causelist', asgi.download_cause_list),
+    ('GET', '/api/changes', asgi.get_changes),
+    ('GET', '/api/changes/stream', asgi.stream_changes),
+])
+def test_routes_come_from_the_flask_url_map(method, path, view):
+    rule, matched = asgi.match(scope(method, path))
+    assert matched is view
+    assert rule.rule == path
+
+
+@pytest.mark.parametrize('method, path', [
+    ('GET', '/api/cause-list'),         # Flask only routes POST here, so it answers 405
+    ('OPTIONS', '/api/cause-list'),     # CORS preflight
+    ('HEAD', '/api/changes'),
+    ('POST', '/api/courts'),            # served by Flask alone
+    ('POST', '/api/cause-list/'),
+    ('GET', '/no-such-page'),
+])
+def test_everything_else_goes_to_flask(method, path):
+    assert asgi.match(scope(method, path)) == (None, None)
+
+
+def test_cors_headers_match_the_flask_app(asgi_request):
+    origin = [('Origin', 'https://example.org')]
+    body = {'cnr': 'MHMB01'}
+    status, headers, _ = asgi_request('POST', '/api/check-case', headers=origin, body=body)
+    flask_response = api.app.test_client().post('/api/check-case', json=body, headers=dict(origin))
+    assert status == flask_response.status_code
+    expected = {name.lower().encode(): value.encode() for name, value in flask_response.headers.items()
+                if name.lower().startswith('access-control-')}
+    assert expected
+    assert {name: value for name, value in headers.items() if name.startswith(b'access-control-')} == expected
+
+
+def test_bad_bodies_are_rejected(asgi_request):
+    status, headers, body = asgi_request('POST', '/api/check-case', body=['not', 'an', 'object'])
+    assert status == 400
+    assert json.loads(body)['success'] is False
+    assert b'access-control-allow-origin' in headers
+
+
+def test_blocking_work_runs_off_the_loop(monkeypatch, asgi_request):
+    loop_thread = threading.current_thread()
+    threads = []
+
+    class Disk:
+        def get_entry(self, key):
+            threads.append(('disk get', threading.current_thread()))
+            return None
+
+        def set(self, key, value, ttl):
+            threads.append(('disk set', threading.current_thread()))
+
+    monkeypatch.setattr(api.scraper.cache, 'disk', Disk())
+    monkeypatch.setattr(api.scraper, 'case_listeners',
+                        [lambda *args: threads.append(('listener', threading.current_thread()))])
+    api.scraper.cache.memory.clear()
+    status, _, body = asgi_request('POST', '/api/check-case', body={'caseType': 'CR', 'caseNumber': '7',
+                                                                   'caseYear': '2024'})
+    assert status == 200 and json.loads(body)['success']
+    assert sorted(kind for kind, _ in threads) == ['disk get', 'disk set', 'listener']
+    assert all(thread is not loop_thread for _, thread in threads)
+    assert api.scraper.cache.memory.get(next(iter(api.scraper.cache.memory._data))) is not MISS
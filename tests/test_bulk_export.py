@@ -0,0 +1,40 @@
+import os
+import time
+from datetime import date, timedelta
+
+import pytest
+
+import app as api
+from bulk_export import BulkExporter
+
+
+@pytest.fixture
+def exporter(tmp_path):
+    return BulkExporter(api.scraper, str(tmp_path))
+
+
+def finish(exporter, job_id, hours_ago):
+    complete = os.path.join(exporter.directory, job_id, 'complete.json')
+    with open(complete, 'w') as fh:
+        fh.write('{}')
+    finished_at = time.time() - hours_ago * 3600
+    os.utime(complete, (finished_at, finished_at))
+    return complete
+
+
+@pytest.mark.parametrize('days, hours_ago, rebuilt', [
+    ((-3, 0), 0.5, True),
+    ((-3, -1), 0.5, False),
+    ((-40, -35), 24 * 29, False),
+    ((-40, -35), 24 * 31, True),
+    ((-3, -1), 24 * 2, True),
+    ((1, 2), 0.5, False),
+    ((1, 2), 2, True),
+])
+def test_finished_jobs_are_rebuilt_when_their_newest_list_may_have_changed(exporter, days, hours_ago, rebuilt):
+    dates = [(date.today() + timedelta(days=n)).strftime('%d-%m-%Y') for n in range(days[0], days[1] + 1)]
+    job_id = exporter.create('26', '1', '1', dates)
+    complete = finish(exporter, job_id, hours_ago)
+    assert exporter.create('26', '1', '1', dates) == job_id
+    assert os.path.exists(complete) != rebuilt
+    assert exporter.status(job_id)['total'] == len(dates) * len(api.scraper.directory.courts('26', '1', '1'))
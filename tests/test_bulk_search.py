@@ -0,0 +1,83 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import app as api
+from records import CaseEntry, CauseList
+
+CNR = 'MHMB010024722021'
+
+
+def check_cases(cases, **body):
+    response = api.app.test_client().post('/api/check-cases', json=dict(body, cases=cases))
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.data.splitlines()]
+
+
+@pytest.fixture
+def cause_lists(monkeypatch):
+    """Serve ``rows`` as every court's cause list, bypassing the response cache."""
+    rows = []
+
+    def fetch(state_code, dist_code, complex_code, court_code, date):
+        return {"success": True, "data": {"date": date, "total_cases": len(rows), "cases": CauseList.from_rows(
+            [entry.to_dict() | {"cnr": entry.cnr} for entry in rows])}}
+
+    monkeypatch.setattr(api.scraper, 'get_cause_list', fetch)
+    return rows
+
+
+def test_cnrs_agree_with_check_case_when_lists_carry_no_cnrs():
+    assert len(api.scraper.directory.locate_cnr(CNR)) == 3
+    today = datetime.now().strftime('%d-%m-%Y')
+    single = api.app.test_client().post('/api/check-case', json={'cnr': CNR}).json
+    [bulk] = check_cases([{'cnr': CNR}])
+    assert bulk['success'] and single['success']
+    assert bulk['listed'] == (single['data']['listingDate'] == today)
+    assert bulk['listed']
+
+
+def test_cnrs_are_matched_in_lists_that_carry_them(cause_lists, monkeypatch):
+    cause_lists.append(CaseEntry('7', 'CR/12/2021', 'A vs B', 'Hearing', 'Court Room 2', cnr=CNR))
+    monkeypatch.setattr(api.scraper, '_bulk_lookup', lambda *args: pytest.fail('looked up a case status'))
+    results = {result['query']['cnr']: result for result in check_cases([{'cnr': CNR}, {'cnr': 'MHMB010000012020'}])}
+    assert results[CNR]['listed']
+    assert {listing['serial_no'] for listing in results[CNR]['listings']} == {'7'}
+    assert not results['MHMB010000012020']['listed']
+
+
+def test_each_list_in_the_range_is_fetched_once(cause_lists, monkeypatch):
+    cause_lists.append(CaseEntry('7', 'CR/12/2021', 'A vs B', 'Hearing', 'Court Room 2', cnr=CNR))
+    fetch, fetched = api.scraper.get_cause_list, []
+    monkeypatch.setattr(api.scraper, 'get_cause_list', lambda *key: fetched.append(key) or fetch(*key))
+    results = check_cases([{'cnr': CNR}, {'cnr': f' {CNR.lower()} '}], **{'from': '2026-10-18', 'to': '2026-10-20'})
+    [result] = results
+    courts = api.scraper.directory.courts('26', '1', '1')
+    assert len(set(fetched)) == len(fetched) == 3 * len(courts)
+    assert {listing['date'] for listing in result['listings']} == {'18-10-2026', '19-10-2026', '20-10-2026'}
+    assert len(result['listings']) == len(fetched)
+
+
+def test_case_numbers_in_a_named_court_come_from_its_list():
+    court = {'state_code': '1', 'dist_code': '19', 'complex_code': '1', 'court_code': '1'}
+    year = datetime.now().year - 1
+    results = check_cases([dict(court, caseType='cr', caseNumber='0123', caseYear=str(year)),
+                           dict(court, caseType='CR', caseNumber='999', caseYear=str(year))])
+    listed = {result['query']['caseNumber']: result for result in results}
+    assert listed['0123']['listed'] and listed['0123']['listings'][0]['serial_no'] == '1'
+    assert 'court_code' not in listed['0123']['listings'][0]
+    assert not listed['999']['listed']
+
+
+def test_bad_items_are_reported_one_by_one():
+    results = check_cases([{'cnr': 'MHMB01002472'}, {'caseType': 'CR'}, 'CR/1/2024'])
+    assert [result['success'] for result in results] == [False, False, False]
+    assert any('Invalid CNR' in result['message'] for result in results)
+
+
+def test_requests_without_cases_are_rejected():
+    response = api.app.test_client().post('/api/check-cases', json={'cases': []})
+    assert response.status_code == 400
+    response = api.app.test_client().post('/api/check-cases', json={'cases': [{'cnr': CNR}], 'from': 'tomorrow'})
+    assert response.status_code == 400
@@ -0,0 +1,160 @@
+import threading
+import time
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+import cache
+from cache import (MISS, PAST_TTL, TODAY_TTL, TOMORROW_TTL, UNKNOWN_DATE_TTL, LRUCache, ResponseCache, SingleFlight,
+                   SQLiteCache, date_ttl, parse_date)
+from causelist_engine import CAUSE_LIST_PATH, CauseListKey, cause_list_form
+from transport import Transport
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, 'time', SimpleNamespace(time=clock.time))
+    return clock
+
+
+def test_date_ttl_follows_the_listing_date():
+    today = date(2025, 1, 7)
+    assert date_ttl('06-01-2025', today) == PAST_TTL
+    assert date_ttl('2025-01-07', today) == TODAY_TTL
+    assert date_ttl('08-01-2025', today) == TOMORROW_TTL
+    assert date_ttl('6th January 2025', today) == PAST_TTL
+    assert date_ttl('not a date', today) == UNKNOWN_DATE_TTL
+
+
+def test_parse_date_reads_case_status_dates():
+    assert parse_date('15th January 2024') == date(2024, 1, 15)
+    assert parse_date('1st Feb 2024') == date(2024, 2, 1)
+    assert parse_date('15/01/2024') == date(2024, 1, 15)
+    assert parse_date('') is None
+
+
+def test_memory_entries_expire_after_their_ttl(clock):
+    lru = LRUCache()
+    lru.set('key', {'success': True}, ttl=60)
+    clock.now += 59
+    assert lru.get('key') == {'success': True}
+    clock.now += 2
+    assert lru.get('key') is MISS
+    assert len(lru) == 0
+
+
+def test_memory_is_bounded_by_entries():
+    lru = LRUCache(max_entries=2)
+    for key in 'abc':
+        lru.set(key, key, ttl=60)
+    assert lru.get('a') is MISS
+    assert lru.get('c') == 'c'
+    assert lru.stats()['evictions'] == 1
+
+
+def test_disk_tier_is_shared_and_keeps_the_remaining_ttl(tmp_path, clock):
+    path = str(tmp_path / 'cache.db')
+    first = ResponseCache(LRUCache(), SQLiteCache(path))
+    second = ResponseCache(LRUCache(), SQLiteCache(path))
+    first.set('key', {'success': True}, ttl=100)
+    clock.now += 40
+    assert second.get('key') == {'success': True}
+    clock.now += 59
+    assert second.memory.get('key') == {'success': True}
+    clock.now += 2
+    assert second.get('key') is MISS
+    assert first.get('key') is MISS
+
+
+def test_get_or_fetch_runs_one_fetch_for_concurrent_misses():
+    response_cache = ResponseCache()
+    calls = []
+    barrier = threading.Barrier(8)
+    results = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return {'success': True, 'data': len(calls)}
+
+    def worker():
+        barrier.wait()
+        results.append(response_cache.get_or_fetch('key', 60, fetch))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [{'success': True, 'data': 1}] * 8
+    assert response_cache.flight.coalesced == 7
+
+
+def test_failed_results_are_not_cached():
+    response_cache = ResponseCache()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'success': False, 'message': 'upstream down'}
+
+    response_cache.get_or_fetch('key', 60, fetch)
+    response_cache.get_or_fetch('key', 60, fetch)
+    assert len(calls) == 2
+
+
+def test_single_flight_shares_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError('boom')
+
+    def follower():
+        started.wait()
+        try:
+            flight.do('key', lambda: pytest.fail('follower must not run its own call'))
+        except ValueError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=follower)
+    thread.start()
+    with pytest.raises(ValueError):
+        flight.do('key', fail)
+    thread.join()
+    assert len(errors) == 1
+    assert flight.coalesced == 1
+
+
+def test_concurrent_lookups_reach_upstream_once(simulator):
+    sim, url = simulator(latency=0.2, cases=(3, 3))
+    transport = Transport(rate=0)
+    response_cache = ResponseCache()
+    form = cause_list_form(CauseListKey('1', '1', '1', '1', '07-01-2025'))
+
+    def fetch():
+        response = transport.post(url + CAUSE_LIST_PATH, data=form)
+        return {'success': response.status_code == 200, 'data': response.text}
+
+    threads = [threading.Thread(target=response_cache.get_or_fetch, args=('cause-list', 60, fetch))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert response_cache.get_or_fetch('cause-list', 60, fetch)['success']
+    assert sim.stats['cause_list'] == 1
@@ -0,0 +1,68 @@
+import pytest
+
+from case_history import CaseHistory
+from causelist_engine import CauseListKey
+from parsers import parse_case_status
+from records import CaseDetails, CaseEntry
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = CaseHistory(str(tmp_path / 'case_history.db'), flush_interval=60)
+    yield store
+    store.close()
+
+
+def entry(case_number, serial_no='1', cnr=''):
+    return CaseEntry(serial_no, case_number, 'A vs B', 'Hearing', 'Court Room 1', cnr)
+
+
+def test_case_status_dates_in_the_recorded_format(history, fixture_page):
+    status = parse_case_status(fixture_page('case_status.html'))
+    details = CaseDetails(
+        case_number='CR/1234/2023', court_name=status.court, serial_number='', listing_date=status.next_hearing_date,
+        status=status.stage, checked_on='', source='eCourts Live Database', filing_date=status.filing_date,
+        petitioner=status.petitioner, respondent=status.respondent)
+    history.record_case(status.cnr, None, details)
+    hearings = history.history(cnr=status.cnr)
+    assert [hearing['date'] for hearing in hearings] == ['2024-01-15']
+    assert hearings[0]['source'] == 'case_status'
+    assert hearings[0]['court'] is None
+
+
+def test_cause_list_rows_are_kept_per_court_and_date(history):
+    history.record_cause_list(CauseListKey('1', '19', '1', '2', '07-01-2025'), [entry('CR/12/2024', '4')])
+    history.record_cause_list(CauseListKey('1', '19', '1', '2', '2025-01-08'), [entry('CR/12/2024', '9')])
+    history.record_cause_list(CauseListKey('1', '19', '1', '2', '08-01-2025'), [entry('CR/12/2024', '3')])
+    hearings = history.history(case_number='cr / 12 / 2024')
+    assert [(hearing['date'], hearing['serial_no']) for hearing in hearings] == [
+        ('2025-01-07', '4'), ('2025-01-08', '3')]
+    assert hearings[0]['court'] == {'state_code': '1', 'dist_code': '19', 'complex_code': '1', 'court_code': '2'}
+    assert history.history(case_number='CR/12/2024', start='2025-01-08') == hearings[1:]
+
+
+def test_case_numbers_are_filtered_by_court(history):
+    # The same case number in two districts is two different cases.
+    history.record_cause_list(CauseListKey('1', '19', '1', '2', '07-01-2025'), [entry('CR/12/2024')])
+    history.record_cause_list(CauseListKey('1', '20', '3', '1', '07-01-2025'), [entry('CR/12/2024')])
+    history.record_cause_list(CauseListKey('1', '190', '1', '2', '07-01-2025'), [entry('CR/12/2024')])
+    assert len(history.history(case_number='CR/12/2024')) == 3
+    courts = [hearing['court']['dist_code'] for hearing in history.history(case_number='CR/12/2024',
+                                                                           court=('1', '19'))]
+    assert courts == ['19']
+    assert len(history.history(case_number='CR/12/2024', court=('1', '20', '3', '1'))) == 1
+    assert history.history(case_number='CR/12/2024', court=('2',)) == []
+
+
+def test_cnr_rows_are_keyed_on_the_cnr(history):
+    history.record_cause_list(CauseListKey('1', '19', '1', '2', '07-01-2025'),
+                              [entry('CR/12/2024', cnr='MHMB010000122024')])
+    assert len(history.history(cnr='MHMB010000122024')) == 1
+    assert history.stats()['rows_written'] == 1
+
+
+def test_a_lookup_needs_a_case(history):
+    with pytest.raises(ValueError):
+        history.history()
+    with pytest.raises(ValueError):
+        history.history(case_number='CR/12/2024', start='not a date')
@@ -0,0 +1,148 @@
+import pickle
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+
+import case_index
+from case_index import CaseIndex
+from records import CaseEntry, CauseList
+
+
+def day(offset=0):
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+def cases(*case_numbers, cnr=''):
+    return CauseList.from_rows(CaseEntry(str(n + 1), case_number, 'Raj Kumar vs State', 'Hearing', 'Room 1', cnr)
+                               for n, case_number in enumerate(case_numbers))
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'case_index.log')
+
+
+def test_case_numbers_are_looked_up_within_a_court():
+    index = CaseIndex()
+    index.ingest(('1', '19', '1', '2'), day(), cases('CR/12/2024'))
+    index.ingest(('1', '20', '3', '1'), day(), cases('CR/12/2024', 'CR/13/2024'))
+    assert len(index.lookup_case('cr/012/2024', day())) == 2
+    [listing] = index.lookup_case('CR/12/2024', day(), ('1', '20', '3', '1'))
+    assert listing.court == ('1', '20', '3', '1')
+    assert len(index.lookup_case('CR/12/2024', day(), (1, 19))) == 1
+    assert index.lookup_case('CR/12/2024', day(), ('2',)) == []
+    assert index.lookup_case('CR/12/2024', day(1), ('1', '19')) == []
+
+
+def test_reingesting_a_list_supersedes_it():
+    index = CaseIndex()
+    court = ('1', '19', '1', '2')
+    assert index.ingest(court, day(), cases('CR/12/2024'))
+    assert not index.ingest(court, day(), cases('CR/12/2024'))
+    assert index.ingest(court, day(), cases('CR/14/2024'))
+    assert index.lookup_case('CR/12/2024', day(), court) == []
+    assert index.stats()['superseded_rows'] == 1
+
+
+def test_lists_older_than_the_retention_are_not_kept(log_path):
+    court = ('1', '19', '1', '2')
+    index = CaseIndex(log_path, retention_days=0)
+    index.ingest(court, day(-10), cases('CR/1/2024'))
+    index.ingest(court, day(), cases('CR/2/2024'))
+    size = len(open(log_path, 'rb').read())
+
+    reloaded = CaseIndex(log_path, retention_days=5)
+    assert reloaded.lookup_case('CR/1/2024', day(-10), court) == []
+    assert len(reloaded.lookup_case('CR/2/2024', day(), court)) == 1
+    assert reloaded.stats()['lists'] == 1
+    # The startup replay rewrote the log without the expired list.
+    assert len(open(log_path, 'rb').read()) < size
+    assert not reloaded.ingest(court, day(-6), cases('CR/3/2024'))
+
+
+def test_expiry_follows_the_calendar(monkeypatch):
+    court = ('1', '19', '1', '2')
+    index = CaseIndex(retention_days=5)
+    index.ingest(court, day(-5), cases('CR/1/2024'))
+    monkeypatch.setattr(index, '_cutoff', lambda: day(-4))
+    index.ingest(court, day(), cases('CR/2/2024'))
+    assert index.lookup_case('CR/1/2024', day(-5), court) == []
+    assert index.stats()['lists'] == 1
+
+
+def test_compaction_keeps_other_workers_appends(log_path):
+    court = ('1', '19', '1', '2')
+    first = CaseIndex(log_path)
+    second = CaseIndex(log_path)
+    first.ingest(court, day(), cases('CR/1/2024'))
+    second.ingest(court, day(1), cases('CR/2/2024'))
+    first.ingest(court, day(), cases('CR/3/2024'))
+    first._compact()
+    # The other worker's log descriptor points at the replaced file until it reopens.
+    second.ingest(court, day(2), cases('CR/4/2024'))
+
+    reloaded = CaseIndex(log_path)
+    assert reloaded.lookup_case('CR/1/2024', day(), court) == []
+    for case_number, offset in (('CR/2/2024', 1), ('CR/3/2024', 0), ('CR/4/2024', 2)):
+        assert len(reloaded.lookup_case(case_number, day(offset), court)) == 1
+    assert reloaded.stats()['superseded_rows'] == 0
+    assert len(first.lookup_case('CR/2/2024', day(1), court)) == 1
+
+
+def test_lists_other_workers_append_are_found(log_path):
+    court = ('1', '19', '1', '2')
+    first = CaseIndex(log_path, sync_interval=0)
+    second = CaseIndex(log_path, sync_interval=0)
+    second.ingest(court, day(), cases('CR/1/2024', cnr='MHMB010000012024'))
+    assert [listing.entry.case_number for listing in first.lookup_cnr('MHMB010000012024')] == ['CR/1/2024']
+    second.ingest(court, day(), cases('CR/2/2024'))
+    assert first.lookup_case('CR/1/2024', day(), court) == []
+    assert len(first.search_parties('raj kumar', day())) == 1
+
+    # After the other worker compacts, the log is a new file, read from the start.
+    second._compact()
+    second.ingest(court, day(1), cases('CR/3/2024'))
+    assert len(first.lookup_case('CR/3/2024', day(1), court)) == 1
+    assert first.stats() == second.stats()
+
+
+def test_compaction_runs_off_the_ingesting_thread(log_path, monkeypatch):
+    monkeypatch.setattr(case_index, 'COMPACT_MIN_ROWS', 0)
+    monkeypatch.setattr(case_index, 'COMPACT_RATIO', 0)
+    court = ('1', '19', '1', '2')
+    index = CaseIndex(log_path)
+    release = threading.Event()
+    rewrite = index._rewrite
+    monkeypatch.setattr(index, '_rewrite', lambda lists: release.wait(5) and rewrite(lists))
+
+    index.ingest(court, day(), cases('CR/1/2024'))
+    assert index.ingest(court, day(), cases('CR/2/2024'))
+    assert index._compacting
+    assert len(index.lookup_case('CR/2/2024', day(), court)) == 1
+    release.set()
+    deadline = time.monotonic() + 5
+    while index._compacting and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index.stats()['superseded_rows'] == 0
+    assert len(index.lookup_case('CR/2/2024', day(), court)) == 1
+    assert CaseIndex(log_path).stats()['lists'] == 1
+
+
+def test_a_torn_tail_is_cut_off(log_path):
+    court = ('1', '19', '1', '2')
+    CaseIndex(log_path).ingest(court, day(), cases('CR/1/2024', cnr='MHMB010000012024'))
+    with open(log_path, 'ab') as fh:
+        fh.write(pickle.dumps((court, day(1), cases('CR/2/2024')))[:-7])
+    reloaded = CaseIndex(log_path)
+    assert [listing.entry.case_number for listing in reloaded.lookup_cnr('MHMB010000012024')] == ['CR/1/2024']
+    reloaded.ingest(court, day(1), cases('CR/2/2024'))
+    assert CaseIndex(log_path).stats()['lists'] == 2
+
+
+def test_cause_lists_pickle_with_their_columns():
+    original = cases('CR/1/2024', 'CR/2/2024', cnr='MHMB010000012024')
+    copy = pickle.loads(pickle.dumps(original, pickle.HIGHEST_PROTOCOL))
+    assert copy == original
+    assert copy.cnr == ['MHMB010000012024'] * 2
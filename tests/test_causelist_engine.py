@@ -0,0 +1,171 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from causelist_engine import CAUSE_LIST_PATH, CauseListEngine, CauseListKey, cause_list_form
+from parsers import parse_cause_list
+from transport import DeadlineExceeded, Transport
+
+
+def keys(count, day='07-01-2025'):
+    return [CauseListKey('1', '1', '1', str(court), day) for court in range(1, count + 1)]
+
+
+async def collect(engine, keys):
+    return [item async for item in engine.stream(keys)]
+
+
+def test_stream_fetches_every_key_with_bounded_concurrency(simulator):
+    sim, url = simulator(latency=0.02, cases=(3, 12))
+    engine = CauseListEngine(base_url=url, concurrency=4, rate=0)
+    results = dict(asyncio.run(collect(engine, keys(30))))
+    assert set(results) == set(keys(30))
+    for key, result in results.items():
+        assert result['success']
+        assert result['data']['total_cases'] == len(parse_cause_list(sim.cause_list_page(cause_list_form(key))))
+    assert sim.stats['cause_list'] == 30
+    assert engine.metrics.max_in_flight <= 4
+
+
+def test_keys_are_consumed_lazily(simulator):
+    _, url = simulator(cases=(1, 1))
+    engine = CauseListEngine(base_url=url, concurrency=2, rate=0)
+    taken = []
+
+    def generate():
+        for key in keys(10):
+            taken.append(key)
+            yield key
+
+    async def first():
+        stream = engine.stream(generate())
+        try:
+            return await stream.__anext__()
+        finally:
+            await stream.aclose()
+
+    asyncio.run(first())
+    assert len(taken) <= 3
+
+
+def test_failures_are_reported_per_key(simulator):
+    sim, url = simulator(error_rate=0.3, cases=(2, 2))
+    engine = CauseListEngine(base_url=url, concurrency=8, rate=0, max_retries=0)
+    results = dict(asyncio.run(collect(engine, keys(40))))
+    failed = [result for result in results.values() if not result['success']]
+    assert len(results) == 40
+    assert len(failed) == sim.stats['errors'] > 0
+    assert all(result['message'] for result in failed)
+    assert any(result['success'] for result in results.values())
+
+
+def test_retries_recover_errors(simulator):
+    sim, url = simulator(error_rate=0.3, cases=(2, 2))
+    engine = CauseListEngine(base_url=url, concurrency=8, rate=0, max_retries=8, backoff_base=0.001,
+                             backoff_max=0.001)
+    results = dict(asyncio.run(collect(engine, keys(40))))
+    assert all(result['success'] for result in results.values())
+    assert engine.metrics.retries == sim.stats['errors'] > 0
+
+
+def test_closing_the_stream_cancels_outstanding_fetches(simulator):
+    sim, url = simulator(latency=0.3, cases=(1, 1))
+    engine = CauseListEngine(base_url=url, concurrency=4, rate=0)
+
+    async def first_then_close():
+        stream = engine.stream(keys(20))
+        await stream.__anext__()
+        await stream.aclose()
+        started = sim.stats['cause_list']
+        await asyncio.sleep(0.5)
+        return started
+
+    started = asyncio.run(first_then_close())
+    assert started <= 4
+    assert sim.stats['cause_list'] == started
+    assert engine.metrics.in_flight == 0
+
+
+def test_cancelling_the_consumer_cancels_outstanding_fetches(simulator):
+    sim, url = simulator(latency=0.3, cases=(1, 1))
+    engine = CauseListEngine(base_url=url, concurrency=4, rate=0)
+
+    async def run():
+        task = asyncio.ensure_future(collect(engine, keys(20)))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.5)
+
+    asyncio.run(run())
+    assert sim.stats['cause_list'] == 4
+    assert engine.metrics.in_flight == 0
+
+
+def test_a_transports_host_slots_cap_the_engine(simulator):
+    _, url = simulator(latency=0.1, cases=(1, 1))
+    transport = Transport(per_host_limit=2, rate=0)
+    engine = CauseListEngine(base_url=url, concurrency=16, rate=0)
+    engine.host_slot = transport.async_host_slot
+    results = dict(asyncio.run(collect(engine, keys(8))))
+    assert all(result['success'] for result in results.values())
+    assert transport.metrics.max_in_flight == 2
+    assert transport.metrics.host_waits > 0
+
+
+def test_the_deadline_covers_slot_waits_and_retries(simulator):
+    _, url = simulator(error_rate=1.0, cases=(1, 1))
+    engine = CauseListEngine(base_url=url, rate=0, max_retries=20, backoff_base=0.1, backoff_max=0.1, deadline=0.5)
+
+    async def post():
+        async with engine.session() as session:
+            return await engine.post_html(session, CAUSE_LIST_PATH, cause_list_form(keys(1)[0]))
+
+    # The last retry may start with little time left, so it can end as upstream's error, a timeout or the deadline.
+    started = time.monotonic()
+    with pytest.raises((aiohttp.ClientResponseError, asyncio.TimeoutError, DeadlineExceeded)):
+        asyncio.run(post())
+    assert time.monotonic() - started < 1.0
+    deadline_exceeded = engine.metrics.deadline_exceeded
+
+    transport = Transport(per_host_limit=1, rate=0)
+    engine.host_slot = transport.async_host_slot
+    transport._host_semaphore(url.split('/')[2]).acquire()
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(post())
+    assert 0.4 < time.monotonic() - started < 1.0
+    assert engine.metrics.deadline_exceeded == deadline_exceeded + 1
+
+
+def test_requests_send_only_their_own_cookies():
+    async def rotate(request):
+        lease = request.cookies.get('lease', '-')
+        response = web.Response(text=lease)
+        response.set_cookie('lease', lease + '+')
+        return response
+
+    async def run():
+        app = web.Application()
+        app.router.add_post('/rotate', rotate)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        engine = CauseListEngine(base_url=f'http://127.0.0.1:{port}/', rate=0)
+        received = []
+        try:
+            async with engine.session(cookie_jar=aiohttp.DummyCookieJar()) as session:
+                return [await engine.post_html(session, 'rotate', {}, cookies, received.append)
+                        for cookies in ({'lease': 'a'}, {'lease': 'b'}, None)], received
+        finally:
+            await runner.cleanup()
+
+    bodies, received = asyncio.run(run())
+    assert bodies == ['a', 'b', '-']
+    assert received == [{'lease': 'a+'}, {'lease': 'b+'}, {'lease': '-+'}]
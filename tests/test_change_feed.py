@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+from datetime import date
+
+import pytest
+
+import app as api
+from causelist_engine import CauseListKey
+from records import CaseEntry, CauseList
+
+
+def record_change(court_code):
+    key = CauseListKey('1', '19', '1', court_code, date.today().isoformat())
+    return api.cause_list_store.record(key, CauseList.from_rows(
+        [CaseEntry('1', f'CR/{time.monotonic_ns()}/2024', 'A vs B', 'Hearing', 'Room 1')]))
+
+
+def latest_seq():
+    return api.cause_list_store._connect().execute('SELECT COALESCE(MAX(seq), 0) FROM changes').fetchone()[0]
+
+
+@pytest.fixture
+def one_slot(monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(api, 'changes_slots', slots)
+    return slots
+
+
+def test_long_polls_beyond_the_cap_answer_at_once(one_slot):
+    client = api.app.test_client()
+    assert one_slot.acquire(blocking=False)
+    started = time.monotonic()
+    response = client.get(f'/api/changes?since={latest_seq()}&wait=5')
+    assert response.json['data']['changes'] == []
+    assert time.monotonic() - started < 2
+    one_slot.release()
+
+
+def test_streams_beyond_the_cap_get_503(one_slot):
+    client = api.app.test_client()
+    response = client.get('/api/changes/stream', buffered=False)
+    assert response.status_code == 200
+    busy = client.get('/api/changes/stream')
+    assert busy.status_code == 503
+    assert busy.headers['Retry-After'] == '5'
+    response.close()
+    # Closing the first stream frees its slot.
+    assert one_slot.acquire(blocking=False)
+    one_slot.release()
+
+
+def test_asgi_long_poll_returns_new_events(asgi_get):
+    since = latest_seq()
+    timer = threading.Timer(0.3, record_change, ('5',))
+    timer.start()
+    started = time.monotonic()
+    status, _, body = asgi_get('/api/changes', f'since={since}&wait=10')
+    timer.join()
+    assert status == 200
+    data = json.loads(body)['data']
+    assert [event['court']['court_code'] for event in data['changes']] == ['5']
+    assert data['next'] > since
+    assert time.monotonic() - started < 5
+
+
+def test_asgi_long_poll_times_out_empty(asgi_get):
+    status, _, body = asgi_get('/api/changes', f'since={latest_seq()}&wait=0.2')
+    assert status == 200
+    assert json.loads(body)['data']['changes'] == []
+
+
+def test_asgi_rejects_bad_feed_arguments(asgi_get):
+    status, _, body = asgi_get('/api/changes', 'since=x')
+    assert status == 400
+    assert json.loads(body)['success'] is False
+
+
+def test_asgi_stream_sends_events_until_the_client_leaves(asgi_get):
+    since = latest_seq()
+    record_change('6')
+    status, headers, body = asgi_get('/api/changes/stream', '', [('Last-Event-ID', str(since))],
+                                 disconnect_after=0.5)
+    assert status == 200
+    assert headers[b'content-type'].startswith(b'text/event-stream')
+    text = body.decode()
+    assert text.startswith('retry: 2000')
+    assert 'event: cause_list_diff' in text
+    assert f'id: {since + 1}' in text
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+import cnr
+from cnr import CNR, InvalidCNR, invalid_indexes, is_valid, normalize, parse
+
+
+def test_parse_splits_the_fields():
+    assert parse(' mhmb010024722021 ') == CNR('MH', 'MB', '01', '002472', 2021)
+
+
+@pytest.mark.parametrize('text, reason', [
+    ('MHMB0100247220', 'must be 16 characters'),
+    ('MH1B010024722021', 'must start with a 4-letter'),
+    ('MHMB01002472202X', 'must end with 12 digits'),
+    ('MHMB010024721821', 'implausible year'),
+    ('MHMB01002472202١', 'must be ASCII'),
+])
+def test_parse_says_what_is_wrong(text, reason):
+    with pytest.raises(InvalidCNR, match=reason):
+        parse(text)
+    assert not is_valid(normalize(text))
+
+
+def test_batch_check_matches_the_one_by_one_check():
+    rng = random.Random(7)
+    valid = 'MHMB010024722021'
+    mutations = [
+        lambda s: s[:-1],
+        lambda s: s + '1',
+        lambda s: s[:5] + 'X' + s[6:],
+        lambda s: s[:12] + '18' + s[14:],
+        lambda s: s[:3] + '\n' + s[4:],
+        lambda s: s[:7] + 'é' + s[8:],
+        lambda s: '',
+    ]
+    for size in (1, 5, cnr.BLOCK - 1, cnr.BLOCK, cnr.BLOCK + 3, 3 * cnr.BLOCK):
+        cnrs = [valid] * size
+        for n in rng.sample(range(size), min(size, 40)):
+            cnrs[n] = rng.choice(mutations)(valid)
+        assert invalid_indexes(cnrs) == [n for n, value in enumerate(cnrs) if not is_valid(value)]
+
+
+def test_batch_check_rejects_non_strings():
+    assert invalid_indexes(['MHMB010024722021', None, 'MHMB010024722021', 42]) == [1, 3]
@@ -0,0 +1,75 @@
+from datetime import date
+
+import pytest
+
+from cache import parse_date
+from parsers import (CAUSE_LIST_BACKENDS, SelectolaxParser, ParseError, is_captcha_page, parse_case_status,
+                     parse_cause_list, parse_cause_list_bs4, parse_cause_list_lxml)
+from simulator import CAPTCHA_BODY, PAGE, ECourtsSimulator
+
+BACKENDS = [name for name in CAUSE_LIST_BACKENDS if name != 'selectolax' or SelectolaxParser is not None]
+
+
+def simulator_pages():
+    sim = ECourtsSimulator(cases=(0, 60))
+    for court in range(1, 9):
+        yield sim.cause_list_page({'state_code': '1', 'dist_code': '19', 'court_complex_code': '1',
+                                   'court_code': str(court), 'causelist_date': '07-01-2025'})
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_backends_agree_on_simulator_pages(backend):
+    for page in simulator_pages():
+        expected = parse_cause_list_lxml(page)
+        assert CAUSE_LIST_BACKENDS[backend](page) == expected
+        assert CAUSE_LIST_BACKENDS[backend](page.encode('utf-8')) == expected
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_backends_agree_on_the_recorded_page(backend, fixture_page):
+    page = fixture_page('cause_list_small.html')
+    cases = CAUSE_LIST_BACKENDS[backend](page)
+    assert cases == parse_cause_list_lxml(page)
+    assert cases and all(case.case_number for case in cases)
+
+
+def test_malformed_markup_falls_back_to_bs4(fixture_page):
+    page = fixture_page('cause_list_malformed.html')
+    with pytest.raises(ParseError):
+        parse_cause_list_lxml(page)
+    cases = parse_cause_list(page)
+    assert cases == parse_cause_list_bs4(page)
+    assert cases
+
+
+def test_cnrs_come_from_the_row_links():
+    page = next(simulator_pages())
+    cases = parse_cause_list(page)
+    assert cases and all(len(case.cnr) == 16 for case in cases)
+
+
+def test_captcha_pages_are_recognised():
+    assert is_captcha_page(PAGE.format(title='Captcha', body=CAPTCHA_BODY))
+    assert not is_captcha_page(next(simulator_pages()))
+
+
+def test_case_status_from_the_recorded_page(fixture_page):
+    status = parse_case_status(fixture_page('case_status.html'))
+    assert status.cnr == 'MHMB010012342023'
+    assert status.next_hearing_date == '15th January 2024'
+    assert parse_date(status.next_hearing_date) == date(2024, 1, 15)
+    assert status.petitioner.startswith('1) State of Maharashtra')
+
+
+def test_case_status_from_the_simulator():
+    sim = ECourtsSimulator()
+    status = parse_case_status(sim.case_status_page({'action_type': 'CASENO', 'case_type': 'CR',
+                                                     'case_no': '12', 'rgyear': '2024'}))
+    assert status.case_type == 'CR'
+    assert parse_date(status.next_hearing_date).year == 2025
+
+
+def test_missing_case_raises_parse_error():
+    page = ECourtsSimulator(not_found_rate=1.0).case_status_page({'action_type': 'CNR', 'cnr_no': 'X' * 16})
+    with pytest.raises(ParseError):
+        parse_case_status(page)
@@ -0,0 +1,94 @@
+import io
+import os
+import re
+import struct
+
+import pytest
+
+import pdf_renderer
+from pdf_renderer import FONTS, TrueTypeFont, _Widths, can_render, cause_list_page_contents, cause_list_pdf, merged_pdf
+
+pypdf = pytest.importorskip('pypdf')
+
+DEJAVU = next((path for path in pdf_renderer.UNICODE_FONTS
+               if path.endswith('DejaVuSans.ttf') and os.path.exists(path)), None)
+
+
+@pytest.fixture
+def dejavu_only(monkeypatch):
+    """Render with DejaVu Sans as the only Unicode font: it has Cyrillic and Greek but no Indic scripts."""
+    if DEJAVU is None:
+        pytest.skip('DejaVu Sans is not installed')
+    monkeypatch.setattr(pdf_renderer, '_unicode_fonts', [[TrueTypeFont(DEJAVU)]])
+    monkeypatch.setattr(pdf_renderer, '_font_for', {})
+    for name, (base_font, widths) in list(FONTS.items()):
+        table = [widths[chr(32 + n)] for n in range(95)]
+        monkeypatch.setitem(FONTS, name, (base_font, _Widths(table)))
+
+
+def rows(parties):
+    return [{'serial_no': str(n + 1), 'case_number': f'CS/{n + 1}/2024', 'parties': party,
+             'purpose': 'Hearing', 'court_room': 'Court 1'} for n, party in enumerate(parties)]
+
+
+def text_of(data):
+    return ''.join(page.extract_text() for page in pypdf.PdfReader(io.BytesIO(data)).pages)
+
+
+def test_non_latin_rows_are_drawn_and_extract_back(dejavu_only):
+    cases = rows(['Иван Петров vs Мария', 'Ramesh Kumar vs State', 'Αθηνά vs Νίκος'])
+    assert can_render(pdf_renderer.cause_list_texts(cases))
+    data = b''.join(cause_list_pdf('18-10-2026', cases, len(cases), '2026-10-18 10:00:00'))
+    text = text_of(data)
+    for party in ('Иван Петров', 'Мария', 'Ramesh Kumar', 'Αθηνά', 'Νίκος'):
+        assert party in text
+
+
+def test_only_the_glyphs_used_are_embedded(dejavu_only):
+    cases = rows(['Иван Петров vs Мария'] * 300)
+    data = b''.join(cause_list_pdf('18-10-2026', cases, len(cases), '2026-10-18 10:00:00'))
+    embedded = int(re.search(rb'/Length1 (\d+) /Filter /FlateDecode', data)[1])
+    assert embedded < os.path.getsize(DEJAVU) / 5
+    assert len(data) < 200_000
+
+
+def test_text_no_font_covers_is_not_rendered_natively(dejavu_only):
+    assert can_render(['Иван', 'Ramesh', 'Αθηνά'])
+    assert not can_render(['Ramesh', 'राम प्रसाद'])
+    assert not can_render(['முருகன்'])
+
+
+def test_merged_pdf_embeds_fonts_used_by_page_contents(dejavu_only):
+    contents = cause_list_page_contents('18-10-2026', rows(['Иван Петров vs Мария']), 1, '2026-10-18 10:00:00')
+    data = b''.join(merged_pdf([('Court 1 - 18-10-2026', contents)]))
+    assert 'Иван Петров' in text_of(data)
+
+
+def test_uncovered_cause_lists_fall_back_to_wkhtmltopdf(dejavu_only, monkeypatch):
+    import app as api
+    rendered = []
+    monkeypatch.setattr(api, 'html_to_pdf', lambda chunks: rendered.append(''.join(chunks)) or b'%PDF-wkhtmltopdf')
+    data = {'cases': rows(['राम प्रसाद vs State']), 'total_cases': 1}
+    _, pdf_data = api.cause_list_pdf_artifact('17-10-2026', data)
+    assert pdf_data == b'%PDF-wkhtmltopdf'
+    assert 'राम प्रसाद' in rendered[0]
+
+    data = {'cases': rows(['Иван Петров vs State']), 'total_cases': 1}
+    _, pdf_data = api.cause_list_pdf_artifact('17-10-2026', data)
+    assert 'Иван Петров' in text_of(pdf_data)
+
+
+def test_subset_keeps_the_parts_of_composite_glyphs(dejavu_only):
+    font = pdf_renderer.unicode_fonts()[0]
+    composite = font.cmap['Ǻ']
+    parts = font._components(font._outline(composite))
+    assert parts
+    subset = font.subset([composite])
+    tables = {}
+    for n in range(struct.unpack_from('>H', subset, 4)[0]):
+        tag, _, offset, length = struct.unpack_from('>4sIII', subset, 12 + 16 * n)
+        tables[tag] = subset[offset:offset + length]
+    assert b'cmap' not in tables and b'GSUB' not in tables
+    loca = struct.unpack('>%dI' % (len(tables[b'loca']) // 4), tables[b'loca'])
+    drawn = {glyph for glyph in range(font.num_glyphs) if loca[glyph + 1] > loca[glyph]}
+    assert drawn == {0, composite, *parts}
@@ -0,0 +1,69 @@
+from datetime import date
+from types import SimpleNamespace
+
+import prewarm
+from prewarm import PrewarmCrawler
+
+
+class Scraper:
+    def __init__(self, disk=None, courts=(('1', '19', '1', '1'), ('1', '19', '1', '2'))):
+        self.cache = SimpleNamespace(disk=disk)
+        self.directory = SimpleNamespace(court_keys=lambda: list(courts))
+        self.fetched = []
+
+    def get_cause_list(self, *args):
+        self.fetched.append(args)
+        return {"success": True}
+
+
+def test_start_needs_the_shared_disk_cache(tmp_path):
+    crawler = PrewarmCrawler(Scraper(), path=str(tmp_path / 'prewarm.db'))
+    crawler.start()
+    assert crawler._thread is None
+    assert crawler.status()['state'] == 'stopped'
+
+
+def test_cli_refuses_without_the_shared_disk_cache(monkeypatch, capsys):
+    import app
+    monkeypatch.setattr(app.scraper.cache, 'disk', None)
+    assert prewarm.main(['--date', '2025-01-07']) == 2
+    assert 'RESPONSE_CACHE_PATH' in capsys.readouterr().err
+
+
+def test_crawl_fetches_each_court_once_busiest_first(tmp_path):
+    scraper = Scraper(disk=object())
+    crawler = PrewarmCrawler(scraper, path=str(tmp_path / 'prewarm.db'), rate=1000)
+    crawler.record_request('1', '19', '1', '2')
+    day = date(2025, 1, 7)
+    assert crawler.crawl(day) == 2
+    assert crawler.crawl(day) == 0
+    # Fetched through the scraper's own caching, so the day's date_ttl applies.
+    assert scraper.fetched == [('1', '19', '1', '2', '07-01-2025'), ('1', '19', '1', '1', '07-01-2025')]
+    status = crawler.status(day)
+    assert (status['done'], status['remaining']) == (2, 0)
+
+
+def test_only_one_worker_crawls(tmp_path):
+    path = str(tmp_path / 'prewarm.db')
+    leader = PrewarmCrawler(Scraper(disk=object()), path=path)
+    follower = PrewarmCrawler(Scraper(disk=object()), path=path)
+    assert leader._lead()
+    assert leader._lead()
+    assert not follower._lead()
+    leader._lock_file.close()
+    assert follower._lead()
+
+
+def test_lists_the_crawl_fetches_reach_every_workers_index(tmp_path):
+    from app import ECourtsScraper
+    from cache import ResponseCache
+    from case_index import CaseIndex
+    log = str(tmp_path / 'case_index.log')
+    court = ('1', '19', '1', '2')
+    scraper = ECourtsScraper(directory=SimpleNamespace(court_keys=lambda: [court]), cache=ResponseCache(),
+                             index=CaseIndex(log))
+    other_worker = CaseIndex(log, sync_interval=0)
+    day = date.today()
+    assert PrewarmCrawler(scraper, path=str(tmp_path / 'prewarm.db'), rate=1000).crawl(day) == 1
+    [listing] = other_worker.lookup_case(f'CR/123/{day.year - 1}', day.isoformat(), court)
+    assert listing.entry.serial_no == '1'
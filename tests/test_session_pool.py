@@ -0,0 +1,200 @@
+import threading
+import time
+
+import pytest
+
+from causelist_engine import CAPTCHA_FIELD, CAUSE_LIST_PATH, CauseListKey, cause_list_form
+from parsers import is_captcha_page, parse_cause_list
+from session_pool import NO_SESSION, SessionPool, SessionUnavailable, StubSolver, UpstreamSession, ecourts_login
+from transport import Transport
+
+
+class Login:
+    """A ``login()`` that hands out numbered sessions, optionally slowly or failing."""
+
+    def __init__(self, delay=0.0, fail=0):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            n = self.calls
+        if self.delay:
+            time.sleep(self.delay)
+        if n <= self.fail:
+            raise ConnectionError("login refused")
+        return object(), f'answer{n}'
+
+
+def test_first_lease_logs_in_inline():
+    pool = SessionPool(Login(), size=2)
+    with pool.lease() as session:
+        assert session.captcha == 'answer1'
+        assert session.form({'a': '1'}) == {'a': '1', 'fcaptcha_code': 'answer1'}
+    stats = pool.stats()
+    assert stats['inline_logins'] == 1
+    assert stats['leases'] == 1
+
+
+def test_concurrent_first_leases_share_one_login():
+    login = Login(delay=0.2)
+    pool = SessionPool(login, size=1, ttl=60)
+    sessions = []
+    barrier = threading.Barrier(8)
+
+    def lease():
+        barrier.wait()
+        session = pool.acquire(timeout=5)
+        sessions.append(session)
+        pool.release(session)
+
+    threads = [threading.Thread(target=lease) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert login.calls == 1
+    assert len({id(session) for session in sessions}) == 1
+    stats = pool.stats()
+    assert stats['inline_logins'] == 1
+    assert stats['waits'] >= 1
+    assert stats['reused'] == 7
+
+
+def test_lease_takes_the_least_used_session():
+    pool = SessionPool(Login(), size=2, ttl=60)
+    first = pool.acquire()
+    deadline = time.monotonic() + 5
+    while pool.stats()['live'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    second = pool.acquire()
+    assert second is not first
+    pool.release(first)
+    assert pool.acquire() is first
+    assert pool.stats()['reused'] == 1
+    assert pool.stats()['in_use'] == 2
+
+
+def test_invalidate_drops_the_session():
+    login = Login()
+    pool = SessionPool(login, size=1, ttl=60)
+    with pool.lease() as session:
+        pass
+    pool.invalidate(session)
+    pool.invalidate(session)
+    assert pool.stats()['invalidated'] == 1
+    with pool.lease() as replacement:
+        assert replacement is not session
+    assert login.calls >= 2
+
+
+def test_since_skips_sessions_logged_in_before_it():
+    pool = SessionPool(Login(), size=1, ttl=60)
+    with pool.lease() as old:
+        pass
+    rejected_at = time.monotonic()
+    with pool.lease(since=rejected_at) as fresh:
+        assert fresh is not old
+        assert fresh.started >= rejected_at
+
+
+def test_size_zero_hands_out_no_session():
+    login = Login()
+    pool = SessionPool(login, size=0)
+    assert pool.acquire() is NO_SESSION
+    assert pool.try_acquire() is NO_SESSION
+    pool.release(NO_SESSION)
+    pool.invalidate(NO_SESSION)
+    assert NO_SESSION.form({'a': '1'}) == {'a': '1'}
+    assert login.calls == 0
+
+
+def test_try_acquire_does_not_block_before_a_login():
+    pool = SessionPool(Login(delay=0.5), size=1, ttl=60)
+    assert pool.try_acquire() is None
+
+
+def test_acquire_times_out_behind_a_slow_login():
+    pool = SessionPool(Login(delay=1.0), size=1, ttl=60)
+    holder = threading.Thread(target=pool.acquire)
+    holder.start()
+    time.sleep(0.1)
+    with pytest.raises(SessionUnavailable):
+        pool.acquire(timeout=0.1)
+    holder.join()
+
+
+def test_login_failures_are_counted_and_raised():
+    pool = SessionPool(Login(fail=1), size=1, ttl=60, retry_interval=60)
+    with pytest.raises(ConnectionError):
+        pool.acquire()
+    stats = pool.stats()
+    assert stats['login_failures'] >= 1
+    assert stats['last_error'] == 'login refused'
+
+
+def test_sessions_are_refreshed_before_they_expire():
+    login = Login()
+    pool = SessionPool(login, size=1, ttl=0.6, refresh_margin=0.3, retry_interval=0.05)
+    with pool.lease() as first:
+        pass
+    time.sleep(0.5)
+    with pool.lease() as current:
+        assert current is not first
+    stats = pool.stats()
+    assert stats['refreshes'] >= 1
+    assert stats['live'] >= 1
+
+
+def test_from_env_without_a_solver_turns_pooling_off(monkeypatch):
+    monkeypatch.delenv('ECOURTS_CAPTCHA_SOLVER', raising=False)
+    monkeypatch.setenv('ECOURTS_SESSIONS', '4')
+    pool = SessionPool.from_env(Transport(), 'http://127.0.0.1/')
+    assert pool.size == 0
+    assert pool.acquire() is NO_SESSION
+
+
+def test_from_env_with_the_stub_solver(monkeypatch):
+    monkeypatch.setenv('ECOURTS_CAPTCHA_SOLVER', 'stub')
+    monkeypatch.setenv('ECOURTS_SESSIONS', '2')
+    monkeypatch.setenv('ECOURTS_SESSION_TTL', '30')
+    pool = SessionPool.from_env(Transport(), 'http://127.0.0.1/')
+    assert (pool.size, pool.ttl) == (2, 30.0)
+
+
+def test_pooled_sessions_pass_the_simulator(simulator):
+    sim, base_url = simulator(cases=(5, 5), session_ttl=60)
+    transport = Transport(rate=0)
+    pool = SessionPool(ecourts_login(transport, base_url, StubSolver()), size=1, ttl=60)
+    for court in range(1, 6):
+        form = cause_list_form(CauseListKey('1', '1', '1', str(court), '07-01-2025'))
+        with pool.lease() as session:
+            response = transport.post(base_url + CAUSE_LIST_PATH, data=session.form(form), session=session.http)
+        assert not is_captcha_page(response.content)
+        assert len(parse_cause_list(response.content)) == 5
+    assert pool.stats()['logins'] == 1
+    assert sim.stats.get('session_rejected', 0) == 0
+
+
+def test_wrong_captcha_gets_the_captcha_page(simulator):
+    sim, base_url = simulator(cases=(5, 5), session_ttl=60)
+    transport = Transport(rate=0)
+    http, _ = ecourts_login(transport, base_url, StubSolver())()
+    form = cause_list_form(CauseListKey('1', '1', '1', '1', '07-01-2025'))
+    response = transport.post(base_url + CAUSE_LIST_PATH, data={**form, CAPTCHA_FIELD: 'wrong'}, session=http)
+    assert is_captcha_page(response.content)
+    assert sim.stats['session_rejected'] == 1
+
+
+def test_cookies_set_outside_the_session_are_kept_with_it():
+    http = Transport(rate=0).new_session()
+    http.cookies.set('PHPSESSID', 'old', domain='127.0.0.1', path='/')
+    session = UpstreamSession(http, 'answer', 0.0, float('inf'))
+    session.update_cookies({'PHPSESSID': 'new', 'lang': 'en'})
+    assert session.cookies == {'PHPSESSID': 'new', 'lang': 'en'}
+    assert [cookie.domain for cookie in http.cookies if cookie.name == 'PHPSESSID'] == ['127.0.0.1']
+    NO_SESSION.update_cookies({'PHPSESSID': 'new'})
+    assert NO_SESSION.cookies == {}
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from causelist_engine import CAUSE_LIST_PATH, CauseListKey, cause_list_form
+from transport import DeadlineExceeded, TokenBucket, Transport, backoff_delay
+
+FORM = cause_list_form(CauseListKey('1', '1', '1', '1', '07-01-2025'))
+
+
+def fast_transport(**options):
+    options = {'rate': 0, 'backoff_base': 0.001, 'backoff_max': 0.001, **options}
+    return Transport(**options)
+
+
+def test_backoff_delay_is_full_jitter_within_cap():
+    for attempt in range(8):
+        for _ in range(50):
+            assert 0 <= backoff_delay(attempt, 0.5, 8.0) <= min(8.0, 0.5 * 2 ** attempt)
+
+
+def test_backoff_delay_honours_retry_after_up_to_the_cap():
+    assert backoff_delay(0, 0.5, 8.0, 429, '3') == 3.0
+    assert backoff_delay(0, 0.5, 8.0, 429, '60') == 8.0
+    assert backoff_delay(0, 0.5, 8.0, 503, '3') <= 0.5
+
+
+def test_token_bucket_spaces_requests_at_the_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    assert bucket.reserve() == 0.0
+    assert 0 < bucket.reserve() <= 0.05
+    assert not bucket.acquire(deadline=time.monotonic())
+    started = time.monotonic()
+    assert bucket.acquire()
+    assert time.monotonic() - started < 0.2
+
+
+def test_5xx_is_retried_until_max_retries(simulator):
+    sim, url = simulator(error_rate=1.0)
+    transport = fast_transport(max_retries=2)
+    response = transport.post(url + CAUSE_LIST_PATH, data=FORM)
+    assert response.status_code in (500, 502, 503)
+    assert sim.stats['errors'] == 3
+    assert transport.metrics.retries == 2
+
+
+def test_retries_recover_from_intermittent_errors(simulator):
+    sim, url = simulator(error_rate=0.5, cases=(5, 5))
+    transport = fast_transport(max_retries=10)
+    for court in range(20):
+        form = {**FORM, 'court_code': str(court)}
+        assert transport.post(url + CAUSE_LIST_PATH, data=form).status_code == 200
+    assert sim.stats['errors'] > 0
+    assert transport.metrics.retries == sim.stats['errors']
+
+
+def test_429_is_retried(simulator):
+    sim, url = simulator(throttle_rate=5, throttle_burst=1, cases=(1, 1))
+    transport = fast_transport(max_retries=50, backoff_max=0.05)
+    for _ in range(3):
+        assert transport.post(url + CAUSE_LIST_PATH, data=FORM).status_code == 200
+    assert sim.stats['throttled'] > 0
+    assert transport.metrics.responses[429] == sim.stats['throttled']
+
+
+def test_attempt_timeout_is_clipped_to_the_deadline(simulator):
+    _, url = simulator(latency=1.0)
+    transport = fast_transport(timeout=10.0, max_retries=3)
+    started = time.monotonic()
+    with pytest.raises((requests.Timeout, DeadlineExceeded)):
+        transport.post(url + CAUSE_LIST_PATH, data=FORM, deadline=0.3)
+    assert time.monotonic() - started < 0.9
+    assert transport.metrics.timeouts >= 1
+
+
+def test_connection_errors_are_retried_then_raised(closed_port_url):
+    transport = fast_transport(max_retries=2)
+    with pytest.raises(requests.ConnectionError):
+        transport.get(closed_port_url)
+    assert transport.metrics.connection_errors == 3
+    assert transport.metrics.retries == 2
+
+
+def test_per_host_limit_bounds_requests_in_flight(simulator):
+    _, url = simulator(latency=0.1, cases=(1, 1))
+    transport = fast_transport(pool_size=10, per_host_limit=2)
+    threads = [threading.Thread(target=transport.post, args=(url + CAUSE_LIST_PATH,), kwargs={'data': FORM})
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = transport.metrics.snapshot()
+    assert snapshot['max_in_flight'] == 2
+    assert snapshot['host_waits'] > 0
+    assert snapshot['pool_saturated'] > 0
@@ -0,0 +1,280 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+HOST_SLOT_POLL = (0.005, 0.1)
+
+
+class TransportError(Exception):
+    pass
+
+
+class DeadlineExceeded(TransportError):
+    pass
+
+
+def backoff_delay(attempt, base, maximum, status_code=None, retry_after=None):
+    """Full-jitter exponential backoff, honouring ``Retry-After`` seconds on 429."""
+    if status_code == 429 and retry_after and retry_after.isdigit():
+        return min(maximum, float(retry_after))
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens/second, bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token if one is available; otherwise return the seconds until one is."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def acquire(self, deadline=None):
+        """Take one token, sleeping as needed. Returns False if ``deadline`` would pass first."""
+        while True:
+            wait = self.reserve()
+            if wait == 0.0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class TransportMetrics:
+    def __init__(self, pool_size, per_host_limit=None):
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.responses = {}
+        self.retries = 0
+        self.timeouts = 0
+        self.connection_errors = 0
+        self.deadline_exceeded = 0
+        self.rate_limited_wait = 0.0
+        self.host_waits = 0
+        self.pool_saturated = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._host_in_flight = {}
+
+    def incr(self, name, value=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def record_response(self, status_code):
+        with self._lock:
+            self.responses[status_code] = self.responses.get(status_code, 0) + 1
+
+    def enter(self, host=None):
+        """Count a request in flight; it saturates the pool if it takes the last slot for its host or overall."""
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            saturated = self.in_flight >= self.pool_size
+            if host is not None:
+                count = self._host_in_flight[host] = self._host_in_flight.get(host, 0) + 1
+                saturated = saturated or (self.per_host_limit is not None and count >= self.per_host_limit)
+            if saturated:
+                self.pool_saturated += 1
+
+    def leave(self, host=None):
+        with self._lock:
+            self.in_flight -= 1
+            if host is not None:
+                self._host_in_flight[host] -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'responses': dict(self.responses),
+                'retries': self.retries,
+                'timeouts': self.timeouts,
+                'connection_errors': self.connection_errors,
+                'deadline_exceeded': self.deadline_exceeded,
+                'rate_limited_wait_seconds': round(self.rate_limited_wait, 3),
+                'host_waits': self.host_waits,
+                'pool_size': self.pool_size,
+                'per_host_limit': self.per_host_limit,
+                'pool_saturated': self.pool_saturated,
+                'pool_utilization': round(self.in_flight / self.pool_size, 3),
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+            }
+
+
+class Transport:
+    """Shared HTTP client for the eCourts upstream.
+
+    Wraps one ``requests.Session`` whose connection pool holds ``pool_size``
+    connections per host (callers block rather than open extra sockets).
+    Every request first takes a token from a global token bucket and a slot
+    from a per-host semaphore, gets a per-attempt timeout clipped to its
+    overall deadline, and is retried with full-jitter exponential backoff on
+    timeouts, connection errors and 429/5xx responses.
+    """
+
+    def __init__(self, pool_size=10, per_host_limit=4, rate=5.0, burst=None,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 timeout=10.0, deadline=30.0, headers=None):
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.deadline = deadline
+        self.bucket = TokenBucket(rate, burst)
+        self.metrics = TransportMetrics(pool_size, per_host_limit)
+
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                   pool_block=True, max_retries=0)
+        self.session = self.new_session(headers or {})
+
+        self._hosts = {}
+        self._hosts_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        env = os.environ
+        options = {
+            'pool_size': int(env.get('ECOURTS_POOL_SIZE', 10)),
+            'per_host_limit': int(env.get('ECOURTS_PER_HOST_LIMIT', 4)),
+            'rate': float(env.get('ECOURTS_RATE_LIMIT', 5.0)),
+            'max_retries': int(env.get('ECOURTS_MAX_RETRIES', 3)),
+            'timeout': float(env.get('ECOURTS_TIMEOUT', 10.0)),
+            'deadline': float(env.get('ECOURTS_DEADLINE', 30.0)),
+        }
+        options.update(kwargs)
+        return cls(**options)
+
+    def new_session(self, headers=None):
+        """A ``requests.Session`` with its own cookies, sharing this transport's connection pool."""
+        session = requests.Session()
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        session.headers.update(headers if headers is not None else self.session.headers)
+        return session
+
+    def _host_semaphore(self, host):
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            with self._hosts_lock:
+                semaphore = self._hosts.setdefault(host, threading.BoundedSemaphore(self.per_host_limit))
+        return semaphore
+
+    @contextmanager
+    def _host_slot(self, host, deadline):
+        semaphore = self._host_semaphore(host)
+        if not semaphore.acquire(blocking=False):
+            self.metrics.incr('host_waits')
+            if not semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise DeadlineExceeded(f"No free connection slot for {host} before deadline")
+        self.metrics.enter(host)
+        try:
+            yield
+        finally:
+            self.metrics.leave(host)
+            semaphore.release()
+
+    @asynccontextmanager
+    async def async_host_slot(self, host, deadline=None):
+        """``_host_slot`` for coroutines, on the same semaphore, so threads and coroutines share the per-host limit.
+
+        Waiting on the semaphore would block the event loop, so a coroutine
+        that finds no free slot polls for one, backing off from the first to
+        the second of HOST_SLOT_POLL seconds.
+        """
+        semaphore = self._host_semaphore(host)
+        if not semaphore.acquire(blocking=False):
+            self.metrics.incr('host_waits')
+            poll, poll_max = HOST_SLOT_POLL
+            while not semaphore.acquire(blocking=False):
+                if deadline is not None and time.monotonic() + poll >= deadline:
+                    raise DeadlineExceeded(f"No free connection slot for {host} before deadline")
+                await asyncio.sleep(poll)
+                poll = min(poll * 2, poll_max)
+        self.metrics.enter(host)
+        try:
+            yield
+        finally:
+            self.metrics.leave(host)
+            semaphore.release()
+
+    def _backoff(self, attempt, response=None):
+        return backoff_delay(attempt, self.backoff_base, self.backoff_max,
+                             response.status_code if response is not None else None,
+                             response.headers.get('Retry-After') if response is not None else None)
+
+    def request(self, method, url, deadline=None, session=None, **kwargs):
+        """Send through ``session`` (one from ``new_session``) or the transport's own."""
+        deadline = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            waited = time.monotonic()
+            if not self.bucket.acquire(deadline):
+                self.metrics.incr('deadline_exceeded')
+                raise DeadlineExceeded(f"Rate limit wait for {url} exceeds deadline")
+            self.metrics.incr('rate_limited_wait', time.monotonic() - waited)
+
+            response = error = None
+            try:
+                with self._host_slot(host, deadline):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise DeadlineExceeded(f"Deadline exceeded before requesting {url}")
+                    response = (session or self.session).request(method, url, timeout=min(self.timeout, remaining), **kwargs)
+            except DeadlineExceeded:
+                self.metrics.incr('deadline_exceeded')
+                raise
+            except requests.Timeout as e:
+                self.metrics.incr('timeouts')
+                error = e
+            except requests.ConnectionError as e:
+                self.metrics.incr('connection_errors')
+                error = e
+            else:
+                self.metrics.record_response(response.status_code)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+
+            delay = self._backoff(attempt, response)
+            if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                if error is not None:
+                    raise error
+                return response
+            attempt += 1
+            self.metrics.incr('retries')
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
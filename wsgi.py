@@ -0,0 +1,31 @@
+"""Production entry point: ``gunicorn -c gunicorn.conf.py wsgi:application``.
+
+Importing this module does all the read-only start-up work (court directory,
+hierarchy payloads; templates compile when ``app`` imports them) so that with ``preload_app`` it
+happens once in the gunicorn master. Forked workers then share those pages
+copy-on-write instead of each building their own copy. SQLite handles opened
+during the import are closed again, because a connection must not be used
+on both sides of a fork.
+"""
+import gc
+
+from app import app, close_connections, scraper, start_background_jobs
+
+
+def preload():
+    snapshot = scraper.directory.snapshot
+    snapshot.hierarchy_payload()
+    for state_code in snapshot.nodes[()]:
+        snapshot.hierarchy_payload(state_code)
+    close_connections()
+    # Move everything built so far out of the collector's reach, so a GC pass
+    # in a worker does not write to (and un-share) the preloaded pages.
+    gc.freeze()
+
+
+def post_fork():
+    start_background_jobs()
+
+
+preload()
+application = app